@@ -0,0 +1,107 @@
+"""
+Benchmark de leitura da aba PRODUTOS: iter_rows do openpyxl (read_only) x
+leitor direto do XML (leitores_planilha.ler_linhas_xml).
+
+Uso:
+    python benchmark_produtos.py planilha.xlsx
+    python benchmark_produtos.py --gerar 300000   (gera uma planilha sintetica)
+"""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook, load_workbook
+
+from leitores_planilha import (
+    ler_calendario,
+    ler_formatos_data,
+    ler_linhas_xml,
+    ler_textos_compartilhados,
+)
+from planilha_validator import CABECALHOS_ESPERADOS, mapear_abas_xlsx
+
+ABA = "PRODUTOS"
+
+
+def gerar_planilha(caminho, linhas):
+    """Gera uma planilha so com a aba PRODUTOS, com valores parecidos com os reais."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(ABA)
+    cabecalho = CABECALHOS_ESPERADOS[ABA]
+    ws.append(cabecalho)
+    base = datetime(2024, 1, 1)
+    for i in range(1, linhas + 1):
+        linha = []
+        for j, nome in enumerate(cabecalho):
+            if nome.startswith("Preco"):
+                linha.append(round(10 + (i * 7 + j) % 5000 / 100, 2))
+            elif nome.startswith("Dt"):
+                linha.append(base + timedelta(days=i % 365))
+            elif nome.startswith(("Cod", "Qtde")):
+                linha.append((i * 31 + j) % 100000)
+            else:
+                linha.append(f"{nome} {i % 5000}")
+        ws.append(linha)
+    wb.save(caminho)
+
+
+def medir(nome, funcao):
+    t0 = time.perf_counter()
+    linhas = sum(1 for _ in funcao())
+    tempo = time.perf_counter() - t0
+    print(f"  {nome:<36} {linhas:>9} linhas {tempo:>8.2f}s {linhas / tempo:>12,.0f} linhas/s")
+    return tempo
+
+
+def main():
+    temporario = None
+    if len(sys.argv) >= 3 and sys.argv[1] == "--gerar":
+        linhas = int(sys.argv[2])
+        temporario = os.path.join(tempfile.gettempdir(), f"benchmark_produtos_{linhas}.xlsx")
+        if not os.path.exists(temporario):
+            print(f"Gerando {temporario} ({linhas} linhas)...")
+            gerar_planilha(temporario, linhas)
+        arquivo = temporario
+    elif len(sys.argv) == 2:
+        arquivo = sys.argv[1]
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    with zipfile.ZipFile(arquivo) as zf:
+        caminho = mapear_abas_xlsx(zf)[ABA]
+
+    def openpyxl_iter_rows():
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            yield from wb[ABA].iter_rows(min_row=1, min_col=1, values_only=True)
+        finally:
+            wb.close()
+
+    def xml():
+        with zipfile.ZipFile(arquivo) as zf:
+            textos = ler_textos_compartilhados(zf)
+            datas, duracoes = ler_formatos_data(zf)
+            calendario = ler_calendario(zf)
+            with zf.open(caminho) as f:
+                yield from ler_linhas_xml(f, textos, datas, duracoes, calendario)
+
+    # Os dois leitores precisam devolver exatamente os mesmos valores
+    for a, b in zip(openpyxl_iter_rows(), xml()):
+        if a != b:
+            print(f"DIVERGENCIA:\n  openpyxl: {a}\n  xml:      {b}")
+            sys.exit(1)
+
+    print(f"\nLEITURA DA ABA {ABA}: {arquivo}")
+    print("-" * 80)
+    base = medir("openpyxl iter_rows (read_only)", openpyxl_iter_rows)
+    xml_direto = medir("XML direto", xml)
+    print("-" * 80)
+    print(f"  Ganho: {base / xml_direto:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# cache_resultados.py
+"""
+Cache em disco dos resultados da validação, endereçado pelo conteúdo.
+
+A chave é o SHA-256 dos bytes da planilha de entrada mais tudo o que muda a
+saída (versão do validador, versão SRPPWIN escolhida, modo de leitura...).
+Quem reenvia exatamente o mesmo arquivo, ou clica de novo em "Validar
+Planilha", recebe a planilha validada e as etiquetas já geradas sem
+carregar, validar nem salvar nada outra vez.
+
+Cada entrada é uma pasta com saida.xlsx, etiquetas.xlsx (se houver) e
+meta.json. O meta.json é gravado por último; a entrada só vale quando ele diz
+que está completa. O tamanho total é limitado: quando passa do limite, as
+entradas usadas há mais tempo (mtime do meta.json, atualizado a cada acerto)
+são apagadas.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Limite padrão do cache em disco
+LIMITE_PADRAO = 500 * 1024 * 1024
+
+ARQUIVO_META = "meta.json"
+
+
+def pasta_padrao():
+    """%LOCALAPPDATA%\\ValidadorSINT\\cache no Windows; ~/.cache/validador_sint nos demais."""
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return os.path.join(base, "ValidadorSINT", "cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "validador_sint")
+
+
+def _assinatura_codigo():
+    """
+    Fora do executável, a data de modificação dos módulos do validador entra
+    na chave: quem está mexendo nas regras não recebe resultado velho.
+    """
+    if getattr(sys, "frozen", False):
+        return ""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    partes = []
+    for nome in ("planilha_validator.py", "leitores_planilha.py", "validacao_vetorizada.py", "indice_chaves.py"):
+        try:
+            partes.append(f"{nome}:{os.path.getmtime(os.path.join(pasta, nome))}")
+        except OSError:
+            pass
+    return ";".join(partes)
+
+
+class ArquivoEmCache:
+    """Arquivo do cache com a interface save() do Workbook (ver salvar_workbook_atomico)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def save(self, destino):
+        if isinstance(destino, (str, os.PathLike)):
+            shutil.copyfile(self.caminho, destino)
+        else:
+            with open(self.caminho, "rb") as f:
+                shutil.copyfileobj(f, destino)
+
+
+class CacheResultados:
+    """
+    pasta: onde as entradas ficam (padrão: pasta_padrao()).
+    limite_bytes: tamanho máximo somado das entradas.
+    versao: versão do validador; entra em todas as chaves.
+    """
+
+    def __init__(self, pasta=None, limite_bytes=LIMITE_PADRAO, versao=""):
+        self.pasta = pasta or pasta_padrao()
+        self.limite_bytes = limite_bytes
+        self.versao = versao
+        self.acertos = 0
+        self.faltas = 0
+
+    def chave(self, arquivos, **parametros):
+        """SHA-256 do conteúdo de `arquivos` mais os parâmetros que mudam a saída."""
+        h = hashlib.sha256()
+        cabecalho = {"versao": self.versao, "codigo": _assinatura_codigo(), **parametros}
+        h.update(json.dumps(cabecalho, sort_keys=True, default=str).encode("utf-8"))
+        for caminho in arquivos:
+            # O nome importa no layout de um CSV por aba (ele diz qual é a aba)
+            h.update(b"\0" + os.path.basename(caminho).upper().encode("utf-8") + b"\0")
+            with open(caminho, "rb") as f:
+                for bloco in iter(lambda: f.read(1 << 20), b""):
+                    h.update(bloco)
+        return h.hexdigest()
+
+    def _entrada(self, chave):
+        return os.path.join(self.pasta, chave)
+
+    def _ler_meta(self, chave):
+        try:
+            with open(os.path.join(self._entrada(chave), ARQUIVO_META), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_meta(self, chave, meta):
+        pasta = self._entrada(chave)
+        fd, temporario = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=pasta)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temporario, os.path.join(pasta, ARQUIVO_META))
+
+    def buscar(self, chave):
+        """
+        Retorna o meta.json da entrada completa (e marca o uso para o LRU), ou
+        None. Conta acertos e faltas.
+        """
+        meta = self._ler_meta(chave)
+        if meta is None or not meta.get("completo"):
+            self.faltas += 1
+            return None
+        try:
+            os.utime(os.path.join(self._entrada(chave), ARQUIVO_META))
+        except OSError:
+            pass
+        self.acertos += 1
+        return meta
+
+    def arquivo(self, chave, nome):
+        """ArquivoEmCache de um arquivo da entrada (ex.: "saida.xlsx")."""
+        return ArquivoEmCache(os.path.join(self._entrada(chave), nome))
+
+    def gravar(self, chave, nome, dados, meta):
+        """
+        Guarda `dados` (caminho de arquivo ou objeto com getvalue(), como o
+        BytesIO de processar) como `nome` na entrada e atualiza o meta.json.
+        Com nome None só o meta.json é atualizado. Erros de disco não
+        interrompem a validação: o resultado só deixa de ficar em cache.
+        """
+        if nome is not None and not isinstance(dados, (str, os.PathLike)) and not hasattr(dados, "getvalue"):
+            return  # objeto de arquivo do chamador: não há como reler o conteúdo
+        pasta = self._entrada(chave)
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            if nome is not None:
+                destino = os.path.join(pasta, nome)
+                if isinstance(dados, (str, os.PathLike)):
+                    shutil.copyfile(dados, destino)
+                else:
+                    with open(destino, "wb") as f:
+                        f.write(dados.getvalue())
+            self._gravar_meta(chave, meta)
+            if meta.get("completo"):
+                self._limitar_tamanho()
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar no cache de resultados: {e}")
+
+    def _limitar_tamanho(self):
+        """Apaga as entradas usadas há mais tempo até caber em limite_bytes."""
+        entradas = []
+        total = 0
+        for chave in os.listdir(self.pasta):
+            pasta = self._entrada(chave)
+            try:
+                tamanho = sum(e.stat().st_size for e in os.scandir(pasta) if e.is_file())
+                uso = os.path.getmtime(os.path.join(pasta, ARQUIVO_META))
+            except OSError:
+                continue
+            entradas.append((uso, tamanho, pasta))
+            total += tamanho
+        for uso, tamanho, pasta in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanho
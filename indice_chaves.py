@@ -0,0 +1,114 @@
+# indice_chaves.py
+"""
+Índice das chaves entre abas (FILIAL, REPR, PAGTO, TRANSP, FAMILIAS, ESTILOS).
+
+Cada aba mestre, ao ser validada, registra aqui os códigos aceitos e a linha
+que definiu cada um; as abas que apontam para ela (PAGTOFILIAL, CLIENTES,
+PRODUTOS) consultam o cadastro em O(1) e, na mesma passada, contam quantas
+linhas usam cada código e quais códigos citados não existem. No fim da
+validação, `relatorio()` lista os códigos cadastrados que nenhuma aba usou
+(ex.: famílias sem produto) e os órfãos, sem reler nenhuma aba.
+"""
+
+
+class CadastroChaves:
+    """
+    Códigos de uma aba mestre, na ordem em que foram registrados.
+    linhas: {código: linha que o definiu}; usos: {código: linhas que o citam};
+    orfaos: {(aba, coluna): {código inexistente: primeira linha que o citou}}.
+    """
+
+    def __init__(self, aba):
+        self.aba = aba
+        self.linhas = {}
+        self.descricoes = {}
+        self.usos = {}
+        self.orfaos = {}
+        self.referenciado_por = []
+
+    def __contains__(self, chave):
+        return chave in self.linhas
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def __iter__(self):
+        return iter(self.linhas)
+
+    def registrar(self, chave, linha=None):
+        """Registra o código (o primeiro registro de cada código vale)."""
+        if chave not in self.linhas:
+            self.linhas[chave] = linha
+
+    def descrever(self, chave, descricao):
+        """Texto associado ao código (ex.: nome da transportadora)."""
+        self.descricoes[chave] = descricao
+
+    def primeira(self):
+        return next(iter(self.linhas), None)
+
+    def referencia(self, aba, coluna):
+        """
+        Funções (usar, orfao) para uma coluna que aponta para este cadastro:
+        usar(código) conta um uso de código existente; orfao(código, linha)
+        guarda o código inexistente com a primeira linha que o citou.
+        """
+        origem = (aba, coluna)
+        if origem not in self.referenciado_por:
+            self.referenciado_por.append(origem)
+        usos = self.usos
+        orfaos = self.orfaos.setdefault(origem, {})
+
+        def usar(chave):
+            usos[chave] = usos.get(chave, 0) + 1
+
+        def orfao(chave, linha):
+            orfaos.setdefault(chave, linha)
+
+        return usar, orfao
+
+    def nao_usadas(self):
+        """[(código, linha)] dos códigos que nenhuma referência citou."""
+        usos = self.usos
+        return [(chave, linha) for chave, linha in self.linhas.items() if chave not in usos]
+
+
+class IndiceChaves:
+    """Cadastros das abas mestre, criados na primeira consulta a cada um."""
+
+    def __init__(self):
+        self.cadastros = {}
+
+    def __getitem__(self, aba):
+        cadastro = self.cadastros.get(aba)
+        if cadastro is None:
+            cadastro = self.cadastros[aba] = CadastroChaves(aba)
+        return cadastro
+
+    def relatorio(self, limite=10):
+        """
+        Linhas de texto com, para cada cadastro citado por outra aba, os
+        códigos nunca usados e os códigos citados que não existem (no máximo
+        `limite` exemplos de cada).
+        """
+        linhas = []
+        for aba, cadastro in self.cadastros.items():
+            if not cadastro.referenciado_por:
+                continue
+            origens = ", ".join(f"{a}.{c}" for a, c in cadastro.referenciado_por)
+            nao_usadas = cadastro.nao_usadas()
+            linhas.append(
+                f"{aba}: {len(cadastro)} códigos, {len(cadastro) - len(nao_usadas)} usados por {origens}"
+            )
+            if nao_usadas:
+                exemplos = ", ".join(f"{chave} (linha {linha})" for chave, linha in nao_usadas[:limite])
+                resto = f" e mais {len(nao_usadas) - limite}" if len(nao_usadas) > limite else ""
+                linhas.append(f"  sem uso: {exemplos}{resto}")
+            for (origem_aba, origem_coluna), orfaos in cadastro.orfaos.items():
+                if not orfaos:
+                    continue
+                itens = list(orfaos.items())
+                exemplos = ", ".join(f"{chave} (linha {linha})" for chave, linha in itens[:limite])
+                resto = f" e mais {len(itens) - limite}" if len(itens) > limite else ""
+                linhas.append(f"  inexistentes em {origem_aba}.{origem_coluna}: {exemplos}{resto}")
+        return linhas
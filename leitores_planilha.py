@@ -0,0 +1,633 @@
+# leitores_planilha.py
+"""
+Leitores de planilha que não passam pelo modelo de células do openpyxl:
+formatos que ele não abre (.xlsb, .xls e .csv) e um leitor direto do XML das
+abas .xlsx, usado para a aba PRODUTOS no modo streaming.
+
+Cada leitor recebe o caminho do arquivo e gera pares (nome_da_aba, linhas),
+onde `linhas` é um iterável de tuplas de valores, na mesma forma que
+ws.iter_rows(values_only=True) entrega para as planilhas .xlsx. O validador
+monta as abas compactas a partir desse fluxo (ver carregar_workbook_compacto),
+então os validadores não sabem de que formato a planilha veio.
+
+Para suportar um formato novo basta registrar o leitor em LEITORES.
+"""
+import codecs
+import csv
+import os
+import struct
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904,
+    CALENDAR_WINDOWS_1900,
+    from_excel,
+    from_ISO8601,
+)
+
+
+# Namespaces usados no XML interno do .xlsx/.xlsb
+NS_PLANILHA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_RELACOES = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+# Abas do questionário; usadas para reconhecer o modo "um CSV por aba".
+ABAS_QUESTIONARIO = (
+    "EMPRESA", "FILIAL", "REPR", "PAGTO", "PAGTOFILIAL", "TRANSP", "ESTADOS",
+    "CLIENTES", "FAMILIAS", "ESTILOS", "PRODUTOS",
+)
+
+# Nome da coluna que, na primeira posição de um CSV único, indica a aba de cada linha.
+COLUNA_ABA_CSV = "ABA"
+
+
+def _numero(valor):
+    """Números inteiros voltam como int, como o openpyxl faz ao ler um .xlsx."""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+# ---------------------------------------------------------------------------
+# .xlsx direto do XML (sem o modelo de células/estilos do openpyxl)
+# ---------------------------------------------------------------------------
+_TAG_ROW = f"{NS_PLANILHA}row"
+_TAG_V = f"{NS_PLANILHA}v"
+_TAG_T = f"{NS_PLANILHA}t"
+_TAG_R = f"{NS_PLANILHA}r"
+_TAG_IS = f"{NS_PLANILHA}is"
+_TAG_SI = f"{NS_PLANILHA}si"
+_TAG_SHEET_DATA = f"{NS_PLANILHA}sheetData"
+_TAG_DIMENSION = f"{NS_PLANILHA}dimension"
+
+
+def _texto_xml(elem):
+    """Texto de um <si>/<is>: o <t> direto mais os <t> dos trechos <r> (como o openpyxl)."""
+    partes = []
+    t = elem.find(_TAG_T)
+    if t is not None:
+        partes.append(t.text or "")
+    for trecho in elem.iter(_TAG_R):
+        t = trecho.find(_TAG_T)
+        if t is not None and t.text:
+            partes.append(t.text)
+    return "".join(partes)
+
+
+def ler_textos_compartilhados(zf):
+    """Lista de xl/sharedStrings.xml, com o mesmo tratamento do openpyxl."""
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    textos = []
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, elem in ElementTree.iterparse(f):
+            if elem.tag == _TAG_SI:
+                textos.append(_texto_xml(elem).replace("x005F_", ""))
+                elem.clear()
+    return textos
+
+
+def ler_formatos_data(zf):
+    """
+    Índices de cellXfs com formato de data e, dentre eles, os de duração
+    ([h]:mm...). Retorna (datas, duracoes).
+    """
+    if "xl/styles.xml" not in zf.namelist():
+        return set(), set()
+    raiz = ElementTree.parse(zf.open("xl/styles.xml")).getroot()
+    formatos = dict(BUILTIN_FORMATS)
+    for fmt in raiz.iter(f"{NS_PLANILHA}numFmt"):
+        formatos[int(fmt.get("numFmtId"))] = fmt.get("formatCode") or ""
+    datas, duracoes = set(), set()
+    xfs = raiz.find(f"{NS_PLANILHA}cellXfs")
+    for i, xf in enumerate(xfs if xfs is not None else ()):
+        codigo = formatos.get(int(xf.get("numFmtId", 0)), "")
+        if is_date_format(codigo):
+            datas.add(i)
+            if is_timedelta_format(codigo):
+                duracoes.add(i)
+    return datas, duracoes
+
+
+def ler_calendario(zf):
+    raiz = ElementTree.parse(zf.open("xl/workbook.xml")).getroot()
+    propriedades = raiz.find(f"{NS_PLANILHA}workbookPr")
+    if propriedades is not None and propriedades.get("date1904") in ("1", "true"):
+        return CALENDAR_MAC_1904
+    return CALENDAR_WINDOWS_1900
+
+
+# Letras da coluna ("AB") -> índice (28); as mesmas letras se repetem em
+# todas as linhas da aba.
+_INDICES_COLUNA = {}
+
+
+def _indice_coluna(letras):
+    indice = _INDICES_COLUNA.get(letras)
+    if indice is None:
+        indice = 0
+        for letra in letras:
+            indice = indice * 26 + ord(letra) - 64
+        _INDICES_COLUNA[letras] = indice
+    return indice
+
+
+def ler_linhas_xml(f, textos, datas=(), duracoes=(), calendario=CALENDAR_WINDOWS_1900):
+    """
+    Gera as linhas de uma aba .xlsx (stream do xl/worksheets/sheetN.xml) como
+    tuplas de valores já tipados, iguais às de
+    iter_rows(min_row=1, min_col=1, values_only=True) em read_only/data_only:
+    linhas que faltam viram linhas vazias e tudo é limitado/preenchido pela
+    <dimension> da aba.
+    """
+    max_row = max_col = None
+    vazia = ()
+    proxima = 1
+    contador = 0
+    dados = None
+    for evento, elem in ElementTree.iterparse(f, events=("start", "end")):
+        if evento == "start":
+            if elem.tag == _TAG_SHEET_DATA:
+                dados = elem
+            continue
+        tag = elem.tag
+        if tag != _TAG_ROW:
+            if tag == _TAG_DIMENSION:
+                ref = elem.get("ref", "").split(":")[-1]
+                letras = ref.rstrip("0123456789")
+                if letras and ref[len(letras):]:
+                    max_col = _indice_coluna(letras)
+                    max_row = int(ref[len(letras):])
+                    vazia = (None,) * max_col
+            elif tag == _TAG_SHEET_DATA:
+                break
+            continue
+
+        r = elem.get("r")
+        contador = int(float(r)) if r else contador + 1
+        if max_row is not None and contador > max_row:
+            break
+        while proxima < contador:
+            yield vazia
+            proxima += 1
+        proxima = contador + 1
+
+        valores = [None] * max_col if max_col else []
+        col = 0
+        for c in elem:
+            ref = c.get("r")
+            col = _indice_coluna(ref.rstrip("0123456789")) if ref else col + 1
+            if max_col and col > max_col:
+                continue
+
+            tipo = c.get("t")
+            if tipo == "inlineStr":
+                texto = c.find(_TAG_IS)
+                valor = _texto_xml(texto) if texto is not None else None
+            else:
+                valor = c.findtext(_TAG_V) or None
+                if valor is None:
+                    pass
+                elif tipo is None or tipo == "n":
+                    if "." in valor or "E" in valor or "e" in valor:
+                        valor = float(valor)
+                    else:
+                        valor = int(valor)
+                    estilo = c.get("s")
+                    if estilo and int(estilo) in datas:
+                        try:
+                            valor = from_excel(valor, calendario, timedelta=int(estilo) in duracoes)
+                        except (OverflowError, ValueError):
+                            valor = "#VALUE!"
+                elif tipo == "s":
+                    valor = textos[int(valor)]
+                elif tipo == "b":
+                    valor = bool(int(valor))
+                elif tipo == "d":
+                    valor = from_ISO8601(valor)
+
+            if col > len(valores):
+                valores.extend([None] * (col - len(valores)))
+            valores[col - 1] = valor
+        yield tuple(valores)
+        if dados is not None:
+            dados.clear()
+
+
+def ler_aba_xlsx(arquivo, caminho_xml):
+    """Atalho para ler uma aba de um .xlsx sem nenhum contexto carregado antes."""
+    with zipfile.ZipFile(arquivo) as zf:
+        textos = ler_textos_compartilhados(zf)
+        datas, duracoes = ler_formatos_data(zf)
+        calendario = ler_calendario(zf)
+        with zf.open(caminho_xml) as f:
+            yield from ler_linhas_xml(f, textos, datas, duracoes, calendario)
+
+
+# ---------------------------------------------------------------------------
+# Leitura paralela das abas .xlsx
+# ---------------------------------------------------------------------------
+# Cada aba é um XML independente dentro do zip, então pode ser decodificada em
+# outro processo. O processo principal lê os textos compartilhados uma vez só e
+# os entrega a cada trabalhador no início (_iniciar_processo_leitura); cada
+# trabalhador abre o próprio ZipFile e devolve a aba inteira como lista de
+# tuplas. Como as tuplas referenciam os mesmos objetos de `textos`, o pickle
+# do resultado manda cada texto repetido uma vez só.
+_contexto_processo = {}
+
+
+def _iniciar_processo_leitura(arquivo, textos, datas, duracoes, calendario):
+    _contexto_processo.update(
+        arquivo=arquivo, textos=textos, datas=datas, duracoes=duracoes, calendario=calendario,
+    )
+
+
+def _ler_aba_em_processo(caminho_xml):
+    c = _contexto_processo
+    with zipfile.ZipFile(c["arquivo"]) as zf, zf.open(caminho_xml) as f:
+        return list(ler_linhas_xml(f, c["textos"], c["datas"], c["duracoes"], c["calendario"]))
+
+
+def iniciar_leitura_paralela(arquivo, caminhos, textos, datas, duracoes, calendario, processos):
+    """
+    Dispara a leitura das abas `caminhos` ({nome: caminho_xml}) num
+    ProcessPoolExecutor com até `processos` processos, das maiores para as
+    menores. Retorna (executor, {nome: Future}); o resultado de cada Future é
+    a lista de tuplas da aba, igual à de ler_linhas_xml.
+
+    Usa sempre o método "spawn" (o padrão no Windows), para que o comportamento
+    seja o mesmo em todas as plataformas e a GUI (Tk + threads) não seja
+    copiada por fork.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    with zipfile.ZipFile(arquivo) as zf:
+        tamanhos = {nome: zf.getinfo(caminho).file_size for nome, caminho in caminhos.items()}
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, min(processos, len(caminhos))),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_processo_leitura,
+        initargs=(arquivo, list(textos), datas, duracoes, calendario),
+    )
+    futuros = {}
+    for nome in sorted(caminhos, key=tamanhos.get, reverse=True):
+        futuros[nome] = executor.submit(_ler_aba_em_processo, caminhos[nome])
+    return executor, futuros
+
+
+# ---------------------------------------------------------------------------
+# .xlsb (Excel binário, registros BIFF12)
+# ---------------------------------------------------------------------------
+# Tipos de registro usados (MS-XLSB 2.3.2).
+BRT_ROW_HDR = 0
+BRT_CELL_BLANK = 1
+BRT_CELL_RK = 2
+BRT_CELL_ERROR = 3
+BRT_CELL_BOOL = 4
+BRT_CELL_REAL = 5
+BRT_CELL_ST = 6
+BRT_CELL_ISST = 7
+BRT_FMLA_STRING = 8
+BRT_FMLA_NUM = 9
+BRT_FMLA_BOOL = 10
+BRT_FMLA_ERROR = 11
+BRT_SST_ITEM = 19
+BRT_FMT = 44
+BRT_XF = 47
+BRT_CELL_RSTRING = 62
+BRT_END_SHEET_DATA = 146
+BRT_WB_PROP = 153
+BRT_BUNDLE_SH = 156
+BRT_BEGIN_CELL_XFS = 617
+BRT_END_CELL_XFS = 618
+
+ERROS_XLSB = {
+    0x00: "#NULL!", 0x07: "#DIV/0!", 0x0F: "#VALUE!", 0x17: "#REF!",
+    0x1D: "#NAME?", 0x24: "#NUM!", 0x2A: "#N/A", 0x2B: "#GETTING_DATA",
+}
+
+_UINT32 = struct.Struct("<I")
+_INT32 = struct.Struct("<i")
+_DOUBLE = struct.Struct("<d")
+_CELULA = struct.Struct("<IHB")  # coluna, 3 bytes de iStyleRef (2 + 1)
+
+
+def _ler_registros(f, tamanho_bloco=1 << 20):
+    """Gera (tipo, dados) de um stream de registros BIFF12, lendo em blocos."""
+    buf = b""
+    pos = 0
+    while True:
+        if len(buf) - pos < 6:
+            buf = buf[pos:] + f.read(tamanho_bloco)
+            pos = 0
+            if not buf:
+                return
+        tipo = buf[pos]
+        pos += 1
+        if tipo & 0x80:
+            tipo = (tipo & 0x7F) | ((buf[pos] & 0x7F) << 7)
+            pos += 1
+        tamanho = 0
+        for deslocamento in (0, 7, 14, 21):
+            byte = buf[pos]
+            pos += 1
+            tamanho |= (byte & 0x7F) << deslocamento
+            if not byte & 0x80:
+                break
+        fim = pos + tamanho
+        if fim > len(buf):
+            buf = buf[pos:] + f.read(max(fim - len(buf), tamanho_bloco))
+            pos = 0
+            fim = tamanho
+            if fim > len(buf):
+                return  # arquivo truncado
+        yield tipo, buf[pos:fim]
+        pos = fim
+
+
+def _texto_xlsb(dados, inicio):
+    """Lê um XLWideString (uint32 de caracteres + UTF-16LE). Retorna (texto, fim)."""
+    n = _UINT32.unpack_from(dados, inicio)[0]
+    if n == 0xFFFFFFFF:  # XLNullableWideString nulo
+        return None, inicio + 4
+    fim = inicio + 4 + 2 * n
+    return dados[inicio + 4:fim].decode("utf-16-le"), fim
+
+
+def _rk(rk):
+    if rk & 0x02:
+        valor = _INT32.unpack(_UINT32.pack(rk))[0] >> 2
+    else:
+        valor = _DOUBLE.unpack(struct.pack("<Q", (rk & 0xFFFFFFFC) << 32))[0]
+    if rk & 0x01:
+        valor /= 100
+    return valor
+
+
+def _formatos_data_xlsb(zf):
+    """Conjunto dos índices de cellXfs cujo formato numérico é de data/hora."""
+    if "xl/styles.bin" not in zf.namelist():
+        return set()
+    formatos = dict(BUILTIN_FORMATS)
+    xfs = []
+    dentro_xfs = False
+    with zf.open("xl/styles.bin") as f:
+        for tipo, dados in _ler_registros(f):
+            if tipo == BRT_FMT:
+                formatos[struct.unpack_from("<H", dados)[0]] = _texto_xlsb(dados, 2)[0]
+            elif tipo == BRT_BEGIN_CELL_XFS:
+                dentro_xfs = True
+            elif tipo == BRT_END_CELL_XFS:
+                break
+            elif tipo == BRT_XF and dentro_xfs:
+                xfs.append(struct.unpack_from("<H", dados, 2)[0])
+    return {i for i, num_fmt in enumerate(xfs) if is_date_format(formatos.get(num_fmt) or "")}
+
+
+def _abas_xlsb(zf):
+    """Lista (nome, caminho do .bin) das abas, na ordem do arquivo, e o calendário."""
+    with zf.open("xl/_rels/workbook.bin.rels") as f:
+        alvos = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ElementTree.parse(f).getroot().iter(f"{NS_PACOTE}Relationship")
+        }
+    abas = []
+    calendario = CALENDAR_WINDOWS_1900
+    with zf.open("xl/workbook.bin") as f:
+        for tipo, dados in _ler_registros(f):
+            if tipo == BRT_WB_PROP and _UINT32.unpack_from(dados)[0] & 0x01:
+                calendario = CALENDAR_MAC_1904
+            elif tipo == BRT_BUNDLE_SH:
+                rel_id, fim = _texto_xlsb(dados, 8)
+                nome = _texto_xlsb(dados, fim)[0]
+                alvo = alvos.get(rel_id)
+                if alvo:
+                    alvo = alvo.lstrip("/")
+                    abas.append((nome, alvo if alvo.startswith("xl/") else f"xl/{alvo}"))
+    return abas, calendario
+
+
+def _linhas_xlsb(zf, caminho, textos, estilos_data, calendario):
+    """Gera as linhas de uma aba .xlsb como tuplas (linhas vazias viram tuplas vazias)."""
+    proxima = 0  # índice (0-based) da próxima linha a emitir
+    atual = None
+    valores = []
+    with zf.open(caminho) as f:
+        for tipo, dados in _ler_registros(f):
+            if tipo == BRT_ROW_HDR:
+                if atual is not None:
+                    yield tuple(valores)
+                    proxima = atual + 1
+                atual = _UINT32.unpack_from(dados)[0]
+                while proxima < atual:
+                    yield ()
+                    proxima += 1
+                valores = []
+                continue
+            if tipo == BRT_END_SHEET_DATA:
+                break
+            if (tipo > BRT_FMLA_ERROR and tipo != BRT_CELL_RSTRING) or tipo == BRT_CELL_BLANK:
+                continue
+
+            coluna, estilo_baixo, estilo_alto = _CELULA.unpack_from(dados)
+            if tipo in (BRT_CELL_RK, BRT_CELL_REAL, BRT_FMLA_NUM):
+                if tipo == BRT_CELL_RK:
+                    valor = _rk(_UINT32.unpack_from(dados, 8)[0])
+                else:
+                    valor = _DOUBLE.unpack_from(dados, 8)[0]
+                if estilo_baixo | (estilo_alto << 16) in estilos_data:
+                    valor = from_excel(valor, calendario)
+                else:
+                    valor = _numero(valor)
+            elif tipo == BRT_CELL_ISST:
+                valor = textos[_UINT32.unpack_from(dados, 8)[0]]
+            elif tipo in (BRT_CELL_ST, BRT_FMLA_STRING):
+                valor = _texto_xlsb(dados, 8)[0]
+            elif tipo == BRT_CELL_RSTRING:
+                valor = _texto_xlsb(dados, 9)[0]
+            elif tipo in (BRT_CELL_BOOL, BRT_FMLA_BOOL):
+                valor = bool(dados[8])
+            else:
+                valor = ERROS_XLSB.get(dados[8], "#N/A")
+
+            if coluna >= len(valores):
+                valores.extend([None] * (coluna + 1 - len(valores)))
+            valores[coluna] = valor
+    if atual is not None:
+        yield tuple(valores)
+
+
+def ler_abas_xlsb(arquivo):
+    """Lê um .xlsb direto dos registros binários, sem dependências externas."""
+    with zipfile.ZipFile(arquivo) as zf:
+        textos = []
+        if "xl/sharedStrings.bin" in zf.namelist():
+            with zf.open("xl/sharedStrings.bin") as f:
+                for tipo, dados in _ler_registros(f):
+                    if tipo == BRT_SST_ITEM:
+                        # RichStr: 1 byte de flags seguido do texto
+                        textos.append(_texto_xlsb(dados, 1)[0])
+        estilos_data = _formatos_data_xlsb(zf)
+        abas, calendario = _abas_xlsb(zf)
+        for nome, caminho in abas:
+            yield nome, _linhas_xlsb(zf, caminho, textos, estilos_data, calendario)
+
+
+# ---------------------------------------------------------------------------
+# .xls (Excel 97-2003)
+# ---------------------------------------------------------------------------
+def ler_abas_xls(arquivo):
+    """Lê um .xls com o pacote xlrd (dependência opcional, só exigida para .xls)."""
+    try:
+        import xlrd
+    except ImportError:
+        raise ValueError(
+            "Para validar arquivos .xls é necessário instalar o pacote xlrd "
+            "(pip install xlrd) ou salvar a planilha como .xlsx."
+        )
+
+    livro = xlrd.open_workbook(arquivo, on_demand=True)
+    try:
+        for nome in livro.sheet_names():
+            aba = livro.sheet_by_name(nome)
+
+            def linhas(aba=aba):
+                for r in range(aba.nrows):
+                    valores = []
+                    for tipo, valor in zip(aba.row_types(r), aba.row_values(r)):
+                        if tipo in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                            valor = None
+                        elif tipo == xlrd.XL_CELL_NUMBER:
+                            valor = _numero(valor)
+                        elif tipo == xlrd.XL_CELL_DATE:
+                            valor = xlrd.xldate.xldate_as_datetime(valor, livro.datemode)
+                        elif tipo == xlrd.XL_CELL_BOOLEAN:
+                            valor = bool(valor)
+                        elif tipo == xlrd.XL_CELL_ERROR:
+                            valor = xlrd.error_text_from_code.get(valor, "#N/A")
+                        valores.append(valor)
+                    yield tuple(valores)
+
+            yield nome, linhas()
+            livro.unload_sheet(nome)
+    finally:
+        livro.release_resources()
+
+
+# ---------------------------------------------------------------------------
+# .csv
+# ---------------------------------------------------------------------------
+class _CsvPontoEVirgula(csv.excel):
+    """Padrão do Excel em português quando o delimitador não é detectado."""
+    delimiter = ";"
+
+
+def _codificacao_csv(caminho):
+    """UTF-8 (com ou sem BOM) quando o arquivo inteiro decodifica; senão cp1252 (Excel BR)."""
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    with open(caminho, "rb") as f:
+        try:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                decodificador.decode(bloco)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "cp1252"
+    return "utf-8-sig"
+
+
+def _linhas_csv(caminho):
+    codificacao = _codificacao_csv(caminho)
+    with open(caminho, newline="", encoding=codificacao) as f:
+        amostra = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t|")
+        except csv.Error:
+            dialeto = _CsvPontoEVirgula
+        for linha in csv.reader(f, dialeto):
+            yield tuple(valor if valor != "" else None for valor in linha)
+
+
+def _csvs_por_aba(arquivo):
+    """
+    Se o CSV escolhido se chama como uma aba do questionário, retorna
+    {aba: caminho} com os CSVs de nome de aba da mesma pasta; senão, None.
+    """
+    pasta, nome_arquivo = os.path.split(os.path.abspath(arquivo))
+    if os.path.splitext(nome_arquivo)[0].strip().upper() not in ABAS_QUESTIONARIO:
+        return None
+    arquivos = {}
+    for outro in os.listdir(pasta):
+        base, ext = os.path.splitext(outro)
+        if ext.lower() == ".csv" and base.strip().upper() in ABAS_QUESTIONARIO:
+            arquivos[base.strip().upper()] = os.path.join(pasta, outro)
+    return arquivos
+
+
+def ler_abas_csv(arquivo):
+    """
+    Dois layouts são aceitos:
+    - um CSV por aba: o arquivo escolhido se chama como uma aba do questionário
+      (ex.: PRODUTOS.csv) e os CSVs com nomes de aba na mesma pasta são lidos
+      juntos, cada um como uma aba;
+    - um CSV único cuja primeira coluna é "ABA": cada linha vai para a aba
+      indicada e a primeira linha de cada aba é o seu cabeçalho.
+    Qualquer outro CSV vira uma aba só, com o nome do arquivo.
+    """
+    nome = os.path.splitext(os.path.basename(arquivo))[0]
+
+    arquivos = _csvs_por_aba(arquivo)
+    if arquivos is not None:
+        for aba in ABAS_QUESTIONARIO:
+            if aba in arquivos:
+                yield aba, _linhas_csv(arquivos[aba])
+        return
+
+    linhas = _linhas_csv(arquivo)
+    primeira = next(linhas, None)
+    if primeira and (primeira[0] or "").strip().upper() == COLUNA_ABA_CSV:
+        abas = {}
+        for linha in linhas:
+            if not linha or not linha[0]:
+                continue
+            abas.setdefault(linha[0].strip(), []).append(linha[1:])
+        for aba, linhas_aba in abas.items():
+            yield aba, linhas_aba
+        return
+
+    def todas():
+        if primeira is not None:
+            yield primeira
+        yield from linhas
+
+    yield nome, todas()
+
+
+LEITORES = {
+    ".xlsb": ler_abas_xlsb,
+    ".xls": ler_abas_xls,
+    ".csv": ler_abas_csv,
+}
+
+
+def obter_leitor(arquivo):
+    """Retorna o leitor registrado para a extensão do arquivo, ou None (.xlsx/.xlsm)."""
+    if not isinstance(arquivo, (str, os.PathLike)):
+        return None
+    return LEITORES.get(os.path.splitext(os.fspath(arquivo))[1].lower())
+
+
+def arquivos_de_entrada(arquivo):
+    """
+    Arquivos lidos para montar a planilha: o próprio arquivo ou, no layout de
+    um CSV por aba, todos os CSVs das abas (na ordem do questionário).
+    """
+    if os.path.splitext(arquivo)[1].lower() == ".csv":
+        arquivos = _csvs_por_aba(arquivo)
+        if arquivos:
+            return [arquivos[aba] for aba in ABAS_QUESTIONARIO if aba in arquivos]
+    return [arquivo]
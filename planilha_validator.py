@@ -1,13 +1,44 @@
 # validador_core.py
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from copy import copy
 from datetime import datetime
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import PatternFill, Border, Side, Font
-from openpyxl.utils import get_column_letter
+from enum import IntEnum
 import os
+import re
+import shutil
+import sys
+import tempfile
 import time
-import os
-from datetime import datetime
-from openpyxl import Workbook
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Alignment, PatternFill, Border, Side, Font, Protection
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.worksheet.protection import SheetProtection
+
+from indice_chaves import IndiceChaves
+from leitores_planilha import (
+    NS_PACOTE,
+    NS_PLANILHA,
+    NS_RELACOES,
+    arquivos_de_entrada,
+    iniciar_leitura_paralela,
+    ler_formatos_data,
+    ler_linhas_xml,
+    obter_leitor,
+)
+from validacao_vetorizada import MANTER, ColunasVetorizadas, Efeitos, NaoVetorizavel, np
+from validacao_vetorizada import disponivel as vetorizacao_disponivel
 
 # Cores definidas
 COR_VALIDO = PatternFill(
@@ -35,6 +66,17 @@ BORDA = Border(
 ESTILO_CABECALHO_FILL = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
 ESTILO_CABECALHO_FONT = Font(color="FFFFFF", bold=True)
 
+# Estilo da "colinha" de cabeçalhos (fundo cinza claro, itálico)
+ESTILO_COLINHA_FILL = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
+ESTILO_COLINHA_FONT = Font(italic=True, color="333333")
+
+# Negrito do RESULTADO "Validado com sucesso!"
+FONTE_NEGRITO = Font(bold=True)
+
+# Proteção das células da aba EMPRESA (só a coluna C fica editável)
+PROTECAO_BLOQUEADA = Protection(locked=True)
+PROTECAO_LIVRE = Protection(locked=False)
+
 # Cabeçalhos esperados de cada aba (para validação e "colinha")
 CABECALHOS_ESPERADOS = {
     "FILIAL": ["CodFilial", "Filial", "TituloAdicional1", "TituloAdicional2", "Logotipo"],
@@ -138,6 +180,80 @@ def convert_price_to_comma_format(value_str):
     return converted, (converted != original_str)
 
 
+# Preço já no formato final ("123,45"): nada a converter
+_PRECO_COM_VIRGULA = re.compile(r"\d+,\d\d")
+
+
+class CachePrecos:
+    """
+    Cache LRU das conversões de preço (regra Preco: PrecoTabela1/2/3) e de
+    valores decimais (regra ValorDecimal: VlrMinimoPedido, descontos, IPI).
+    Os catálogos repetem poucos milhares de preços em centenas de milhares de
+    linhas; cada texto distinto é convertido uma vez, e o texto que já está
+    no formato "123,45" nem passa por convert_price_to_comma_format.
+    """
+
+    # Por tabela; acima disso sai o texto consultado há mais tempo
+    LIMITE = 16384
+
+    def __init__(self, limite=LIMITE):
+        self.limite = limite
+        self._precos = OrderedDict()
+        self._decimais = OrderedDict()
+        self.consultas = 0
+        self.acertos = 0
+
+    def _consultar(self, tabela, chave):
+        self.consultas += 1
+        resultado = tabela.get(chave)
+        if resultado is not None:
+            self.acertos += 1
+            tabela.move_to_end(chave)
+        return resultado
+
+    def _guardar(self, tabela, chave, resultado):
+        tabela[chave] = resultado
+        if len(tabela) > self.limite:
+            tabela.popitem(last=False)
+        return resultado
+
+    def preco(self, valor_str):
+        """
+        (convertido, foi_alterado, número) para o texto do preço, como em
+        convert_price_to_comma_format; número é None se o convertido não for
+        um número.
+        """
+        resultado = self._consultar(self._precos, valor_str)
+        if resultado is not None:
+            return resultado
+        if _PRECO_COM_VIRGULA.fullmatch(valor_str):
+            convertido, foi_alterado = valor_str, False
+        else:
+            convertido, foi_alterado = convert_price_to_comma_format(valor_str)
+        try:
+            numero = float(convertido.replace(",", "."))
+        except ValueError:
+            numero = None
+        return self._guardar(self._precos, valor_str, (convertido, foi_alterado, numero))
+
+    def decimal(self, texto):
+        """(número, texto com duas casas e vírgula) ou (None, None) se não for número."""
+        resultado = self._consultar(self._decimais, texto)
+        if resultado is not None:
+            return resultado
+        try:
+            numero = float(texto.replace(",", "."))
+        except ValueError:
+            return self._guardar(self._decimais, texto, (None, None))
+        return self._guardar(self._decimais, texto, (numero, f"{numero:.2f}".replace(".", ",")))
+
+    def taxa_acerto(self):
+        return self.acertos / self.consultas if self.consultas else 0.0
+
+    def distintos(self):
+        return len(self._precos) + len(self._decimais)
+
+
 def tentar_avaliar_formula_simples(formula_str):
     """
     Tenta avaliar fórmulas muito simples como =A1*B1, =100+50, etc.
@@ -304,2797 +420,3751 @@ def split_text(text, limit=23):
     return text[:pos], text[pos:].strip()
 
 
+def mapear_abas_xlsx(zf):
+    """
+    Retorna {nome_aba: caminho_xml} lendo xl/workbook.xml e seus relacionamentos
+    dentro do zip do .xlsx, sem carregar o workbook com o openpyxl.
+    """
+    rels = {}
+    with zf.open("xl/_rels/workbook.xml.rels") as f:
+        for rel in ElementTree.parse(f).getroot().iter(f"{NS_PACOTE}Relationship"):
+            alvo = rel.get("Target", "")
+            if alvo.startswith("/"):
+                alvo = alvo[1:]
+            elif not alvo.startswith("xl/"):
+                alvo = "xl/" + alvo
+            rels[rel.get("Id")] = alvo
+
+    abas = {}
+    with zf.open("xl/workbook.xml") as f:
+        for sheet in ElementTree.parse(f).getroot().iter(f"{NS_PLANILHA}sheet"):
+            caminho = rels.get(sheet.get(f"{NS_RELACOES}id"))
+            if caminho:
+                abas[sheet.get("name")] = caminho
+    return abas
+
+
+# ---------------------------------------------------------------------------
+# Leitura em streaming (modo_leitura="streaming")
+#
+# Em vez de materializar um Worksheet do openpyxl (um objeto Cell + StyleArray
+# por célula), cada aba é lida com load_workbook(read_only=True) e guardada como
+# uma lista de linhas com os valores. Os validadores continuam usando a mesma
+# API de planilha (iter_rows, cell, fill, ...), implementada por AbaCompacta;
+# os estilos atribuídos ficam em listas por linha (referências para
+# combinações internadas) e só viram células de verdade na hora de salvar,
+# quando a aba é gravada em streaming por um Workbook(write_only=True).
+# ---------------------------------------------------------------------------
+
+
+class CelulaCompacta:
+    """
+    Célula "de passagem" de uma AbaCompacta. Não guarda nada além da posição:
+    valor e estilos são lidos/escritos direto no armazenamento da aba.
+    """
 
-class PlanilhaValidator:
-    @staticmethod
-    def get_valor_string(cell):
-        """
-        Converte valor de célula para string de forma otimizada.
-        Evita conversões desnecessárias e já faz strip.
-        """
-        if cell is None or cell.value is None:
-            return ""
-        if isinstance(cell.value, str):
-            return cell.value.strip()
-        return str(cell.value).strip()
+    __slots__ = ("parent", "row", "column")
 
-    def __init__(self, arquivo, progress_callback=None, dev_mode=False):
-        """
-        Args:
-            arquivo: Caminho do arquivo Excel
-            progress_callback: Função opcional callback(percentual, mensagem) para reportar progresso
-            dev_mode: Se True, mantem colunas de debug como 'Status da Linha'
-        """
-        self.arquivo = arquivo
-        self.progress_callback = progress_callback
-        self.dev_mode = dev_mode
+    def __init__(self, parent, row, column):
+        self.parent = parent
+        self.row = row
+        self.column = column
 
-        # Carregar workbook original (preservado)
-        self.wb_original = load_workbook(arquivo)
-        
-        # Carregar workbook apenas com valores para validação
-        try:
-            self.wb = load_workbook(arquivo, data_only=True)
-            print("✅ Workbook carregado com data_only=True - fórmulas convertidas automaticamente")
-        except Exception as e:
-            print(f"⚠️ Falha ao carregar com data_only=True: {e}")
-            # Fallback: usar workbook original e converter manualmente
-            self.wb = load_workbook(arquivo)
-            self.converter_formulas_para_valores()
-        
-        self.resultados_validacao = {}  # resumo por aba
+    @property
+    def coordinate(self):
+        return f"{get_column_letter(self.column)}{self.row}"
 
-        # Inicializa a variável de tempo estimado
-        self.tempo_estimado_validacao = None
-        
-        # Cache extremamente rápido para validação de PathFotografia
-        self.cache_arquivos_imagem = None
-        self._carregar_cache_imagens()
-        self.tempo_inicio = None
+    @property
+    def column_letter(self):
+        return get_column_letter(self.column)
 
-        # Dados da aba EMPRESA (para validações cruzadas)
-        self.emp_nome = None
-        self.emp_cod_tipo = None  # "N" ou "A"
-        self.emp_cod_tamanho = None  # valor de C8
-        self.emp_cod_aux = None  # "X", "N" ou "A"
-        self.emp_cod_aux_tamanho = None  # valor de C11
+    @property
+    def value(self):
+        linhas = self.parent._linhas
+        if self.row > len(linhas):
+            return None
+        linha = linhas[self.row - 1]
+        if self.column > len(linha):
+            return None
+        return linha[self.column - 1]
 
-        self.filial_cod_list = []  # do sheet FILIAL
-        self.repr_cod_list = []  # Representantes
-        self.pagto_cod_list = []  # CodCondPagamento (aba PAGTO)
-        self.transp_dict = {}  # {CodTransportadora: Transportadora}
-        self.familia_cod_list = []  # CodFamilia (aba FAMILIAS)
-        self.estilo_cod_list = []  # CodEstilo (aba ESTILOS)
+    @value.setter
+    def value(self, valor):
+        linha = self.parent._linha_para_escrita(self.row, self.column)
+        linha[self.column - 1] = valor
 
-    def _carregar_cache_imagens(self):
-        """
-        Carrega cache de arquivos de imagem para validação extremamente rápida.
-        Uma única leitura do diretório para milhares de verificações O(1).
-        """
-        import os
-        caminho_imagens = r"C:\Users\Public\Documents\SRPP\Imagens_Produto"
-        
-        try:
-            if os.path.exists(caminho_imagens):
-                # Set é extremamente rápido para lookup - O(1)
-                arquivos = os.listdir(caminho_imagens)
-                self.cache_arquivos_imagem = set(arquivos)
-                print(f"✅ Cache de imagens carregado: {len(arquivos)} arquivos")
-            else:
-                self.cache_arquivos_imagem = set()
-                print("⚠️ Diretório de imagens não encontrado - validação PathFotografia desabilitada")
-        except Exception as e:
-            self.cache_arquivos_imagem = set()
-            print(f"⚠️ Erro ao carregar cache de imagens: {e}")
 
-    def _reportar_progresso(self, percentual, mensagem):
-        """Reporta progresso via callback se disponível."""
-        if self.progress_callback:
-            self.progress_callback(percentual, mensagem)
 
-    def limpar_espacos(self):
-        """
-        Remove espaços à esquerda e à direita dos dados das abas especificadas,
-        exceto nos cabeçalhos e na coluna "RESULTADO".
-        """
-        abas_processar = ['FILIAL', 'REPR', 'PAGTO', 'PAGTOFILIAL', 'TRANSP',
-                          'ESTADOS', 'CLIENTES', 'FAMILIAS', 'ESTILOS', 'PRODUTOS']
-        
-        for sheet_name in self.wb.sheetnames:
-            if sheet_name.upper() in abas_processar:
-                ws = self.wb[sheet_name]
-                # Lê os cabeçalhos da primeira linha
-                headers = {}
-                for col in range(1, ws.max_column + 1):
-                    header_value = ws.cell(row=1, column=col).value
-                    if header_value:
-                        headers[col] = str(header_value).strip().upper()
-                # Itera sobre as linhas a partir da segunda (ignorando o cabeçalho)
-                for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-                    for cell in row:
-                        if isinstance(cell.value, str):
-                            header = headers.get(cell.column, "")
-                            if header != "RESULTADO":
-                                cell.value = cell.value.strip()   
+ATRIBUTOS_ESTILO = ("fill", "font", "border", "alignment", "protection", "number_format")
 
-    def tentar_recalcular_formulas(self, sheet):
+ESTILOS_PADRAO = {
+    "fill": PatternFill(),
+    "font": DEFAULT_FONT,
+    "border": Border(),
+    "alignment": Alignment(),
+    "protection": Protection(),
+    "number_format": "General",
+}
+
+# Combinação de estilos de uma célula: tupla na ordem de ATRIBUTOS_ESTILO,
+# com None onde vale o padrão.
+ESTILO_VAZIO = (None,) * len(ATRIBUTOS_ESTILO)
+
+# Tabela de estilos do workbook e posição no StyleArray de cada atributo
+# (number_format é tratado à parte: os formatos embutidos não entram na tabela).
+TABELAS_ESTILO = {
+    "font": ("_fonts", 0), "fill": ("_fills", 1), "border": ("_borders", 2),
+    "protection": ("_protections", 4), "alignment": ("_alignments", 5),
+}
+
+
+class _TabelaEstilos:
+    """
+    Internamento das combinações de estilo de um WorkbookCompacto. As milhões
+    de células pintadas pelos validadores usam poucas combinações distintas
+    (COR_VALIDO + BORDA, COR_ERRO + BORDA, ...), então cada célula guarda só
+    uma referência para a tupla compartilhada.
+    """
+
+    def __init__(self):
+        self._combinacoes = {}
+        # (id(combinação atual), índice do atributo, id(valor)) -> combinação.
+        # Só entra aqui quando o próprio objeto `valor` faz parte da
+        # combinação, o que o mantém vivo e garante que o id não é reutilizado.
+        self._transicoes = {}
+        # Tabelas de estilo (fonts, fills, ...) do arquivo de saída, com o
+        # índice de cada estilo já registrado e o StyleArray de cada
+        # combinação; ver indice() e style_array().
+        self._tabelas = None
+        self._indices = {}  # (atributo, id(valor)) -> (posição, índice, valor)
+        self._arrays = {}  # id(combinação) -> StyleArray
+
+    def internar(self, combinacao):
+        return self._combinacoes.setdefault(combinacao, combinacao)
+
+    def indice(self, atributo, valor):
         """
-        Tenta recalcular fórmulas da planilha. 
-        Retorna número de fórmulas não calculadas.
+        (posição no StyleArray, índice na tabela do arquivo de saída, valor).
+        Cada estilo é procurado na tabela uma vez só; PaletaEstilos registra
+        aqui os estilos que aplica nas abas compactas.
         """
-        formulas_nao_calculadas = 0
-        try:
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.data_type == 'f':  # célula com fórmula
-                        try:
-                            # Força recálculo tentando acessar o valor
-                            _ = cell.value
-                            if not hasattr(cell, 'cached_value') or cell.cached_value is None:
-                                formulas_nao_calculadas += 1
-                        except:
-                            formulas_nao_calculadas += 1
-        except:
-            pass
-        return formulas_nao_calculadas
-
-    def converter_formulas_para_valores(self):
+        chave = (atributo, id(valor))
+        indice = self._indices.get(chave)
+        if indice is None:
+            if self._tabelas is None:
+                self._tabelas = Workbook(write_only=True)  # só as tabelas de estilo
+            if atributo == "number_format":
+                posicao = 3
+                numero = BUILTIN_FORMATS_REVERSE.get(valor)
+                if numero is None:
+                    numero = self._tabelas._number_formats.add(valor) + BUILTIN_FORMATS_MAX_SIZE
+            else:
+                tabela, posicao = TABELAS_ESTILO[atributo]
+                numero = getattr(self._tabelas, tabela).add(valor)
+            indice = self._indices[chave] = (posicao, numero, valor)
+        return indice
+
+    def style_array(self, combinacao):
+        """StyleArray de uma combinação internada, montado na primeira vez."""
+        estilos = self._arrays.get(id(combinacao))
+        if estilos is None:
+            estilos = self._arrays[id(combinacao)] = StyleArray()
+            for atributo, valor in zip(ATRIBUTOS_ESTILO, combinacao):
+                if valor is not None:
+                    posicao, numero, _ = self.indice(atributo, valor)
+                    estilos[posicao] = numero
+        return estilos
+
+    def preparar_saida(self, wb):
         """
-        Converte todas as fórmulas em valores fixos nas abas especificadas.
-        Preserva EMPRESA, converte todas as outras.
+        Monta o StyleArray de todas as combinações e copia as tabelas de estilo
+        para `wb` (o Workbook(write_only=True) de saída), de modo que os
+        índices já calculados valem no arquivo gravado.
         """
-        abas_para_converter = ["FILIAL", "REPR", "PAGTO", "PAGTOFILIAL", "TRANSP", 
-                              "ESTADOS", "CLIENTES", "FAMILIAS", "ESTILOS", "PRODUTOS"]
-        
-        total_convertidas = 0
-        total_falharam = 0
-        
-        for sheet_name in self.wb.sheetnames:
-            if sheet_name.upper() in [aba.upper() for aba in abas_para_converter]:
-                sheet = self.wb[sheet_name]
-                convertidas, falharam = self._converter_formulas_aba(sheet, sheet_name)
-                total_convertidas += convertidas
-                total_falharam += falharam
-        
-        if total_convertidas > 0:
-            print(f"✅ {total_convertidas} fórmulas convertidas para valores")
-        if total_falharam > 0:
-            print(f"⚠️ {total_falharam} fórmulas não puderam ser convertidas")
+        for combinacao in self._combinacoes:
+            self.style_array(combinacao)
+        if self._tabelas is not None:
+            for tabela in ("_number_formats", *(t for t, _ in TABELAS_ESTILO.values())):
+                setattr(wb, tabela, IndexedList(getattr(self._tabelas, tabela)))
 
-    def _converter_formulas_aba(self, sheet, sheet_name):
-        """Converte fórmulas de uma aba específica para valores"""
-        convertidas = 0
-        falharam = 0
-        
-        for row in sheet.iter_rows():
-            for cell in row:
-                if cell.data_type == 'f':  # É fórmula
-                    valor_original = cell.value
-                    try:
-                        # Método 1: usar cached_value se disponível
-                        if hasattr(cell, 'cached_value') and cell.cached_value is not None:
-                            # Se cached_value é float, formatar com 2 casas decimais para evitar erro de precisão
-                            if isinstance(cell.cached_value, float):
-                                cell.value = f"{cell.cached_value:.2f}"
-                            else:
-                                cell.value = cell.cached_value
-                            convertidas += 1
-                            continue
-                        
-                        # Método 2: usar _value se disponível
-                        if hasattr(cell, '_value') and cell._value is not None and not str(cell._value).startswith('='):
-                            cell.value = cell._value
-                            convertidas += 1
-                            continue
-                        
-                        # Método 3: tentar avaliar fórmula simples
-                        if valor_original and str(valor_original).startswith('='):
-                            resultado = tentar_avaliar_formula_simples(str(valor_original))
-                            if resultado is not None:
-                                cell.value = resultado
-                                convertidas += 1
-                                continue
-                        
-                        # Se chegou aqui, não conseguiu converter
-                        falharam += 1
-                        
-                    except Exception as e:
-                        # Em caso de erro, manter fórmula original
-                        falharam += 1
-        
-        return convertidas, falharam
+    def combinar(self, atual, indice, valor):
+        chave = (id(atual), indice, id(valor))
+        combinacao = self._transicoes.get(chave)
+        if combinacao is None:
+            combinacao = self.internar(atual[:indice] + (valor,) + atual[indice + 1:])
+            if combinacao[indice] is valor:
+                self._transicoes[chave] = combinacao
+        return combinacao
 
-    def estimar_tempo_validacao(self):
-        """
-        Estima o tempo total de execução das funções de validação.
-        Uma abordagem é medir individualmente algumas funções (ou usar um valor fixo se a medição não for viável).
-        """
-        # Exemplo: vamos simular a medição de duas funções de validação:
-        tempos = {}
-        
-        inicio = time.time()
-        # Suponha que validar_EMPRESA seja rápido
-        self.validar_EMPRESA()  # Essa função não deve ter efeitos colaterais
-        tempos['validar_EMPRESA'] = time.time() - inicio
 
-        # Simule outra etapa (você pode repetir para as demais funções)
-        inicio = time.time()
-        self.validar_FILIAL()
-        tempos['validar_FILIAL'] = time.time() - inicio
+def _propriedade_estilo(indice, padrao):
+    """Cria a property de estilo (fill, font, ...) de CelulaCompacta."""
 
-        # Some os tempos medidos – ou use um valor fixo se preferir
-        total_time = sum(tempos.values())
-        if total_time == 0:
-            total_time = 30  # valor padrão em segundos
-        self.tempo_estimado_validacao = total_time
-        return total_time
-    
-    
+    def obter(self):
+        combinacao = self.parent._combinacao(self.row, self.column)
+        valor = combinacao[indice]
+        return padrao if valor is None else valor
 
-    def iniciar_tempo_processamento(self):
-        """
-        Armazena o timestamp do início do processamento da validação.
-        """
-        self.tempo_inicio = time.time()
-        print(
-            f"Processamento iniciado em {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.tempo_inicio))}"
-        )
+    def definir(self, valor):
+        self.parent._definir_estilo(self.row, self.column, indice, valor)
 
-        funcoes_validacao = [
-            self.validar_EMPRESA,
-            self.pre_validar_filial,
-            self.validar_FILIAL,
-            self.validar_REPR,
-            self.validar_PAGTO,
-            self.validar_PAGTOFILIAL,
-            self.validar_TRANSP,
-            self.validar_ESTADOS,
-            self.validar_CLIENTES,
-            self.validar_FAMILIAS,
-            self.validar_ESTILOS,
-            self.validar_PRODUTOS,
-        ]
+    return property(obter, definir)
 
-        tempos_execucao = []
 
-        for func in funcoes_validacao:
-            inicio = time.time()
-            func()  # Executa a validação sem salvar resultados
-            fim = time.time()
-            tempos_execucao.append(fim - inicio)
+for _indice, _atributo in enumerate(ATRIBUTOS_ESTILO):
+    setattr(CelulaCompacta, _atributo, _propriedade_estilo(_indice, ESTILOS_PADRAO[_atributo]))
 
-        # Calcula tempo total estimado
-        self.tempo_estimado_validacao = sum(tempos_execucao)
 
-        print(
-            f"Tempo estimado de validação: {self.tempo_estimado_validacao:.2f} segundos"
-        )
+class _Dimensao:
+    """Dimensão de linha/coluna (width/height/hidden) de uma AbaCompacta."""
 
-    def limpar_planilha(self):
-        # 1. Remove a aba "RESULTADO DAS VALIDAÇÕES", se existir.
-        if "RESULTADO DAS VALIDAÇÕES" in self.wb.sheetnames:
-            del self.wb["RESULTADO DAS VALIDAÇÕES"]
+    __slots__ = ("width", "height", "hidden")
 
-        # 2. Para cada aba do workbook:
-        for sheet in self.wb.worksheets:
-            # Obtenha o mapeamento de cabeçalhos (retorna um dicionário {nome: índice})
-            header = self.get_header_map(sheet)
+    def __init__(self):
+        self.width = None
+        self.height = None
+        self.hidden = False
 
-            # Encontra todas as colunas cujo cabeçalho seja "RESULTADO"
-            indices_resultado = [
-                idx for key, idx in header.items() if key.strip().upper() == "RESULTADO"
-            ]
-            # Exclua as colunas em ordem decrescente (para não alterar os índices das demais colunas)
-            for idx in sorted(indices_resultado, reverse=True):
-                sheet.delete_cols(
-                    idx + 1
-                )  # openpyxl trabalha com índices 1-base para exclusão
-
-            # Remover coluna "duplicados" de todas as abas (PRODUTOS, CLIENTES, etc.)
-            header = self.get_header_map(
-                sheet
-            )  # Atualize o header, pois ele pode ter mudado
-            indices_duplicados = [
-                idx
-                for key, idx in header.items()
-                if key.strip().lower() == "duplicados"
-            ]
-            for idx in sorted(indices_duplicados, reverse=True):
-                sheet.delete_cols(idx + 1)
 
-            # Remover coluna "CodProdutoRepetido" se existir
-            header = self.get_header_map(sheet)
-            indices_codprodutorepetido = [
-                idx
-                for key, idx in header.items()
-                if key.strip().lower() == "codprodutorepetido"
-            ]
-            for idx in sorted(indices_codprodutorepetido, reverse=True):
-                sheet.delete_cols(idx + 1)
+class _Dimensoes(dict):
+    """Dicionário que cria a dimensão no primeiro acesso, como no openpyxl."""
 
-            # Remover coluna "Status da Linha" (exceto em modo dev)
-            if not self.dev_mode:
-                header = self.get_header_map(sheet)
-                indices_status = [
-                    idx
-                    for key, idx in header.items()
-                    if key.strip().lower() == "status da linha"
-                ]
-                for idx in sorted(indices_status, reverse=True):
-                    sheet.delete_cols(idx + 1)
+    def __missing__(self, chave):
+        dim = self[chave] = _Dimensao()
+        return dim
 
-    def converter_tudo_para_texto(self):
-        for aba in self.wb.worksheets:
-            for row in aba.iter_rows():
-                for cell in row:
-                    if cell.value is not None:
-                        cell.value = str(cell.value)
 
-    def gerar_status_por_aba(
-        self,
-        nome_aba,
-        total_linhas,
-        linhas_validas,
-        linhas_advertencias=0,
-        linhas_erros=0,
-    ):
-        self.resultados_validacao[nome_aba] = {
-            "lidas": total_linhas,
-            "validas": linhas_validas,
-            "advertencias": linhas_advertencias,
-            "erros": linhas_erros,
-        }
+class _FiltroAutomatico:
+    __slots__ = ("ref",)
 
-    def gerar_relatorio_final(self):
-        ws = self.wb.create_sheet("RESULTADO DAS VALIDAÇÕES", 0)
-        headers = ["Planilha", "Mensagem"]
-        ws.append(headers)
+    def __init__(self):
+        self.ref = None
 
-        # Estilos do cabeçalho: Fundo #00CCFF, Fonte Calibri 11 negrito
-        header_fill = PatternFill(
-            start_color="00CCFF", end_color="00CCFF", fill_type="solid"
-        )
-        header_font = Font(name="Calibri", size=11, bold=True)
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=1, column=col)
-            cell.fill = header_fill
-            cell.font = header_font
 
-        # Criar bordas para todas as células
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin"),
-        )
+class AbaCompacta:
+    """
+    Aba guardada como lista de linhas (listas de valores), com a mesma API de
+    Worksheet usada pelos validadores.
+    """
 
-        abas_relatorio = [
-            "EMPRESA",
-            "FILIAL",
-            "REPR",
-            "PAGTO",
-            "PAGTOFILIAL",
-            "TRANSP",
-            "ESTADOS",
-            "CLIENTES",
-            "FAMILIAS",
-            "ESTILOS",
-            "PRODUTOS",
-        ]
+    def __init__(self, title, tabela_estilos=None):
+        self.title = title
+        self._linhas = []
+        # Paralela a _linhas: None (linha sem estilo) ou lista de combinações.
+        self._estilos = []
+        self._tabela_estilos = tabela_estilos or _TabelaEstilos()
+        self._max_col = 0
+        self.column_dimensions = _Dimensoes()
+        self.row_dimensions = _Dimensoes()
+        self.auto_filter = _FiltroAutomatico()
+        self.protection = SheetProtection()
+        self.merged_cells = []
+        self.data_validations = None
+        self.conditional_formatting = ConditionalFormattingList()
+
+    # --- armazenamento -------------------------------------------------
+    def _tocar(self, row, column):
+        """Registra que a célula existe (mesma semântica de max_row/max_column do openpyxl)."""
+        linhas = self._linhas
+        while len(linhas) < row:
+            linhas.append([])
+            self._estilos.append(None)
+        if column > self._max_col:
+            self._max_col = column
+
+    def _linha_para_escrita(self, row, column):
+        self._tocar(row, column)
+        linha = self._linhas[row - 1]
+        if len(linha) < column:
+            linha.extend([None] * (column - len(linha)))
+        return linha
+
+    def _adicionar_linha_lida(self, valores, estilos=None):
+        linha = list(valores)
+        self._linhas.append(linha)
+        self._estilos.append(estilos)
+        if len(linha) > self._max_col:
+            self._max_col = len(linha)
+
+    def _combinacao(self, row, column):
+        if row > len(self._estilos):
+            return ESTILO_VAZIO
+        estilos = self._estilos[row - 1]
+        if estilos is None or column > len(estilos):
+            return ESTILO_VAZIO
+        return estilos[column - 1] or ESTILO_VAZIO
+
+    def _definir_estilo(self, row, column, indice, valor):
+        self._tocar(row, column)
+        estilos = self._estilos[row - 1]
+        if estilos is None:
+            estilos = self._estilos[row - 1] = [None] * column
+        elif len(estilos) < column:
+            estilos.extend([None] * (column - len(estilos)))
+        atual = estilos[column - 1] or ESTILO_VAZIO
+        estilos[column - 1] = self._tabela_estilos.combinar(atual, indice, valor)
+
+    @property
+    def max_row(self):
+        return max(len(self._linhas), 1)
+
+    @property
+    def max_column(self):
+        return max(self._max_col, 1)
+
+    @property
+    def min_row(self):
+        return 1
+
+    @property
+    def min_column(self):
+        return 1
+
+    @property
+    def dimensions(self):
+        return f"A1:{get_column_letter(self.max_column)}{self.max_row}"
+
+    # --- acesso a células ----------------------------------------------
+    def cell(self, row, column, value=None):
+        self._tocar(row, column)
+        celula = CelulaCompacta(self, row, column)
+        if value is not None:
+            celula.value = value
+        return celula
+
+    def __getitem__(self, chave):
+        if isinstance(chave, int):
+            return tuple(self.cell(chave, c) for c in range(1, self.max_column + 1))
+        from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+        letra, row = coordinate_from_string(chave)
+        return self.cell(row, column_index_from_string(letra))
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=False):
+        min_row = min_row or 1
+        min_col = min_col or 1
+        max_row = max_row or self.max_row
+        max_col = max_col or self.max_column
+        if values_only:
+            largura = max_col - min_col + 1
+            for row in range(min_row, max_row + 1):
+                linha = self._linhas[row - 1] if row <= len(self._linhas) else []
+                valores = linha[min_col - 1:max_col]
+                if len(valores) < largura:
+                    valores = valores + [None] * (largura - len(valores))
+                yield tuple(valores)
+            return
+        if max_row > len(self._linhas) or max_col > self._max_col:
+            self._tocar(max_row, max_col)
+        for row in range(min_row, max_row + 1):
+            yield tuple(CelulaCompacta(self, row, col) for col in range(min_col, max_col + 1))
+
+    def iter_cols(self, min_col=None, max_col=None, min_row=None, max_row=None):
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        min_row = min_row or 1
+        max_row = max_row or self.max_row
+        for col in range(min_col, max_col + 1):
+            yield tuple(CelulaCompacta(self, row, col) for row in range(min_row, max_row + 1))
+
+    @property
+    def columns(self):
+        return tuple(self.iter_cols())
+
+    def append(self, valores):
+        row = len(self._linhas) + 1
+        self._tocar(row, len(valores))
+        self._linhas[row - 1] = list(valores)
+
+    # --- inserção/remoção de linhas e colunas ----------------------------
+    def _deslocar_dimensoes_linhas(self, mapear):
+        """Reindexa row_dimensions; mapear(row) retorna a nova linha ou None."""
+        novas = _Dimensoes()
+        for row, dim in self.row_dimensions.items():
+            nova = mapear(row)
+            if nova is not None:
+                novas[nova] = dim
+        self.row_dimensions = novas
+
+    def insert_rows(self, idx, amount=1):
+        if idx <= len(self._linhas):
+            self._linhas[idx - 1:idx - 1] = [[] for _ in range(amount)]
+            self._estilos[idx - 1:idx - 1] = [None] * amount
+        self._deslocar_dimensoes_linhas(lambda r: r + amount if r >= idx else r)
+
+    def delete_rows(self, idx, amount=1):
+        del self._linhas[idx - 1:idx - 1 + amount]
+        del self._estilos[idx - 1:idx - 1 + amount]
+        fim = idx + amount
+
+        def mapear(r):
+            if r < idx:
+                return r
+            if r >= fim:
+                return r - amount
+            return None
 
-        row_idx = 2
-        for aba_nome in abas_relatorio:
-            if aba_nome in self.resultados_validacao:
-                dados = self.resultados_validacao[aba_nome]
-                mensagem = (
-                    f"Linhas Lidas: {dados['lidas']} | Válidas: {dados['validas']} | "
-                    f"Advertências: {dados.get('advertencias', 0)} | Erros: {dados['erros']}"
-                )
-            else:
-                mensagem = "Aba não encontrada ou não preenchida"
+        self._deslocar_dimensoes_linhas(mapear)
+
+    def excluir_linhas(self, linhas, a_partir_de=None):
+        """Remove de uma vez as linhas (números) de `linhas`; ver excluir_linhas()."""
+        fim = len(self._linhas)
+        corte = fim + 1 if a_partir_de is None else min(a_partir_de, fim + 1)
+        finais = fim + 1 - corte
+        del self._linhas[corte - 1:]
+        del self._estilos[corte - 1:]
+        excluidas = sorted(row for row in set(linhas) if not corte <= row <= fim)
+        conjunto = set(excluidas)
+        if excluidas and excluidas[0] < corte:
+            self._linhas[:] = [linha for row, linha in enumerate(self._linhas, 1) if row not in conjunto]
+            self._estilos[:] = [estilos for row, estilos in enumerate(self._estilos, 1) if row not in conjunto]
+
+        def mapear(r):
+            if corte <= r <= fim or r in conjunto:
+                return None
+            # Dimensões além da última linha também sobem, como em delete_rows
+            return r - bisect_left(excluidas, r) - (finais if r > fim else 0)
+
+        self._deslocar_dimensoes_linhas(mapear)
+
+    def insert_cols(self, idx, amount=1):
+        for linha in self._linhas:
+            if len(linha) >= idx:
+                linha[idx - 1:idx - 1] = [None] * amount
+        for estilos in self._estilos:
+            if estilos is not None and len(estilos) >= idx:
+                estilos[idx - 1:idx - 1] = [None] * amount
+        if idx <= self._max_col:
+            self._max_col += amount
+
+    def delete_cols(self, idx, amount=1):
+        for linha in self._linhas:
+            del linha[idx - 1:idx - 1 + amount]
+        for estilos in self._estilos:
+            if estilos is not None:
+                del estilos[idx - 1:idx - 1 + amount]
+        if idx <= self._max_col:
+            self._max_col = max(idx - 1, self._max_col - amount)
+
+    # --- saída ----------------------------------------------------------
+    def escrever_em(self, ws):
+        """
+        Grava a aba em um WriteOnlyWorksheet, linha a linha. Larguras, alturas
+        e demais metadados vão antes das linhas (exigência do modo write_only);
+        só as células com estilo viram WriteOnlyCell, o resto é passado como
+        valor puro. Cada célula com estilo recebe uma cópia do StyleArray já
+        montado para a sua combinação (ver _TabelaEstilos.preparar_saida).
+        """
+        style_array = self._tabela_estilos.style_array
+        for letra, dim in self.column_dimensions.items():
+            if dim.width is not None:
+                ws.column_dimensions[letra].width = dim.width
+            if dim.hidden:
+                ws.column_dimensions[letra].hidden = True
+        for row, dim in self.row_dimensions.items():
+            if dim.height is not None:
+                ws.row_dimensions[row].height = dim.height
+        for ref in self.merged_cells:
+            ws.merged_cells.add(ref)
+        if self.data_validations is not None:
+            ws.data_validations = self.data_validations
+        ws.conditional_formatting = self.conditional_formatting
+        ws.auto_filter.ref = self.auto_filter.ref
+        ws.protection = self.protection
+
+        for valores, estilos in zip(self._linhas, self._estilos):
+            if estilos is None:
+                ws.append(valores)
+                continue
+            linha = list(valores)
+            if len(estilos) > len(linha):
+                linha.extend([None] * (len(estilos) - len(linha)))
+            for col, combinacao in enumerate(estilos):
+                if combinacao is None:
+                    continue
+                celula = WriteOnlyCell(ws, linha[col])
+                celula._style = copy(style_array(combinacao))
+                linha[col] = celula
+            ws.append(linha)
 
-            # Criar link para a aba correspondente
-            link_formula = f'=HYPERLINK("#\'{aba_nome}\'!A1", "{aba_nome}")'
-            msg_formula = f'=HYPERLINK("#\'{aba_nome}\'!A1", "{mensagem}")'
 
-            # Adicionar linha ao relatório
-            ws.append(["", ""])  # Criar células vazias para preenchimento posterior
+def excluir_linhas(sheet, linhas, a_partir_de=None):
+    """
+    Remove as linhas (números) de `linhas` e, com `a_partir_de`, todas as
+    linhas dali até o fim, numa única passada pelas células, com o mesmo
+    resultado de sheet.delete_rows(r) em cada uma, de baixo para cima.
+    delete_rows desloca todas as células abaixo a cada chamada, o que fica
+    quadrático com milhares de linhas repetidas ou vazias.
+    """
+    if not linhas and (a_partir_de is None or a_partir_de > sheet.max_row):
+        return
+    if isinstance(sheet, AbaCompacta):
+        sheet.excluir_linhas(linhas, a_partir_de)
+        return
+    # Worksheet do openpyxl: cada célula sobe o número de linhas excluídas acima dela
+    excluidas = sorted(set(linhas))
+    celulas = {}
+    for (row, col), cell in sheet._cells.items():
+        if a_partir_de is not None and row >= a_partir_de:
+            continue
+        anteriores = bisect_left(excluidas, row)
+        if anteriores < len(excluidas) and excluidas[anteriores] == row:
+            continue
+        if anteriores:
+            cell.row = row - anteriores
+        celulas[cell.row, col] = cell
+    sheet._cells = celulas
+    sheet._current_row = sheet.max_row if celulas else 0
+
+
+def linhas_vazias(sheet):
+    """
+    (linhas, a_partir_de): as linhas de dados (da 2 em diante) sem nenhum
+    valor preenchido. `linhas` são as vazias entre linhas com dados; de
+    `a_partir_de` até max_row todas são vazias (ex.: as linhas só formatadas
+    que o Excel deixa no fim da aba, às vezes até a 1048576). Lê só as células
+    que existem, sem criar as que faltam.
+    """
+    preenchidas = set()
+    if isinstance(sheet, AbaCompacta):
+        for row, linha in enumerate(sheet._linhas, 1):
+            for v in linha:
+                if v is not None and str(v).strip() != "":
+                    preenchidas.add(row)
+                    break
+    else:
+        for (row, _), cell in sheet._cells.items():
+            if row not in preenchidas:
+                v = cell.value
+                if v is not None and str(v).strip() != "":
+                    preenchidas.add(row)
+    ultima = max(preenchidas, default=1)
+    return [row for row in range(2, ultima) if row not in preenchidas], ultima + 1
+
+
+class WorkbookCompacto:
+    """Conjunto de AbaCompacta com a API de Workbook usada pelo validador."""
+
+    def __init__(self):
+        self._abas = []
+        self._tabela_estilos = _TabelaEstilos()
+        # Abas ainda não lidas (carga sob demanda): {aba: função que a preenche}
+        self._pendentes = {}
+        self._ao_carregar = []
+        self._fechar_leitura = None
+        self.tempos_carga = {}  # {nome_aba: segundos}
+        self.processos_leitura = 0  # processos usados na leitura paralela
+
+    @property
+    def sheetnames(self):
+        return [aba.title for aba in self._abas]
+
+    @property
+    def worksheets(self):
+        self.carregar_tudo()
+        return list(self._abas)
+
+    def __contains__(self, nome):
+        return nome in self.sheetnames
+
+    def _buscar(self, nome):
+        for aba in self._abas:
+            if aba.title == nome:
+                return aba
+        raise KeyError(f"Worksheet {nome} does not exist.")
+
+    def __getitem__(self, nome):
+        return self._garantir(self._buscar(nome))
+
+    def __delitem__(self, nome):
+        aba = self._buscar(nome)
+        self._abas.remove(aba)
+        if self._pendentes.pop(aba, None) is not None and not self._pendentes:
+            self.fechar_leitura()
+
+    # --- carga sob demanda ----------------------------------------------
+    def _adicionar_pendente(self, aba, carregar):
+        self._pendentes[aba] = carregar
+
+    def _garantir(self, aba):
+        carregar = self._pendentes.pop(aba, None)
+        if carregar is not None:
+            t0 = time.perf_counter()
+            carregar(aba)
+            self.tempos_carga[aba.title] = time.perf_counter() - t0
+            for funcao in self._ao_carregar:
+                funcao(aba)
+            if not self._pendentes:
+                self.fechar_leitura()
+        return aba
+
+    def ao_carregar(self, funcao):
+        """Executa funcao(aba) nas abas já carregadas e em cada aba carregada depois."""
+        self._ao_carregar.append(funcao)
+        for aba in self._abas:
+            if aba not in self._pendentes:
+                funcao(aba)
+
+    def carregar_tudo(self):
+        for aba in list(self._pendentes):
+            self._garantir(aba)
+        self.fechar_leitura()
+
+    def fechar_leitura(self):
+        """Fecha o arquivo de origem; abas ainda pendentes não podem mais ser lidas."""
+        fechar, self._fechar_leitura = self._fechar_leitura, None
+        if fechar is not None:
+            fechar()
+
+    def create_sheet(self, title, index=None):
+        aba = AbaCompacta(title, self._tabela_estilos)
+        if index is None:
+            self._abas.append(aba)
+        else:
+            self._abas.insert(index, aba)
+        return aba
 
-            # Inserir link na coluna "Planilha"
-            ws.cell(row=row_idx, column=1, value=link_formula)
-            ws.cell(row=row_idx, column=2, value=msg_formula)
+    def save(self, destino):
+        """Gera o arquivo com Workbook(write_only=True), sem montar células em memória."""
+        wb = Workbook(write_only=True)
+        abas = self.worksheets
+        self._tabela_estilos.preparar_saida(wb)
+        for aba in abas:
+            aba.escrever_em(wb.create_sheet(aba.title))
+        wb.save(destino)
 
-            # Determinar a cor de fundo da linha
-            if aba_nome in self.resultados_validacao:
-                erros = int(self.resultados_validacao[aba_nome].get("erros", 0))
-                advertencias = int(
-                    self.resultados_validacao[aba_nome].get("advertencias", 0)
-                )
-                if erros > 0:
-                    fill = COR_ERRO
-                elif advertencias > 0:
-                    fill = COR_ADVERTENCIA
-                else:
-                    fill = COR_VALIDO
-            else:
-                fill = PatternFill(
-                    start_color="FFFFFF", end_color="FFFFFF", fill_type="solid"
-                )
 
-            # Aplicar estilos para cada célula na linha
-            for cell in ws[row_idx]:
-                cell.fill = fill
-                cell.font = Font(name="Arial", size=10, bold=True)
-                cell.border = thin_border  # Adiciona bordas
+def ler_layout_aba(zf, caminho_xml, completo=False):
+    """
+    Lê do XML da aba o que o modo read_only do openpyxl não expõe:
+    larguras/colunas ocultas e, se completo=True, alturas de linha, células
+    mescladas e validações de dados (usado na aba EMPRESA).
+    """
+    from openpyxl.worksheet.datavalidation import DataValidationList
+
+    layout = {"colunas": {}, "linhas": {}, "mesclagens": [], "validacoes": None}
+    with zf.open(caminho_xml) as f:
+        for evento, elem in ElementTree.iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if evento == "start":
+                if tag == f"{NS_PLANILHA}sheetData" and not completo:
+                    break
+                continue
+            if tag == f"{NS_PLANILHA}col":
+                largura = elem.get("width")
+                oculta = elem.get("hidden") in ("1", "true")
+                for col in range(int(elem.get("min")), int(elem.get("max")) + 1):
+                    layout["colunas"][get_column_letter(col)] = (
+                        float(largura) if largura and elem.get("customWidth") in ("1", "true") else None,
+                        oculta,
+                    )
+            elif tag == f"{NS_PLANILHA}row":
+                if elem.get("customHeight") in ("1", "true") and elem.get("ht"):
+                    layout["linhas"][int(elem.get("r"))] = float(elem.get("ht"))
+                elem.clear()
+            elif tag == f"{NS_PLANILHA}mergeCell":
+                layout["mesclagens"].append(elem.get("ref"))
+            elif tag == f"{NS_PLANILHA}dataValidations":
+                layout["validacoes"] = DataValidationList.from_tree(elem)
+    return layout
+
+
+class PoolValores:
+    """
+    Internamento dos valores lidos no modo streaming e cache do texto
+    "normalizado" (str + strip) usado pelos validadores.
 
-            # Ajustar altura da linha (exceto cabeçalho)
-            ws.row_dimensions[row_idx].height = 17
-            row_idx += 1
+    Na carga, cada valor repetido (CodFilial, CodFamilia, flags S/N, datas...)
+    passa a apontar para um único objeto; os dicionários da carga são
+    descartados em encerrar_carga(), ficando só as estatísticas.
+    """
 
-        # Ajustar largura das colunas automaticamente
-        for col in ws.columns:
-            max_length = 0
-            col_letter = get_column_letter(col[0].column)  # Obtém a letra da coluna
-            for cell in col:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            ws.column_dimensions[col_letter].width = (
-                max_length * 0.8
-            )  # Ajuste extra para espaçamento
+    # Limite do cache de texto: cobre os códigos repetidos sem crescer com
+    # colunas de valores únicos (CodProduto, nomes...).
+    LIMITE_CACHE_TEXTO = 65536
+
+    def __init__(self):
+        self._pools = {str: {}, int: {}, float: {}, datetime: {}}
+        self._textos = {}
+        self.celulas = 0
+        self.distintos = 0
+        self.reaproveitados = 0
+        self.bytes_economizados = 0
+
+    def internar(self, valor):
+        pool = self._pools.get(valor.__class__)
+        if pool is None:
+            return valor
+        canonico = pool.setdefault(valor, valor)
+        if canonico is not valor:
+            self.reaproveitados += 1
+            self.bytes_economizados += sys.getsizeof(valor)
+        return canonico
+
+    def internar_linha(self, valores):
+        linha = [self.internar(v) for v in valores]
+        self.celulas += len(linha)
+        return linha
+
+    def encerrar_carga(self):
+        self.distintos = sum(len(pool) for pool in self._pools.values())
+        self._pools = {}
+
+    def texto(self, valor):
+        """Equivale a str(valor).strip() ("" para None), reaproveitando o resultado."""
+        if valor is None:
+            return ""
+        classe = valor.__class__
+        if classe is str:
+            texto = valor.strip()  # sem espaços nas pontas, devolve o próprio objeto
+            if texto is valor:
+                return texto
+        elif classe is int:
+            texto = None
+        else:
+            return str(valor).strip()
 
-            # Ativar filtro automático
-            ws.auto_filter.ref = ws.dimensions
+        canonico = self._textos.get(valor)
+        if canonico is None:
+            canonico = texto if texto is not None else str(valor)
+            if len(self._textos) < self.LIMITE_CACHE_TEXTO:
+                self._textos[valor] = canonico
+        return canonico
 
-    def obter_result_col(self, sheet):
-        for cell in sheet[1]:  # Percorre a primeira linha (cabeçalhos)
-            if cell.value and str(cell.value).strip() == "RESULTADO":
-                return cell.column
-        return sheet.max_column + 1
 
+# Abaixo deste volume de XML (somado, sem compressão) das abas de dados, subir
+# processos custa mais do que ler tudo no processo principal.
+LIMITE_LEITURA_PARALELA = 4 * 1024 * 1024
 
-    def get_header_map(self, sheet):
-        header = [cell.value for cell in sheet[1]]
-        return {name: idx for idx, name in enumerate(header) if name is not None}
 
-    def get_mandatory_cell(self, row, header, field):
-        idx = header.get(field)
-        if idx is None:
-            return None
-        return row[idx]
+def carregar_workbook_compacto(arquivo, pool=None, sob_demanda=False, processos=0):
+    """
+    Carrega o arquivo com load_workbook(read_only=True, data_only=True) e
+    converte cada aba em AbaCompacta. Só a aba EMPRESA (pequena, com layout de
+    questionário) mantém os estilos originais das células.
+    Formatos que o openpyxl não abre (.xlsb, .xls, .csv) passam pelos leitores
+    de leitores_planilha, que entregam só os valores.
+    pool: PoolValores opcional; os valores das abas de dados são internados nele.
+    sob_demanda: (.xlsx/.xlsm) cada aba só é lida no primeiro acesso, e o
+        arquivo fica aberto até a última aba ser carregada
+        (ver WorkbookCompacto.carregar_tudo/fechar_leitura).
+    processos: (.xlsx/.xlsm) se > 0, as abas de dados (todas menos EMPRESA)
+        são decodificadas em paralelo, em até `processos` processos, logo na
+        abertura; o acesso a uma aba só espera pela leitura dela. Arquivos
+        pequenos (ver LIMITE_LEITURA_PARALELA) continuam sendo lidos aqui.
+    """
+    internar = pool.internar_linha if pool is not None else list
+
+    leitor = obter_leitor(arquivo)
+    if leitor is not None:
+        wb = WorkbookCompacto()
+        for nome, linhas in leitor(arquivo):
+            aba = wb.create_sheet(nome)
+            for valores in linhas:
+                aba._adicionar_linha_lida(internar(valores))
+        if pool is not None:
+            pool.encerrar_carga()
+        return wb
+
+    wb_leitura = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        zf = zipfile.ZipFile(arquivo)
+        caminhos = mapear_abas_xlsx(zf)
+    except Exception:
+        wb_leitura.close()
+        raise
+
+    executor, futuros = None, {}
+    if processos:
+        paralelas = {
+            nome: caminho for nome, caminho in caminhos.items()
+            if nome in wb_leitura.sheetnames and nome.upper() != "EMPRESA"
+        }
+        if sum(zf.getinfo(c).file_size for c in paralelas.values()) >= LIMITE_LEITURA_PARALELA:
+            datas, duracoes = ler_formatos_data(zf)
+            executor, futuros = iniciar_leitura_paralela(
+                arquivo, paralelas, wb_leitura.shared_strings,
+                datas, duracoes, wb_leitura.epoch, processos,
+            )
 
-    def escrever_resultado_linha(
-        self, sheet, row_num, result_message, result_col, fill=None
-    ):
-        cell = sheet.cell(row=row_num, column=result_col, value=result_message)
-        if fill:
-            cell.fill = fill
+    def carregar_aba(aba):
+        ws = wb_leitura[aba.title]
+        empresa = ws.title.upper() == "EMPRESA"
+        caminho = caminhos.get(ws.title)
+        futuro = futuros.pop(ws.title, None)
+        if futuro is not None:
+            for valores in futuro.result():
+                aba._adicionar_linha_lida(internar(valores))
+        elif ws.title.upper() == "PRODUTOS" and caminho:
+            # A maior aba: lida direto do XML, sem criar células do openpyxl
+            # (os textos compartilhados já carregados são reaproveitados).
+            datas, duracoes = ler_formatos_data(zf)
+            with zf.open(caminho) as f:
+                for valores in ler_linhas_xml(
+                    f, wb_leitura.shared_strings, datas, duracoes, wb_leitura.epoch
+                ):
+                    aba._adicionar_linha_lida(internar(valores))
+        elif empresa:
+            for linha in ws.iter_rows(min_row=1, min_col=1):
+                estilos = [
+                    wb._tabela_estilos.internar(tuple(getattr(c, a) for a in ATRIBUTOS_ESTILO))
+                    if getattr(c, "has_style", False) else None
+                    for c in linha
+                ]
+                aba._adicionar_linha_lida(
+                    (c.value for c in linha),
+                    estilos if any(estilos) else None,
+                )
+        else:
+            for valores in ws.iter_rows(min_row=1, min_col=1, values_only=True):
+                aba._adicionar_linha_lida(internar(valores))
+
+        if caminho:
+            layout = ler_layout_aba(zf, caminho, completo=empresa)
+            for letra, (largura, oculta) in layout["colunas"].items():
+                if largura is not None:
+                    aba.column_dimensions[letra].width = largura
+                if oculta:
+                    aba.column_dimensions[letra].hidden = True
+            for row, altura in layout["linhas"].items():
+                aba.row_dimensions[row].height = altura
+            aba.merged_cells = layout["mesclagens"]
+            # Como no load_workbook normal, só a primeira célula de
+            # uma mesclagem mantém o valor.
+            for ref in aba.merged_cells:
+                min_col, min_row, max_col, max_row = range_boundaries(ref)
+                for row in range(min_row, min(max_row, len(aba._linhas)) + 1):
+                    linha = aba._linhas[row - 1]
+                    for col in range(min_col, min(max_col, len(linha)) + 1):
+                        if (row, col) != (min_row, min_col):
+                            linha[col - 1] = None
+            aba.data_validations = layout["validacoes"]
+
+    def fechar():
+        if executor is not None:
+            # Abas que não chegaram a ser usadas (ex.: falha rápida na EMPRESA)
+            for futuro in futuros.values():
+                futuro.cancel()
+            executor.shutdown(wait=False)
+        wb_leitura.close()
+        zf.close()
+        if pool is not None:
+            pool.encerrar_carga()
+
+    wb = WorkbookCompacto()
+    for nome in wb_leitura.sheetnames:
+        wb._adicionar_pendente(wb.create_sheet(nome), carregar_aba)
+    wb._fechar_leitura = fechar
+    if executor is not None:
+        wb.processos_leitura = min(processos, len(futuros))
+    if not sob_demanda:
+        wb.carregar_tudo()
+    return wb
+
+
+def medir_carregamento(arquivo, modo_leitura="completo"):
+    """
+    Mede tempo (s) e pico de memória alocada (bytes) para carregar o arquivo
+    no modo indicado. Usado apenas no relatório do modo desenvolvedor.
+    """
+    import gc
+    import tracemalloc
+
+    def carregar():
+        if modo_leitura == "streaming" or obter_leitor(arquivo) is not None:
+            return carregar_workbook_compacto(arquivo)
+        return load_workbook(arquivo, data_only=True)
+
+    # O tracemalloc deixa a leitura bem mais lenta, então o tempo é medido
+    # numa carga separada, sem rastreamento de memória.
+    gc.collect()
+    t0 = time.perf_counter()
+    wb = carregar()
+    tempo = time.perf_counter() - t0
+    del wb
+
+    gc.collect()
+    tracemalloc.start()
+    wb = carregar()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del wb
+    gc.collect()
+    return tempo, pico
+
+
+
+def salvar_workbook_atomico(wb, destino):
+    """
+    Salva o workbook em `destino` (caminho ou objeto de arquivo).
+    Para caminhos, grava num arquivo temporário na mesma pasta e só no fim o
+    renomeia por cima do destino com os.replace: se a gravação falhar no meio,
+    o arquivo existente (ex.: a planilha original sendo sobrescrita) fica
+    intacto. Retorna o próprio destino.
+    """
+    if not isinstance(destino, (str, os.PathLike)):
+        wb.save(destino)
+        return destino
 
-    def determinar_fill_resultado(self, mensagens):
-        # Se alguma mensagem indicar erro, retorna COR_ERRO
-        if any(
-            "inválido" in m.lower()
-            or "duplicado" in m.lower()
-            or "ausente" in m.lower()
-            or "inexistente" in m.lower()
-            or "vazio" in m.lower()
-            for m in mensagens
-        ):
-            return COR_ERRO
-        # Se não houver erro, mas houver advertência, retorna COR_ADVERTENCIA
-        elif any("advertencia" in m.lower() for m in mensagens):
-            return COR_ADVERTENCIA
+    pasta = os.path.dirname(os.path.abspath(destino))
+    fd, temporario = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=pasta)
+    os.close(fd)
+    try:
+        # mkstemp cria o arquivo com permissão 0600; usa a do arquivo
+        # substituído ou a padrão do sistema.
+        if os.path.exists(destino):
+            shutil.copymode(destino, temporario)
         else:
-            return COR_VALIDO
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporario, 0o666 & ~umask)
+        wb.save(temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return destino
+
+
+def resolver_destino(destino, nome_arquivo):
+    """Se `destino` for uma pasta, o arquivo é criado dentro dela com `nome_arquivo`."""
+    if isinstance(destino, (str, os.PathLike)) and os.path.isdir(destino):
+        return os.path.join(destino, nome_arquivo)
+    return destino
+
+
+class PaletaEstilos:
+    """
+    Estilos fixos que o validador aplica célula a célula (COR_*, BORDA,
+    cabeçalho, negrito), com o índice de cada um nas tabelas de estilo do
+    workbook. Num Worksheet do openpyxl, `cell.fill = COR_ERRO` calcula o hash
+    do PatternFill e o procura na tabela de fills a cada célula; aqui ele é
+    registrado na primeira vez e, dali em diante, o índice é gravado direto no
+    StyleArray da célula. Nas abas compactas a célula guarda a combinação
+    internada (_TabelaEstilos) e o índice do estilo é registrado nas tabelas
+    do arquivo de saída, que AbaCompacta.escrever_em usa ao gravar.
+
+    Com `condicional` (modo_saida="condicional"), as abas tabulares não
+    recebem cores de status nem bordas célula a célula: ver StatusAba.
+    """
 
-    def aplicar_borda(self, sheet):
-        if sheet.title.upper() in ["EMPRESA", "RESULTADO DAS VALIDAÇÕES"]:
+    # Posição de cada atributo nas combinações das abas compactas
+    _POSICOES_COMBINACAO = {atributo: i for i, atributo in enumerate(ATRIBUTOS_ESTILO)}
+
+    def __init__(self, wb, condicional=False):
+        self.wb = wb
+        self.condicional = condicional
+        self.abas_condicionais = {}  # título -> StatusAba
+        self._compacto = isinstance(wb, WorkbookCompacto)
+        # (atributo, id(estilo)) -> (posição, índice, estilo); guardar o
+        # estilo o mantém vivo, então o id não é reaproveitado
+        self._indices = {}
+        self.operacoes = 0
+        self.operacoes_lote = 0  # da passada final (formatacao_final), cronometrada
+        self.segundos_lote = 0.0
+
+    def _indice(self, atributo, estilo):
+        chave = (atributo, id(estilo))
+        indice = self._indices.get(chave)
+        if indice is None:
+            if self._compacto:
+                indice = self._indices[chave] = self.wb._tabela_estilos.indice(atributo, estilo)
+            else:
+                tabela, posicao = TABELAS_ESTILO[atributo]
+                indice = self._indices[chave] = (posicao, getattr(self.wb, tabela).add(estilo), estilo)
+        return indice
+
+    def aplicar(self, cell, atributo, estilo):
+        """Equivale a setattr(cell, atributo, estilo) para fill, font, border e protection."""
+        self.operacoes += 1
+        if self._compacto:
+            self._indice(atributo, estilo)  # índice usado ao gravar (_TabelaEstilos.style_array)
+            cell.parent._definir_estilo(cell.row, cell.column, self._POSICOES_COMBINACAO[atributo], estilo)
             return
-        sheet.protection.sheet = False
-        # OTIMIZAÇÃO: Aplicar borda apenas nas células com dados
-        max_row = sheet.max_row
-        max_col = sheet.max_column
-        if max_row <= 1 or max_col <= 0:
+        posicao, indice, _ = self._indice(atributo, estilo)
+        estilos = cell._style
+        if estilos is None:
+            estilos = cell._style = StyleArray()
+        estilos[posicao] = indice
+
+    def para_aba(self, sheet):
+        """Paleta a usar na validação de uma aba tabular."""
+        if not self.condicional:
+            return self
+        status = self.abas_condicionais[sheet.title] = StatusAba(self)
+        return status
+
+    def formatacao_final(self, sheet, linha_cabecalho, colinha=()):
+        """
+        Estilos finais de uma aba tabular numa passada só: fundo preto e letra
+        branca nas células da `linha_cabecalho` e BORDA em todas as células
+        com valor (nas abas em StatusAba, a regra condicional desenha as
+        bordas). Só as células que existem são visitadas.
+
+        `colinha`: cabeçalhos esperados a gravar numa linha nova no topo. As
+        células descem uma linha na mesma passada (o insert_rows do openpyxl
+        criaria antes uma célula em cada posição vazia da aba e faria outra
+        varredura); `linha_cabecalho` já conta com a colinha.
+        """
+        inicio = time.perf_counter()
+        com_borda = sheet.title not in self.abas_condicionais
+        total = 0
+        if self._compacto:
+            if colinha:
+                sheet.insert_rows(1)  # só uma inserção na lista de linhas
+            posicoes = self._POSICOES_COMBINACAO
+            estilos = (("fill", ESTILO_CABECALHO_FILL), ("font", ESTILO_CABECALHO_FONT), ("border", BORDA))
+            for atributo, estilo in estilos:
+                self._indice(atributo, estilo)
+            for row, linha in enumerate(sheet._linhas, 1):
+                for col, valor in enumerate(linha, 1):
+                    if valor is None:
+                        continue
+                    if row == linha_cabecalho:
+                        sheet._definir_estilo(row, col, posicoes["fill"], ESTILO_CABECALHO_FILL)
+                        sheet._definir_estilo(row, col, posicoes["font"], ESTILO_CABECALHO_FONT)
+                        total += 2
+                    if com_borda:
+                        sheet._definir_estilo(row, col, posicoes["border"], BORDA)
+                        total += 1
+        else:
+            fundo, fonte, borda = (
+                self._indice(atributo, estilo)[:2]
+                for atributo, estilo in (
+                    ("fill", ESTILO_CABECALHO_FILL), ("font", ESTILO_CABECALHO_FONT), ("border", BORDA),
+                )
+            )
+            celulas = {} if colinha else None
+            for cell in list(sheet._cells.values()):
+                if celulas is not None:
+                    cell.row += 1
+                    celulas[cell.row, cell.column] = cell
+                if cell._value is None:
+                    continue
+                estilos = cell._style
+                if estilos is None:
+                    estilos = cell._style = StyleArray()
+                if cell.row == linha_cabecalho:
+                    estilos[fundo[0]] = fundo[1]
+                    estilos[fonte[0]] = fonte[1]
+                    total += 2
+                if com_borda:
+                    estilos[borda[0]] = borda[1]
+                    total += 1
+            if celulas is not None:
+                sheet._cells = celulas
+                sheet._current_row = sheet.max_row
+        for col, cabecalho in enumerate(colinha, 1):
+            cell = sheet.cell(row=1, column=col, value=cabecalho)
+            self.aplicar(cell, "fill", ESTILO_COLINHA_FILL)
+            self.aplicar(cell, "font", ESTILO_COLINHA_FONT)
+            if com_borda:
+                self.aplicar(cell, "border", BORDA)
+        self.operacoes += total
+        self.operacoes_lote += total
+        self.segundos_lote += time.perf_counter() - inicio
+
+    def operacoes_por_segundo(self):
+        return self.operacoes_lote / self.segundos_lote if self.segundos_lote else 0.0
+
+    def excluir_coluna(self, sheet, coluna):
+        """Avisa a StatusAba da aba (se houver) de uma coluna excluída depois de pintada."""
+        status = self.abas_condicionais.get(sheet.title)
+        if status is not None:
+            status.excluir_coluna(coluna)
+
+    def formatacao_condicional(self):
+        """Regras condicionais das abas em StatusAba; chamar depois da formatação final."""
+        for titulo, status in self.abas_condicionais.items():
+            if titulo in self.wb.sheetnames and status.coluna is not None:
+                status.aplicar_regras(self.wb[titulo])
+
+
+class StatusAba:
+    """
+    Paleta de uma aba tabular no modo de saída "condicional". As cores de
+    status (COR_VALIDO, COR_ADVERTENCIA, COR_ERRO, COR_DUPLICADO) não viram
+    estilo de célula: cada linha guarda numa coluna oculta, depois da última,
+    a coluna e o código de cada célula pintada (";3E;15A;", com V, A, E e D),
+    e regras de formatação condicional da aba pintam as células e desenham
+    as bordas no Excel. Células com texto vazio, que o Excel lê como em
+    branco, recebem o código B só para ganhar a borda, como no modo normal. Os demais estilos (cabeçalho, negrito) vão para a
+    paleta do workbook. Sem estilo em cada célula, o arquivo fica menor e a
+    gravação não precisa indexar um StyleArray por célula.
+    """
+
+    CODIGOS = {id(COR_VALIDO): "V", id(COR_ADVERTENCIA): "A", id(COR_ERRO): "E", id(COR_DUPLICADO): "D"}
+    CORES = ((COR_VALIDO, "V"), (COR_ADVERTENCIA, "A"), (COR_ERRO, "E"), (COR_DUPLICADO, "D"))
+    CABECALHO = "STATUS"
+    SO_BORDA = "B"
+    # Trecho das fórmulas de cor; identifica as regras ao validar a saída de novo.
+    MARCA_REGRA = '";"&COLUMN()&"'
+
+    def __init__(self, paleta):
+        self.paleta = paleta
+        self.celulas = {}  # linha -> {coluna: código}
+        self.coluna = None
+        self._excluidas = []  # colunas excluídas depois de pintadas, em ordem
+
+    def aplicar(self, cell, atributo, estilo):
+        codigo = self.CODIGOS.get(id(estilo)) if atributo == "fill" else None
+        if codigo is None:
+            self.paleta.aplicar(cell, atributo, estilo)
             return
-        for row in sheet.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col):
-            for cell in row:
-                if cell.value is not None:
-                    cell.border = BORDA
-        sheet.auto_filter.ref = sheet.dimensions
+        celulas = self.celulas.get(cell.row)
+        if celulas is None:
+            celulas = self.celulas[cell.row] = {}
+        celulas[cell.column] = codigo
+
+    def excluir_coluna(self, coluna):
+        """A coluna saiu da aba depois da validação (ex.: Duplicados sem repetidos)."""
+        self._excluidas.append(coluna)
+
+    def _posicao(self, coluna):
+        for excluida in self._excluidas:
+            if coluna == excluida:
+                return None
+            if coluna > excluida:
+                coluna -= 1
+        return coluna
+
+    def _textos_vazios(self, sheet):
+        """Linha -> colunas das células com "" (gravadas sem valor no arquivo)."""
+        vazios = {}
+        if self.paleta._compacto:
+            for row, linha in enumerate(sheet._linhas, 1):
+                if "" in linha:
+                    vazios[row] = [col for col, valor in enumerate(linha, 1) if valor == ""]
+        else:
+            for (row, col), cell in sheet._cells.items():
+                if cell._value == "":
+                    vazios.setdefault(row, []).append(col)
+        return vazios
+
+    def gravar(self, sheet):
+        """Grava os códigos na coluna depois da última da aba (fim da validação)."""
+        vazios = self._textos_vazios(sheet)
+        self.coluna = sheet.max_column + 1
+        sheet.cell(row=1, column=self.coluna, value=self.CABECALHO)
+        posicoes = {}
+        for row in self.celulas.keys() | vazios.keys():
+            codigos = []
+            for coluna, codigo in self.celulas.get(row, {}).items():
+                posicao = posicoes.get(coluna, 0)
+                if posicao == 0:
+                    posicao = posicoes[coluna] = self._posicao(coluna)
+                if posicao is not None:
+                    codigos.append(f"{posicao}{codigo};")
+            codigos.extend(f"{coluna}{self.SO_BORDA};" for coluna in vazios.get(row, ()))
+            if codigos:
+                sheet.cell(row=row, column=self.coluna, value=";" + "".join(codigos))
+
+    def aplicar_regras(self, sheet):
+        """Oculta a coluna de códigos e cria as regras de cor e de borda."""
+        status = get_column_letter(self.coluna)
+        sheet.column_dimensions[status].hidden = True
+        area = f"A1:{get_column_letter(self.coluna - 1)}{sheet.max_row}"
+        for cor, codigo in self.CORES:
+            formula = f'ISNUMBER(SEARCH({self.MARCA_REGRA}{codigo};",${status}1))'
+            sheet.conditional_formatting.add(area, FormulaRule(formula=[formula], fill=cor))
+        so_borda = f'ISNUMBER(SEARCH({self.MARCA_REGRA}{self.SO_BORDA};",${status}1))'
+        sheet.conditional_formatting.add(
+            area, FormulaRule(formula=[f"OR(NOT(ISBLANK(A1)),{so_borda})"], border=BORDA)
+        )
 
-    def excluir_linhas_duplicadas_produtos(self, sheet, header):
-        ignore_cols = set()
-        for key, idx in header.items():
-            if key.lower() in ["duplicados", "resultado"]:
-                ignore_cols.add(idx)
+    @classmethod
+    def remover_regras(cls, sheet):
+        """
+        Tira da aba as regras condicionais criadas por aplicar_regras numa
+        validação anterior (a de borda está no mesmo intervalo e sai junto).
+        """
+        formatacao = sheet.conditional_formatting
+        for intervalo in list(formatacao):
+            if any(cls.MARCA_REGRA in formula for regra in intervalo.rules for formula in regra.formula):
+                del formatacao[str(intervalo.sqref)]
 
-        # OTIMIZAÇÃO: Verificação rápida de linha vazia usando CodProduto
-        idx_codproduto = header.get("CodProduto")
 
-        seen = {}
-        rows_to_delete = []
-        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-            # Verificação rápida de linha vazia
-            if idx_codproduto is not None:
-                first_val = row[idx_codproduto].value
-                if first_val is None or (isinstance(first_val, str) and not first_val.strip()):
-                    continue
-            elif row[0].value is None:
-                continue
+class LargurasColunas:
+    """
+    Maior texto gravado em cada coluna, por aba, acumulado à medida que os
+    valores são escritos (RESULTADO das abas, resumo, etiquetas). A largura
+    da coluna sai daqui no fim, sem reler a coluna inteira só para medir.
+    """
 
-            # Criar tupla apenas com valores relevantes (otimizado)
-            row_tuple = tuple(
-                str(cell.value).strip() if cell.value is not None else ""
-                for idx, cell in enumerate(row)
-                if idx not in ignore_cols
-            )
-            if row_tuple in seen:
-                rows_to_delete.append(row[0].row)
-            else:
-                seen[row_tuple] = row[0].row
+    def __init__(self):
+        self._maximos = {}  # (aba, coluna) -> comprimento
 
-        # Deletar em ordem reversa para não afetar índices
-        for r in sorted(rows_to_delete, reverse=True):
-            sheet.delete_rows(r)
+    def registrar(self, aba, coluna, valor):
+        if valor is None:
+            return
+        chave = (aba, coluna)
+        comprimento = len(str(valor))
+        if comprimento > self._maximos.get(chave, 0):
+            self._maximos[chave] = comprimento
 
-    def excluir_linhas_duplicadas_clientes(self, sheet, header):
-        """
-        Remove linhas completamente idênticas na aba CLIENTES.
-        Similar ao tratamento de PRODUTOS.
-        """
-        ignore_cols = set()
-        for key, idx in header.items():
-            if key.lower() in ["duplicados", "resultado"]:
-                ignore_cols.add(idx)
+    def registrar_linha(self, aba, valores):
+        """Valores de uma linha a partir da coluna 1 (como em sheet.append)."""
+        for coluna, valor in enumerate(valores, 1):
+            self.registrar(aba, coluna, valor)
 
-        # Verificação rápida de linha vazia usando CodCliente
-        idx_codcliente = header.get("CodCliente")
+    def maximo(self, aba, coluna):
+        return self._maximos.get((aba, coluna), 0)
 
-        seen = {}
-        rows_to_delete = []
-        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-            # Verificação rápida de linha vazia
-            if idx_codcliente is not None:
-                first_val = row[idx_codcliente].value
-                if first_val is None or (isinstance(first_val, str) and not first_val.strip()):
-                    continue
-            elif row[0].value is None:
-                continue
+    def excluir_coluna(self, aba, coluna):
+        """Acompanha sheet.delete_cols(coluna): as colunas seguintes voltam uma posição."""
+        for chave in sorted(c for c in self._maximos if c[0] == aba and c[1] >= coluna):
+            comprimento = self._maximos.pop(chave)
+            if chave[1] > coluna:
+                self._maximos[(aba, chave[1] - 1)] = comprimento
 
-            # Criar tupla apenas com valores relevantes
-            row_tuple = tuple(
-                str(cell.value).strip() if cell.value is not None else ""
-                for idx, cell in enumerate(row)
-                if idx not in ignore_cols
-            )
-            if row_tuple in seen:
-                rows_to_delete.append(row[0].row)
-            else:
-                seen[row_tuple] = row[0].row
+    def descartar(self, aba):
+        """Esquece as larguras da aba (ex.: planilha de etiquetas gerada de novo)."""
+        for chave in [c for c in self._maximos if c[0] == aba]:
+            del self._maximos[chave]
 
-        # Deletar em ordem reversa para não afetar índices
-        for r in sorted(rows_to_delete, reverse=True):
-            sheet.delete_rows(r)
 
-    @staticmethod
-    def corrigir_cabecalho(sheet, expected):
-        """
-        Corrige os cabeçalhos da planilha comparando com a lista 'expected'.
-        Se o valor na célula da primeira linha não for exatamente o esperado
-        (ignorando espaços e case), ele é atualizado.
-        Retorna: (mapping, corrections)
-          mapping: dicionário {nome_corrigido: índice} (base 0)
-          corrections: lista de strings com as correções efetuadas.
-        """
-        corrections = []
-        new_headers = []
-        for i in range(1, len(expected) + 1):
-            cell = sheet.cell(row=1, column=i)
-            current = cell.value if cell.value is not None else ""
-            # Se o valor atual não corresponder exatamente ao esperado, corrige-o.
-            if str(current).strip().lower() != expected[i - 1].lower():
-                corrections.append(f"'{current}' foi alterado para '{expected[i - 1]}'")
-                cell.value = expected[i - 1]
-                new_headers.append(expected[i - 1])
-            else:
-                new_headers.append(current)
-        mapping = {h: i for i, h in enumerate(new_headers)}
-        return mapping, corrections
+class LinhasSinalizadas:
+    """
+    Linhas com erro ou advertência de cada aba, guardadas durante a validação
+    para a planilha resumida de processar(somente_erros=True): número da
+    linha, valores, RESULTADO, cor do resultado e gravidade das células
+    citadas ({índice do valor: Severidade}).
+    """
 
-    def pre_validar_filial(self):
-        filial_sheet = self.wb["FILIAL"]
-        data_found = False
-        for row in filial_sheet.iter_rows(min_row=2):
-            if any(cell.value and str(cell.value).strip() != "" for cell in row):
-                data_found = True
-                break
+    def __init__(self):
+        self.cabecalhos = {}  # aba -> nomes das colunas dos valores
+        self.linhas = {}  # aba -> [(linha, valores, mensagem, cor, gravidades)]
+
+    def cabecalho(self, aba, nomes):
+        self.cabecalhos[aba] = list(nomes)
+
+    def registrar(self, aba, linha, valores, mensagem, cor, gravidades=None):
+        self.linhas.setdefault(aba, []).append((linha, valores, mensagem, cor, gravidades or {}))
+
+    def total(self):
+        return sum(len(linhas) for linhas in self.linhas.values())
+
+
+# ---------------------------------------------------------------------------
+# Regras declarativas das abas tabulares
+# ---------------------------------------------------------------------------
+# Cada aba (menos EMPRESA, que é um questionário de células fixas) é descrita
+# em REGRAS_ABAS: as regras de cada coluna, na ordem em que as mensagens
+# aparecem no RESULTADO, e os poucos ajustes próprios da aba. Na validação,
+# cada regra é compilada uma vez numa função fechada sobre o índice da coluna,
+# os limites e os cadastros das abas anteriores (FILIAL, REPR, PAGTO...), e
+# PlanilhaValidator._validar_aba roda todas elas num único laço por linha.
+#
+# As funções compiladas recebem (row, mensagens, ctx). `ctx` é um dict novo a
+# cada linha, para regras que dependem do resultado de outra coluna (ex.:
+# hierarquia de QtdeTabela/PrecoTabela).
+#
+# As regras não escrevem texto: guardam em `mensagens` objetos Mensagem
+# (código de MENSAGENS, severidade e argumentos). A cor da linha é a da maior
+# severidade, e o texto em português só é montado ao gravar o RESULTADO.
+# A cor da linha vai só na célula RESULTADO; fora dela, só são pintadas as
+# células das colunas citadas em erros e advertências, com a cor da mensagem.
+
+
+class Severidade(IntEnum):
+    """Peso de uma mensagem na cor da linha; vale a maior da linha."""
+
+    NOTA = 0  # só aparece no RESULTADO, a linha continua verde
+    ADVERTENCIA = 1
+    ERRO = 2
+
+
+COR_SEVERIDADE = {
+    Severidade.NOTA: COR_VALIDO,
+    Severidade.ADVERTENCIA: COR_ADVERTENCIA,
+    Severidade.ERRO: COR_ERRO,
+}
 
-        if not data_found:
-            header = self.get_header_map(filial_sheet)
-            if "CodFilial" in header and "Filial" in header:
-                cod_index = header["CodFilial"]  # índice 0-based
-                filial_index = header["Filial"]
+_NOTA, _ADVERTENCIA, _ERRO = Severidade.NOTA, Severidade.ADVERTENCIA, Severidade.ERRO
+
+# código: (severidade, modelo do texto). As severidades são as cores que cada
+# mensagem sempre deu à linha, inclusive as que não a mudam (NOTA).
+MENSAGENS = {
+    # Por coluna
+    "AUSENTE": (_ERRO, "{} ausente"),
+    "VAZIO": (_ERRO, "{} vazio"),
+    "INVALIDO": (_ERRO, "{} inválido"),
+    "INVALIDA": (_NOTA, "{} inválida"),
+    "INVALIDA_ADV": (_ADVERTENCIA, "Advertencia, '{}' inválida"),
+    "INVALIDA_OU_EXCEDE": (_NOTA, "{} inválida ou excede {} caracteres"),
+    "INEXISTENTE": (_ERRO, "{} inexistente"),
+    "INEXISTENTE_NA_ABA": (_ERRO, "{} inexistente na aba {}"),
+    "DUPLICADO": (_ERRO, "{} duplicado"),
+    "DUPLICADO_NA_LINHA": (_ERRO, "{} duplicado: {} na linha {} já existe na linha {}"),
+    "DUPLICADO_COMO": (_ERRO, "{} duplicado: {} na linha {} já existe como {} na linha {}"),
+    # O texto diz advertência, mas "duplicado" sempre pintou a linha de vermelho
+    "DUPLICADO_PRIMEIRO": (_ERRO, "Advertencia, {} duplicado"),
+    "DUPLICADA": (_NOTA, "{} duplicada"),
+    "REPETIDO": (_ADVERTENCIA, "Advertencia, {} repetido"),
+    "FORA_INTERVALO": (_NOTA, "{} fora do intervalo"),
+    "FORA_0_A_3": (_NOTA, "{} deve ser 0,1,2 ou 3"),
+    "NAO_INTEIRO": (_NOTA, "{} deve ser inteiro"),
+    "MENOR_QUE": (_NOTA, "{} deve ser menor que {}"),
+    "LIMITE_CARACTERES": (_ADVERTENCIA, "Advertencia, '{}' excedeu o limite de caracteres"),
+    "EXCEDE_CARACTERES": (_NOTA, "{} excede {} caracteres"),
+    "EXCEDE_CARACTERES_ADV": (_ADVERTENCIA, "Advertencia, {} excede {} caracteres"),
+    "EXCEDE_CARACTERES_ADV_ASPAS": (_ADVERTENCIA, "Advertencia, '{}' excede {} caracteres"),
+    "CORRIGIDO": (_ADVERTENCIA, "Advertencia, {} corrigido automaticamente"),
+    "CORRIGIDO_DE_PARA": (_ADVERTENCIA, "Advertencia: {} corrigido de '{}' para '{}'"),
+    "CABECALHO_CORRIGIDO": (_ADVERTENCIA, "Advertencia: {} estavam com nome errado, o correto é {}"),
+    "VAZIO_SEM_COLUNA": (_ERRO, "{} vazio e coluna {} não encontrada"),
+    "VAZIO_ORIGEM_VAZIA": (_ERRO, "{} vazio e {} também vazia"),
+    "AUSENTE_SEM_EMPRESA": (_ERRO, "{} ausente e sem nome da empresa"),
+    "AUSENTE_VARIAS_OPCOES": (_ERRO, "{} ausente e múltiplas opções disponíveis"),
+    # Códigos de PRODUTOS (configuração da EMPRESA)
+    "CODIGO_NAO_USADO": (_NOTA, "{} não permitido (configurado como não usado)"),
+    "CODIGO_ALFANUMERICO": (_NOTA, "{} '{}' é alfanumérico, mas a empresa está configurada para código numérico"),
+    "CODIGO_EXCEDE_TAMANHO": (_NOTA, "{} excede tamanho permitido ({} > {})"),
+    # Quantidades, preços, datas e fotos de PRODUTOS
+    "QTDE_SOZINHA": (_NOTA, "{} não pode estar sozinha - {} é obrigatória"),
+    "QTDE_REQUER_DUAS": (_NOTA, "{} requer {} e {} preenchidas"),
+    "QTDE_REQUER": (_NOTA, "{} requer {} preenchida"),
+    "PRECO_TRACO": (_ERRO, "{} inválido (valor '-')"),
+    "PRECO_TRACO_OU_VAZIO": (_ERRO, "{} inválido (valor '-' ou vazio)"),
+    "PRECO_TRACO_OU_ZERO": (_ERRO, "{} inválido (valor '-' ou zero)"),
+    "PRECO_NAO_POSITIVO": (_ERRO, "{} inválido (valor zero ou negativo)"),
+    "DATA_FORMATO": (_ERRO, "{} com formato inválido"),
+    "SALDO_INSUFICIENTE": (_NOTA, "Advertência(s): {} não contém saldo suficiente para a {}"),
+    "IMAGEM_INEXISTENTE": (
+        _ADVERTENCIA, "Advertencia: '{}' não existe na pasta C:\\Users\\Public\\Documents\\SRPP\\Imagens_Produto"
+    ),
+    # EMPRESA
+    "EMPRESA_NOME_AUSENTE": (_ERRO, "Nome da empresa ausente"),
+    "EMPRESA_TIPO_CODIGO": (_ERRO, "Tipo do código inválido em C7"),
+    "EMPRESA_TIPO_AUXILIAR": (_ERRO, "Tipo do código auxiliar inválido em C10"),
+    "EMPRESA_TAMANHO_FORA": (_NOTA, "Tamanho do código {} fora do intervalo (4-20)"),
+    "EMPRESA_TAMANHO_NAO_NUMERICO": (_NOTA, "Tamanho do código {} não numérico"),
+    # Orçamento de erros (processar(limite_erros_aba=..., limite_erros_total=...))
+    "NAO_AVALIADA": (_NOTA, "Linha não avaliada: limite de erros atingido ({})"),
+}
 
-                # Insere valores padrão para CodFilial e Filial
-                filial_sheet.cell(row=2, column=cod_index + 1, value="1")
-                filial_sheet.cell(
-                    row=2,
-                    column=filial_index + 1,
-                    value=self.emp_nome if self.emp_nome else "",
-                )
 
-            # Nova regra: se C2 estiver vazio, copia o valor de C39 da aba EMPRESA
-            # e se D2 estiver vazio, copia o valor de C40 da aba EMPRESA.
-            # C2 é coluna 3 e D2 é coluna 4.
-            empresa_sheet = self.wb["EMPRESA"]
-            valor_C39 = empresa_sheet.cell(row=39, column=3).value  # C39
-            valor_C40 = empresa_sheet.cell(row=40, column=3).value  # C40
+class Mensagem:
+    """
+    Achado de uma regra: `codigo` de MENSAGENS, `severidade` e os argumentos
+    do modelo. str() monta (uma vez) o texto gravado no RESULTADO; as regras
+    criam as mensagens fixas ao compilar e reaproveitam o mesmo objeto.
+    """
 
-            cell_C2 = filial_sheet.cell(row=2, column=3)
-            if not (cell_C2.value and str(cell_C2.value).strip()):
-                cell_C2.value = valor_C39
-                cell_C2.fill = COR_ADVERTENCIA
+    __slots__ = ("codigo", "severidade", "args", "_texto")
 
-            cell_D2 = filial_sheet.cell(row=2, column=4)
-            if not (cell_D2.value and str(cell_D2.value).strip()):
-                cell_D2.value = valor_C40
-                cell_D2.fill = COR_ADVERTENCIA
+    def __init__(self, codigo, *args):
+        self.codigo = codigo
+        self.severidade = MENSAGENS[codigo][0]
+        self.args = args
+        self._texto = None
 
-            # Cria a coluna "RESULTADO" se ainda não existir, e insere a mensagem de correção
-            result_col = filial_sheet.max_column + 1
-            if not filial_sheet.cell(row=1, column=result_col).value:
-                header_result = filial_sheet.cell(
-                    row=1, column=result_col, value="RESULTADO"
-                )
-                header_result.fill = PatternFill(
-                    start_color="000000", end_color="000000", fill_type="solid"
-                )
-                header_result.font = Font(color="FFFFFF", bold=True)
+    def __str__(self):
+        if self._texto is None:
+            self._texto = MENSAGENS[self.codigo][1].format(*self.args)
+        return self._texto
 
-            filial_sheet.cell(
-                row=2,
-                column=result_col,
-                value="Advertencias, CodFilial corrigido automaticamente",
-            ).fill = COR_ADVERTENCIA
+    def __repr__(self):
+        return f"Mensagem({self.codigo!r}, {', '.join(map(repr, self.args))})"
 
-    # --- VALIDAÇÕES das demais abas (mantidas) ---
-    def validar_EMPRESA(self):
-        if "EMPRESA" not in self.wb.sheetnames:
-            return "Erro: A aba EMPRESA não foi encontrada!"
-        sheet = self.wb["EMPRESA"]
-        total_linhas = 1
-        linhas_validas = 1
-        linhas_erros = 0
-        msgs = []
-        cell = sheet["C5"]
-        if not cell.value:
-            cell.fill = COR_ERRO
-            msgs.append("Nome da empresa ausente")
-            linhas_erros += 1
-        else:
-            cell.fill = COR_VALIDO
-            self.emp_nome = cell.value
-        cell = sheet["C7"]
-        if cell.value not in ["N=Numérico", "A=Alfanumérico"]:
-            cell.fill = COR_ERRO
-            msgs.append("Tipo do código inválido em C7")
-            linhas_erros += 1
-        else:
-            cell.fill = COR_VALIDO
-            self.emp_cod_tipo = cell.value.split("=")[0]
-        cell = sheet["C8"]
-        try:
-            tamanho = int(cell.value)
-            if 4 <= tamanho <= 20:
-                cell.fill = COR_VALIDO
-                self.emp_cod_tamanho = tamanho
-            else:
-                cell.fill = COR_ERRO
-                msgs.append("Tamanho do código principal fora do intervalo (4-20)")
-                linhas_erros += 1
-        except:
-            cell.fill = COR_ERRO
-            msgs.append("Tamanho do código principal não numérico")
-            linhas_erros += 1
-        cell = sheet["C10"]
-        if cell.value not in ["X=Não Usado", "N=Numérico", "A=Alfanumérico"]:
-            cell.fill = COR_ERRO
-            msgs.append("Tipo do código auxiliar inválido em C10")
-            linhas_erros += 1
-        else:
-            cell.fill = COR_VALIDO
-            self.emp_cod_aux = cell.value.split("=")[0]
-        
-        # Validar tamanho do código auxiliar (C11) - só se não for "X=Não Usado"
-        if self.emp_cod_aux != "X":
-            cell = sheet["C11"]
-            try:
-                tamanho_aux = int(cell.value)
-                if 4 <= tamanho_aux <= 20:
-                    cell.fill = COR_VALIDO
-                    self.emp_cod_aux_tamanho = tamanho_aux
-                else:
-                    cell.fill = COR_ERRO
-                    msgs.append("Tamanho do código auxiliar fora do intervalo (4-20)")
-                    linhas_erros += 1
-            except:
-                cell.fill = COR_ERRO
-                msgs.append("Tamanho do código auxiliar não numérico")
-                linhas_erros += 1
-        
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        self.escrever_resultado_linha(
-            sheet, 5, "; ".join(msgs), result_col, self.determinar_fill_resultado(msgs)
-        )
-        self.gerar_status_por_aba("EMPRESA", total_linhas, linhas_validas, 0, linhas_erros)
-        return None
+    @property
+    def campo(self):
+        """Primeiro argumento; nas mensagens de uma coluna, o nome dela."""
+        return self.args[0] if self.args else None
 
-    def validar_FILIAL(self):
-        if "FILIAL" not in self.wb.sheetnames:
-            return "Erro: A aba FILIAL não foi encontrada!"
 
-        sheet = self.wb["FILIAL"]
+SIM_NAO = {"S", "s", "N", "n", ""}
 
 
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodFilial", "Filial", "TituloAdicional1", "TituloAdicional2", "Logotipo"]
-        
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                            " estavam com nome errado, o correto é " +
-                            ", ".join(correctos))
+class Regra:
+    """
+    Regra de uma coluna. `compilar` devolve a função que valida a coluna em
+    cada linha, ou None se a coluna não existir e não for obrigatória (coluna
+    obrigatória ausente gera "<campo> ausente" em todas as linhas).
 
+    Regras com `vetorizavel` também sabem validar a coluna inteira de uma vez
+    (`vetorizar`, ver validacao_vetorizada); `dependencias` são as outras
+    colunas que elas leem.
+    """
 
+    vetorizavel = False
+    dependencias = ()
 
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        seen_codfilial = set()
-        seen_filial = set()
+    def __init__(self, campo, obrigatoria=False):
+        self.campo = campo
+        self.obrigatoria = obrigatoria
 
-        # Obtém a coluna "RESULTADO" (sem duplicar)
-        result_col = self.obter_result_col(sheet)
+    def compilar(self, header, validador, sheet, estado):
+        idx = header.get(self.campo)
+        if idx is None:
+            if not self.obrigatoria:
+                return None
+            mensagem = Mensagem("AUSENTE", self.campo)
+            return lambda row, mensagens, ctx: mensagens.append(mensagem)
+        return self._compilar(idx, header, validador, sheet, estado)
 
-        # Cria o cabeçalho "RESULTADO" se não existir
-        if not sheet.cell(row=1, column=result_col).value:
-            header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-            header_result.fill = PatternFill(
-                start_color="000000", end_color="000000", fill_type="solid"
-            )
-            header_result.font = Font(color="FFFFFF", bold=True)
+    def _compilar(self, idx, header, validador, sheet, estado):
+        raise NotImplementedError
 
-        
+    def compilar_registro(self, header, validador):
+        """
+        Função row -> None que só grava no índice de chaves o que a regra
+        registraria na linha, sem validar nada; usada nas linhas não avaliadas
+        (limite de erros), cujos códigos continuam valendo para as abas
+        seguintes. None se a regra não registra chaves.
+        """
+        return None
 
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
+    def vetorizar(self, header, validador, colunas):
+        """Efeitos da regra em todas as linhas de `colunas` (ColunasVetorizadas), ou None."""
+        coluna = colunas.coluna(self.campo)
+        if coluna is None:
+            if not self.obrigatoria:
+                return None
+            efeitos = Efeitos()
+            efeitos.mensagem(colunas.todas(), (Mensagem("AUSENTE", self.campo),))
+            return efeitos
+        return self._vetorizar(coluna, validador, colunas)
+
+    def _vetorizar(self, coluna, validador, colunas):
+        raise NotImplementedError
+
+
+class RegraLinha(Regra):
+    """Regra que envolve várias colunas; compila mesmo sem uma coluna própria."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def compilar(self, header, validador, sheet, estado):
+        return self._compilar(None, header, validador, sheet, estado)
 
-            total_linhas += 1
-            mensagens = []
-            advertencia_presente = False  # Flag para saber se há advertências
-            
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
-
-
-            # Nova regra: para a linha 2, verificar C2 e D2
-            if row[0].row == 2:
-                cell_C2 = sheet.cell(row=2, column=3)  # C2
-                cell_D2 = sheet.cell(row=2, column=4)  # D2
-                empresa_sheet = self.wb["EMPRESA"]
-                if not (cell_C2.value and str(cell_C2.value).strip()):
-                    valor_C39 = empresa_sheet.cell(row=39, column=3).value
-                    cell_C2.value = valor_C39
-                    cell_C2.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, C2 corrigido automaticamente")
-                    advertencia_presente = True
-                if not (cell_D2.value and str(cell_D2.value).strip()):
-                    valor_C40 = empresa_sheet.cell(row=40, column=3).value
-                    cell_D2.value = valor_C40
-                    cell_D2.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, D2 corrigido automaticamente")
-                    advertencia_presente = True
-
-            # Validação da coluna CodFilial
-            cod_cell = self.get_mandatory_cell(row, header, "CodFilial")
-            filial_cell = self.get_mandatory_cell(row, header, "Filial")
-
-            if cod_cell is None:
-                mensagens.append("CodFilial ausente")
-            else:
-                valor = self.get_valor_string(cod_cell)
-                if valor and len(valor) > 40:
-                    cod_cell.fill = COR_ADVERTENCIA
-                    mensagens.append(
-                        "Advertencia, 'CodFilial' excedeu o limite de caracteres"
-                    )
-                    advertencia_presente = True
-                if not valor:
-                    cod_cell.value = "1"
-                    valor = "1"  # Atualiza a variável com o novo valor
-                    cod_cell.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, CodFilial corrigido automaticamente")
-                    advertencia_presente = True
-                elif not valor.isdigit() or not (1 <= int(valor) <= 999999):
-                    cod_cell.fill = COR_ERRO
-                    mensagens.append("CodFilial inválido")
-                else:
-                    cod_cell.fill = COR_VALIDO
-                if valor in seen_codfilial:
-                    cod_cell.fill = COR_ERRO
-                    mensagens.append("CodFilial duplicado")
-                else:
-                    seen_codfilial.add(valor)
-                    self.filial_cod_list.append(valor)
 
-            # Validação da coluna Filial
-            if filial_cell is None:
-                mensagens.append("Filial ausente")
+class Codigo(Regra):
+    """
+    Código numérico (1..maximo) em texto.
+    unicidade: None, "sempre" (repetição é erro mesmo com código inválido),
+        "se_valido" ou "numerica" (compara o número, ignorando zeros à
+        esquerda, e cita as linhas na mensagem).
+    registro: aba do índice de chaves (validador.chaves) que recebe os
+        códigos novos e a linha de cada um, usados nas referências das abas
+        seguintes.
+    limite_advertencia / valor_padrao: código mais longo que o limite é
+        advertência; código vazio vira valor_padrao.
+    """
+
+    def __init__(self, campo, maximo, unicidade=None, registro=None,
+                 limite_advertencia=None, valor_padrao=None):
+        super().__init__(campo, obrigatoria=True)
+        self.maximo = maximo
+        self.unicidade = unicidade
+        self.registro = registro
+        self.limite_advertencia = limite_advertencia
+        self.valor_padrao = valor_padrao
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo, maximo, unicidade = self.campo, self.maximo, self.unicidade
+        limite, padrao = self.limite_advertencia, self.valor_padrao
+        texto = validador.pool_valores.texto
+        cadastro = validador.chaves[self.registro] if self.registro else None
+        msg_invalido = Mensagem("INVALIDO", campo)
+        msg_duplicado = Mensagem("DUPLICADO", campo)
+        msg_limite = Mensagem("LIMITE_CARACTERES", campo)
+        msg_padrao = Mensagem("CORRIGIDO", campo)
+        vistos = set()
+        numeros = {}  # unicidade "numerica": {numero: (texto original, linha)}
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            valor = texto(cell.value)
+            if limite is not None and valor and len(valor) > limite:
+                mensagens.append(msg_limite)
+            if padrao is not None and not valor:
+                cell.value = valor = padrao
+                mensagens.append(msg_padrao)
+                valido = True
+            elif not valor or not valor.isdigit() or not (1 <= int(valor) <= maximo):
+                mensagens.append(msg_invalido)
+                valido = False
             else:
-                filial_val = self.get_valor_string(filial_cell)
-                if filial_val and len(filial_val) > 40:
-                    filial_cell.fill = COR_ADVERTENCIA
-                    mensagens.append(
-                        "Advertencia, 'Filial' excedeu o limite de caracteres"
-                    )
-                    advertencia_presente = True
-                if not filial_val:
-                    if self.emp_nome:
-                        filial_cell.value = self.emp_nome
-                        filial_cell.fill = COR_ADVERTENCIA
+                valido = True
+
+            if unicidade == "sempre" or (valido and unicidade == "se_valido"):
+                if valor in vistos:
+                    mensagens.append(msg_duplicado)
+                else:
+                    vistos.add(valor)
+                    if cadastro is not None:
+                        cadastro.registrar(valor, row[0].row)
+            elif valido and unicidade == "numerica":
+                numero = int(valor)
+                linha = row[0].row
+                if numero in numeros:
+                    original, linha_original = numeros[numero]
+                    if original != valor:
                         mensagens.append(
-                            "Advertencia, Filial corrigido automaticamente"
+                            Mensagem("DUPLICADO_COMO", campo, valor, linha, original, linha_original)
                         )
-                        advertencia_presente = True
                     else:
-                        filial_cell.fill = COR_ERRO
-                        mensagens.append("Filial ausente e sem nome da empresa")
+                        mensagens.append(Mensagem("DUPLICADO_NA_LINHA", campo, valor, linha, linha_original))
                 else:
-                    filial_cell.fill = COR_VALIDO
-                if filial_val in seen_filial:
-                    filial_cell.fill = COR_ERRO
-                    mensagens.append("Filial duplicada")
-                else:
-                    seen_filial.add(filial_val)
+                    numeros[numero] = (valor, linha)
+            elif valido and unicidade is None and cadastro is not None and valor not in vistos:
+                vistos.add(valor)
+                cadastro.registrar(valor, row[0].row)
 
-            # Define a cor de preenchimento para a linha com base nas advertências
-            if advertencia_presente:
-                resultado_fill = COR_ADVERTENCIA
+        return verificar
+
+    def compilar_registro(self, header, validador):
+        idx = header.get(self.campo)
+        if self.registro is None or idx is None or self.unicidade == "numerica":
+            return None
+        cadastro = validador.chaves[self.registro]
+        maximo, sempre, padrao = self.maximo, self.unicidade == "sempre", self.valor_padrao
+        texto = validador.pool_valores.texto
+
+        # Mesmo critério de verificar(): o primeiro registro de cada código vale
+        def registrar(row):
+            valor = texto(row[idx].value)
+            if padrao is not None and not valor:
+                valor, valido = padrao, True
             else:
-                resultado_fill = self.determinar_fill_resultado(mensagens)
+                valido = valor.isdigit() and 1 <= int(valor) <= maximo
+            if valido or sempre:
+                cadastro.registrar(valor, row[0].row)
 
-            # Aplica a cor em todas as células da linha, exceto a coluna "RESULTADO"
-            for cell in row:
-                if cell.column != result_col:
-                    cell.fill = resultado_fill
+        return registrar
 
-            # Atualiza os contadores
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
 
+class Texto(Regra):
+    """
+    Texto de até `tamanho` caracteres; acima disso, `mensagem`.
+    vazio: None (vazio é aceito), "mensagem" (vazio também gera `mensagem`)
+        ou a mensagem própria para vazio.
+    copiar_de: coluna que preenche esta quando vazia.
+    nome_empresa: vazio é preenchido com o nome da empresa (EMPRESA C5).
+    repetido: mensagem para textos repetidos na aba.
+    registro: (aba do índice de chaves, coluna do código); guarda o texto
+        como descrição do código, para os textos não repetidos.
+    """
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
-                
-        # Gera o resumo da validação para a aba FILIAL
-        self.gerar_status_por_aba(
-            "FILIAL", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
+    def __init__(self, campo, tamanho, mensagem, vazio=None, copiar_de=None,
+                 nome_empresa=False, repetido=None, registro=None, obrigatoria=True):
+        super().__init__(campo, obrigatoria)
+        self.tamanho = tamanho
+        self.mensagem = mensagem
+        self.vazio = vazio
+        self.copiar_de = copiar_de
+        self.nome_empresa = nome_empresa
+        self.repetido = repetido
+        self.registro = registro
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo, tamanho, mensagem = self.campo, self.tamanho, self.mensagem
+        msg_vazio = mensagem if self.vazio == "mensagem" else self.vazio
+        copiar_de, repetido = self.copiar_de, self.repetido
+        idx_origem = header.get(copiar_de) if copiar_de else None
+        nome_empresa = validador.emp_nome if self.nome_empresa else None
+        texto = validador.pool_valores.texto
+        cadastro = idx_codigo = None
+        if self.registro:
+            cadastro = validador.chaves[self.registro[0]]
+            idx_codigo = header.get(self.registro[1])
+        msg_sem_coluna = Mensagem("VAZIO_SEM_COLUNA", campo, copiar_de)
+        msg_origem_vazia = Mensagem("VAZIO_ORIGEM_VAZIA", campo, copiar_de)
+        msg_corrigido = Mensagem("CORRIGIDO", campo)
+        msg_sem_empresa = Mensagem("AUSENTE_SEM_EMPRESA", campo)
+        vistos = set()
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            valor = texto(cell.value)
+            if not valor and copiar_de:
+                if idx_origem is None:
+                    mensagens.append(msg_sem_coluna)
+                else:
+                    origem = texto(row[idx_origem].value)
+                    if origem:
+                        cell.value = valor = origem
+                    else:
+                        mensagens.append(msg_origem_vazia)
+            elif not valor and self.nome_empresa:
+                # O texto continua vazio para a checagem de repetidos
+                if nome_empresa:
+                    cell.value = nome_empresa
+                    mensagens.append(msg_corrigido)
+                else:
+                    mensagens.append(msg_sem_empresa)
 
-        # Reaplica a cor preta no cabeçalho da coluna "RESULTADO" para evitar perda da formatação
-        header_result = sheet.cell(row=1, column=result_col)
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
+            if valor:
+                if len(valor) > tamanho:
+                    mensagens.append(mensagem)
+            elif msg_vazio is not None:
+                mensagens.append(msg_vazio)
 
-        # Aplica bordas finais na aba
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
-        return None
+            if repetido is not None:
+                if valor in vistos:
+                    mensagens.append(repetido)
+                else:
+                    vistos.add(valor)
+                    if cadastro is not None:
+                        codigo = texto(row[idx_codigo].value) if idx_codigo is not None else ""
+                        cadastro.descrever(codigo, valor)
 
-    def validar_REPR(self):
-        if "REPR" not in self.wb.sheetnames:
-            return "Erro", "A aba REPR não foi encontrada!"
+        return verificar
 
-        sheet = self.wb["REPR"]
 
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodRepresentante", "Representante"]
-        
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                            " estavam com nome errado, o correto é " +
-                            ", ".join(correctos))
+class Dominio(Regra):
+    """Valor dentro de `permitidos`; fora dele a célula é limpa (como em corrigir_campo)."""
 
+    vetorizavel = True
 
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_advertencias = 0
-        linhas_erros = 0
-        seen_cod = set()
-        seen_repr = set()
+    def __init__(self, campo, permitidos, obrigatoria=False):
+        super().__init__(campo, obrigatoria)
+        self.permitidos = permitidos
 
-        # Cria a coluna RESULTADO
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
+    def _avaliador(self, validador):
+        """avaliar(valor) -> (mensagens, novo valor ou MANTER, None)."""
+        permitidos = self.permitidos
+        invalido = (Mensagem("INVALIDO", self.campo),)
 
+        def avaliar(valor):
+            if valor is None:
+                return (), MANTER, None
+            if (str(valor).strip() if valor else "") not in permitidos:
+                return invalido, "", None
+            return (), MANTER, None
 
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
-        
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
+        return avaliar
 
+    def _compilar(self, idx, header, validador, sheet, estado):
+        avaliar = self._avaliador(validador)
 
-            # Validação do CodRepresentante
-            cell = self.get_mandatory_cell(row, header, "CodRepresentante")
-            if cell is None:
-                mensagens.append("CodRepresentante ausente")
-            else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 32767):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodRepresentante inválido")
-                else:
-                    cell.fill = COR_VALIDO
-                    if valor in seen_cod:
-                        cell.fill = COR_ERRO
-                        mensagens.append("CodRepresentante duplicado")
-                    else:
-                        seen_cod.add(valor)
-                        self.repr_cod_list.append(valor)
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            erros, novo, _ = avaliar(cell.value)
+            if erros:
+                cell.value = novo
+                mensagens.extend(erros)
 
-            # Validação do Representante
-            cell_repr = self.get_mandatory_cell(row, header, "Representante")
-            if cell_repr is None:
-                mensagens.append("Representante ausente")
-            else:
-                repr_val = self.get_valor_string(cell_repr)
-                if not repr_val or len(repr_val) > 20:
-                    cell_repr.fill = COR_ERRO
-                    mensagens.append(
-                        "Advertencia, 'Representante' excede 20 caracteres"
-                    )
-                else:
-                    cell_repr.fill = COR_VALIDO
-            if repr_val in seen_repr:
-                cell_repr.fill = COR_ADVERTENCIA  
-                mensagens.append("Advertencia, Representante repetido")
-            else:
-                seen_repr.add(repr_val)
+        return verificar
 
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+    def _vetorizar(self, coluna, validador, colunas):
+        return coluna.avaliar(self._avaliador(validador)).efeitos()
 
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
+class Conjunto(Regra):
+    """Texto que precisa estar em `valores`, sem correção."""
 
-        # Se nenhuma linha foi processada, insere uma mensagem de erro na primeira linha de dados
-        if total_linhas == 0:
-            cell_result = sheet.cell(
-                row=2,
-                column=result_col,
-                value="Inválido, ao menos um representante deve ser cadastrado",
-            )
-            cell_result.fill = COR_ERRO
-            linhas_erros += 1
-
-        self.gerar_status_por_aba(
-            "REPR", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
-        self.aplicar_borda(sheet)
-
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    ax_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+    def __init__(self, campo, valores, mensagem, obrigatoria=True):
+        super().__init__(campo, obrigatoria)
+        self.valores = valores
+        self.mensagem = mensagem
 
-        # Ajuste final da largura da coluna RESULTADO (duplicado no código original; pode ser removido se desnecessário)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+    def _compilar(self, idx, header, validador, sheet, estado):
+        valores, mensagem = self.valores, self.mensagem
+        texto = validador.pool_valores.texto
 
-        return None
+        def verificar(row, mensagens, ctx):
+            if texto(row[idx].value) not in valores:
+                mensagens.append(mensagem)
 
-    def validar_PAGTO(self):
-        if "PAGTO" not in self.wb.sheetnames:
-            return "Erro", "A aba PAGTO não foi encontrada!"
-
-        sheet = self.wb["PAGTO"]
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodCondPagamento",	"CondPagamento",	"TipoCondPagamento",	"CondPagamentoPadrao",	"VlrMinimoPedido",	"VlrMinimoComEstAtual",	"VlrMinimoComEstFuturo",	"VlrMinimoComEstEsgotado",	"Desconto1",	"Desconto2",	"Desconto3"]
-
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                          " estavam com nome errado, o correto é " +
-                          ", ".join(correctos))
+        return verificar
 
 
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        seen_cod = set()
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-       
-       
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
+class Inteiro(Regra):
+    """
+    Inteiro opcional entre minimo e maximo.
+    mensagem_intervalo: mensagem própria para fora do intervalo.
+    zero_vazio: 0 é aceito e a célula é limpa.
+    guardar: o número lido (mesmo fora do intervalo) fica em ctx[campo].
+    """
 
+    vetorizavel = True
+
+    def __init__(self, campo, minimo, maximo, mensagem_intervalo=None, zero_vazio=False, guardar=False):
+        super().__init__(campo)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.mensagem_intervalo = mensagem_intervalo
+        self.zero_vazio = zero_vazio
+        self.guardar = guardar
+
+    def _avaliador(self, validador):
+        """avaliar(valor) -> (mensagens, novo valor ou MANTER, número lido ou None)."""
+        minimo, maximo, zero_vazio = self.minimo, self.maximo, self.zero_vazio
+        fora = (self.mensagem_intervalo or Mensagem("FORA_INTERVALO", self.campo),)
+        invalido = (Mensagem("INVALIDO", self.campo),)
+
+        def avaliar(valor):
+            if not valor:
+                return (), MANTER, None
+            try:
+                numero = int(valor)
+            except Exception:
+                return invalido, MANTER, None
+            if zero_vazio and numero == 0:
+                return (), "", numero
+            if not (minimo <= numero <= maximo):
+                return fora, MANTER, numero
+            return (), MANTER, numero
+
+        return avaliar
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo, guardar = self.campo, self.guardar
+        avaliar = self._avaliador(validador)
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            erros, novo, numero = avaliar(cell.value)
+            if novo is not MANTER:
+                cell.value = novo
+            if erros:
+                mensagens.extend(erros)
+            if guardar:
+                ctx[campo] = numero
+
+        return verificar
+
+    def _vetorizar(self, coluna, validador, colunas):
+        vetor = coluna.vetor({int}, "int64")
+        if vetor is None:
+            avaliacao = coluna.avaliar(self._avaliador(validador))
+            if self.guardar:
+                colunas.numeros[self.campo] = avaliacao.numeros("int64")
+            return avaliacao.efeitos()
+        # Só inteiros: 0 e vazio não são validados, o resto é comparação de vetores
+        presente, valores = vetor
+        lido = (presente & (valores != 0))[coluna.indices]
+        valores = valores[coluna.indices]
+        efeitos = Efeitos()
+        fora = lido & ((valores < self.minimo) | (valores > self.maximo))
+        efeitos.mensagem(fora, (self.mensagem_intervalo or Mensagem("FORA_INTERVALO", self.campo),))
+        if self.guardar:
+            colunas.numeros[self.campo] = (lido, valores)
+        return efeitos
+
+
+class ValorDecimal(Regra):
+    """
+    Número decimal opcional entre minimo e maximo, aceitando vírgula; o valor válido
+    é regravado com duas casas e vírgula.
+    requer: só é validado quando ctx[requer] tiver um número.
+    """
 
+    vetorizavel = True
+
+    def __init__(self, campo, minimo, maximo, requer=None):
+        super().__init__(campo)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.requer = requer
+
+    def _avaliador(self, validador):
+        """avaliar(valor) -> (mensagens, valor regravado ou MANTER, None)."""
+        minimo, maximo = self.minimo, self.maximo
+        texto = validador.pool_valores.texto
+        decimal = validador.cache_precos.decimal
+        fora = (Mensagem("FORA_INTERVALO", self.campo),)
+        invalido = (Mensagem("INVALIDO", self.campo),)
+
+        def avaliar(valor):
+            if not valor:
+                return (), MANTER, None
+            numero, formatado = decimal(texto(valor))
+            if numero is None:
+                return invalido, MANTER, None
+            if not (minimo <= numero <= maximo):
+                return fora, MANTER, None
+            return (), formatado, None
+
+        return avaliar
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        requer = self.requer
+        avaliar = self._avaliador(validador)
+
+        def verificar(row, mensagens, ctx):
+            if requer is not None and ctx.get(requer) is None:
+                return
+            cell = row[idx]
+            erros, novo, _ = avaliar(cell.value)
+            if novo is not MANTER:
+                cell.value = novo
+            if erros:
+                mensagens.extend(erros)
+
+        return verificar
+
+    def _vetorizar(self, coluna, validador, colunas):
+        avaliacao = coluna.avaliar(self._avaliador(validador))
+        if self.requer is None:
+            return avaliacao.efeitos()
+        return avaliacao.efeitos(colunas.numero(self.requer)[0])
+
+
+class Referencia(Regra):
+    """
+    Código que precisa existir no cadastro `registro` (aba do índice de
+    chaves) de uma aba anterior. Os usos e os códigos inexistentes ficam
+    contados no cadastro, para o relatório de chaves.
+    opcional: vazio é aceito (sem opcional, vazio é procurado no cadastro).
+    limpar_zero: "0" é tratado como vazio e a célula é limpa.
+    mensagem_vazio: mensagem própria para vazio.
+    mensagem_nao_inteiro: exige código só com dígitos.
+    corrigir_unico: com um único código cadastrado, vazio ou inexistente é
+        corrigido para ele.
+    limite_advertencia: código mais longo que o limite é advertência.
+    """
 
-            cell = self.get_mandatory_cell(row, header, "CodCondPagamento")
-            if cell is None:
-                mensagens.append("CodCondPagamento ausente")
+    def __init__(self, campo, registro, mensagem, opcional=False, limpar_zero=False,
+                 mensagem_vazio=None, mensagem_nao_inteiro=None, corrigir_unico=False,
+                 limite_advertencia=None):
+        super().__init__(campo, obrigatoria=not opcional)
+        self.registro = registro
+        self.mensagem = mensagem
+        self.opcional = opcional
+        self.limpar_zero = limpar_zero
+        self.mensagem_vazio = mensagem_vazio
+        self.mensagem_nao_inteiro = mensagem_nao_inteiro
+        self.corrigir_unico = corrigir_unico
+        self.limite_advertencia = limite_advertencia
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        cadastro = validador.chaves[self.registro]
+        unico = self.corrigir_unico and len(cadastro) == 1
+        valor_unico = cadastro.primeira() if unico else None
+        usar, orfao = cadastro.referencia(sheet.title, self.campo)
+        mensagem, msg_vazio = self.mensagem, self.mensagem_vazio
+        msg_nao_inteiro = self.mensagem_nao_inteiro
+        opcional, limpar_zero, limite = self.opcional, self.limpar_zero, self.limite_advertencia
+        msg_limite = Mensagem("LIMITE_CARACTERES", self.campo)
+        msg_corrigido = Mensagem("CORRIGIDO", self.campo)
+        texto = validador.pool_valores.texto
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            valor = texto(cell.value)
+            if limpar_zero and valor == "0":
+                cell.value = ""
+                return
+            if limite is not None and valor and len(valor) > limite:
+                mensagens.append(msg_limite)
+            if not valor:
+                if unico:
+                    cell.value = valor_unico
+                    mensagens.append(msg_corrigido)
+                    usar(valor_unico)
+                    return
+                if opcional:
+                    return
+                if msg_vazio is not None:
+                    mensagens.append(msg_vazio)
+                    return
+            if msg_nao_inteiro is not None and not valor.isdigit():
+                mensagens.append(msg_nao_inteiro)
+            elif valor in cadastro:
+                usar(valor)
+            elif unico:
+                cell.value = valor_unico
+                mensagens.append(msg_corrigido)
+                usar(valor_unico)
             else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 32767):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodCondPagamento inválido")
-                else:
-                    cell.fill = COR_VALIDO
-                if valor in seen_cod:
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodCondPagamento duplicado")
-                else:
-                    seen_cod.add(valor)
-                    self.pagto_cod_list.append(valor)
-            cell_cond = self.get_mandatory_cell(row, header, "CondPagamento")
-            if cell_cond is None:
-                mensagens.append("CondPagamento ausente")
-            else:
-                cond_val = self.get_valor_string(cell_cond)
-                if not cond_val or len(cond_val) > 20:
-                    cell_cond.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, 'CondPagamento' excede 20 caracteres")
-                else:
-                    cell_cond.fill = COR_VALIDO
-            cell_tipo = self.get_mandatory_cell(row, header, "TipoCondPagamento")
-            if cell_tipo is None:
-                mensagens.append("TipoCondPagamento ausente")
-            else:
-                if corrigir_campo(cell_tipo, {"N", "E", "n", "e", ""}):
-                    cell_tipo.fill = COR_ERRO
-                    mensagens.append("TipoCondPagamento inválido")
-                else:
-                    cell_tipo.fill = COR_VALIDO
-            cell_padrao = self.get_mandatory_cell(row, header, "CondPagamentoPadrao")
-            if cell_padrao is None:
-                mensagens.append("CondPagamentoPadrao ausente")
-            else:
-                if corrigir_campo(cell_padrao, {"S", "s", "N", "n", ""}):
-                    cell_padrao.fill = COR_ERRO
-                    mensagens.append("CondPagamentoPadrao inválido")
-                else:
-                    cell_padrao.fill = COR_VALIDO
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
-
+                mensagens.append(mensagem)
+                if valor:
+                    orfao(valor, row[0].row)
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
+        return verificar
 
-        self.gerar_status_por_aba("PAGTO", total_linhas, linhas_validas, linhas_advertencias, linhas_erros)
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
-        return None
 
-    def validar_PAGTOFILIAL(self):
-        if "PAGTOFILIAL" not in self.wb.sheetnames:
-            return
-        
-        sheet = self.wb["PAGTOFILIAL"]
+class NomeEstado(Regra):
+    """Nome do estado: corrigido a partir da sigla; sem sigla conhecida, só o tamanho."""
 
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodCondPagamento", "CodFilial", "VlrMinimoPedido"]
-        
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                              " estavam com nome errado, o correto é " +
-                              ", ".join(correctos))
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
+    def __init__(self, campo, coluna_sigla, tamanho):
+        super().__init__(campo, obrigatoria=True)
+        self.coluna_sigla = coluna_sigla
+        self.tamanho = tamanho
 
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
+    def _compilar(self, idx, header, validador, sheet, estado):
+        idx_sigla = header.get(self.coluna_sigla)
+        tamanho = self.tamanho
+        mensagem = Mensagem("LIMITE_CARACTERES", self.campo)
+        texto = validador.pool_valores.texto
 
-            cell = self.get_mandatory_cell(row, header, "CodCondPagamento")
-            if cell is None:
-                mensagens.append("CodCondPagamento ausente")
-            else:
-                valor = self.get_valor_string(cell)
-                if valor not in self.pagto_cod_list:
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodCondPagamento inexistente na aba PAGTO")
-                else:
-                    cell.fill = COR_VALIDO
-            cell_fil = self.get_mandatory_cell(row, header, "CodFilial")
-            if cell_fil is None:
-                mensagens.append("CodFilial ausente")
-            else:
-                valor_fil = self.get_valor_string(cell_fil)
-                if valor_fil not in self.filial_cod_list:
-                    cell_fil.fill = COR_ERRO
-                    mensagens.append("CodFilial inexistente na aba FILIAL")
-                else:
-                    cell_fil.fill = COR_VALIDO
-            idx = header.get("VlrMinimoPedido")
-            if idx is not None:
-                cell_valor = row[idx]
-                if cell_valor.value:
-                    try:
-                        valor_str = self.get_valor_string(cell_valor)
-                        valor_float = float(valor_str.replace(",", "."))
-                        if not (0.00 <= valor_float <= 9999999999.99):
-                            cell_valor.fill = COR_ERRO
-                            mensagens.append("VlrMinimoPedido fora do intervalo")
-                        else:
-                            cell_valor.fill = COR_VALIDO
-                            cell_valor.value = f"{valor_float:.2f}".replace(".", ",")
-                    except:
-                        cell_valor.fill = COR_ERRO
-                        mensagens.append("VlrMinimoPedido inválido")
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            sigla = texto(row[idx_sigla].value) if idx_sigla is not None else ""
+            nome = texto(cell.value)
+            esperado = ESTADOS_BRASIL.get(sigla, "")
+            if sigla in ESTADOS_BRASIL and nome.lower() != esperado.lower():
+                cell.value = esperado
+            elif len(nome) > tamanho:
+                mensagens.append(mensagem)
 
+        return verificar
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
 
-        self.gerar_status_por_aba(
-            "PAGTOFILIAL",
-            total_linhas,
-            linhas_validas,
-            linhas_advertencias,
-            linhas_erros,
-        )
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+class TitulosFilial(RegraLinha):
+    """Na primeira filial, C2/D2 vazios recebem os títulos da EMPRESA (C39/C40)."""
 
-    def validar_TRANSP(self):
-        if "TRANSP" not in self.wb.sheetnames:
-            return
-        sheet = self.wb["TRANSP"]
-
-
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodTransportadora", "Transportadora", "TransportadoraPadrao"]
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                            " estavam com nome errado, o correto é " +
-                            ", ".join(correctos))
+    def _compilar(self, idx, header, validador, sheet, estado):
+        def verificar(row, mensagens, ctx):
+            if row[0].row != 2:
+                return
+            empresa = validador.wb["EMPRESA"]
+            for coluna, origem in ((3, 39), (4, 40)):
+                cell = sheet.cell(row=2, column=coluna)
+                if not (cell.value and str(cell.value).strip()):
+                    cell.value = empresa.cell(row=origem, column=3).value
+                    mensagens.append(Mensagem("CORRIGIDO", cell.coordinate))
 
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        seen_cod = set()
-        seen_nome = set()
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
+        return verificar
 
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
 
+class CodigoEmpresa(Regra):
+    """
+    Código de produto conforme a configuração da EMPRESA (tipo C7/C10 e
+    tamanho C8/C11). Códigos repetidos na aba (contagem de _preparar_produtos)
+    vão para a coluna Duplicados: o primeiro é advertência, os demais erro.
+    auxiliar: CodAuxiliarProduto (opcional, pode estar desativado com "X").
+    """
 
+    def __init__(self, campo, auxiliar=False):
+        super().__init__(campo, obrigatoria=not auxiliar)
+        self.auxiliar = auxiliar
 
-            cell = self.get_mandatory_cell(row, header, "CodTransportadora")
-            if cell is None:
-                mensagens.append("CodTransportadora ausente")
-            else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 32767):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodTransportadora inválido")
-                else:
-                    cell.fill = COR_VALIDO
-                if valor in seen_cod:
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodTransportadora duplicado")
-                else:
-                    seen_cod.add(valor)
-                    self.transp_dict[valor] = None
-            cell_transp = self.get_mandatory_cell(row, header, "Transportadora")
-            if cell_transp is None:
-                mensagens.append("Transportadora ausente")
-            else:
-                nome_transp = self.get_valor_string(cell_transp)
-                if not nome_transp or len(nome_transp) > 20:
-                    cell_transp.fill = COR_ERRO
-                    mensagens.append("Transportadora inválida ou excede 20 caracteres")
-                else:
-                    cell_transp.fill = COR_VALIDO
-                if nome_transp in seen_nome:
-                    cell_transp.fill = COR_ERRO
-                    mensagens.append("Transportadora duplicada")
-                else:
-                    seen_nome.add(nome_transp)
-                    self.transp_dict[valor] = nome_transp
-            cell_pad = self.get_mandatory_cell(row, header, "TransportadoraPadrao")
-            if cell_pad is None:
-                mensagens.append("TransportadoraPadrao ausente")
-            else:
-                if corrigir_campo(cell_pad, {"S", "s", "N", "n", ""}):
-                    cell_pad.fill = COR_ERRO
-                    mensagens.append("TransportadoraPadrao inválido")
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo, auxiliar = self.campo, self.auxiliar
+        if auxiliar:
+            tipo, tamanho = validador.emp_cod_aux, validador.emp_cod_aux_tamanho
+        else:
+            tipo, tamanho = validador.emp_cod_tipo, validador.emp_cod_tamanho
+        contagem = estado["contagens"][campo]
+        primeiros = set()
+        texto = validador.pool_valores.texto
+        msg_nao_usado = Mensagem("CODIGO_NAO_USADO", campo)
+        msg_primeiro_duplicado = Mensagem("DUPLICADO_PRIMEIRO", campo)
+        msg_duplicado = Mensagem("DUPLICADO", campo)
+
+        def excede(valor):
+            # O tamanho do código principal é sempre verificado (C8 obrigatório)
+            if auxiliar and not tamanho:
+                return False
+            return len(valor) > tamanho
+
+        def verificar(row, mensagens, ctx):
+            valor = texto(row[idx].value)
+            if auxiliar and not valor:
+                return
+            if auxiliar and tipo == "X":
+                mensagens.append(msg_nao_usado)
+            elif tipo == "N":
+                if not valor.isdigit():
+                    mensagens.append(Mensagem("CODIGO_ALFANUMERICO", campo, valor))
+                elif excede(valor):
+                    mensagens.append(Mensagem("CODIGO_EXCEDE_TAMANHO", campo, len(valor), tamanho))
+            elif tipo == "A":
+                # Alfanumérico aceita letras e/ou números (não precisa ter ambos)
+                if excede(valor):
+                    mensagens.append(Mensagem("CODIGO_EXCEDE_TAMANHO", campo, len(valor), tamanho))
+            if valor and contagem.get(valor, 0) > 1:
+                ctx.setdefault("duplicados", []).append(valor)
+                if valor not in primeiros:
+                    primeiros.add(valor)
+                    mensagens.append(msg_primeiro_duplicado)
                 else:
-                    cell_pad.fill = COR_VALIDO
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+                    mensagens.append(msg_duplicado)
+
+        return verificar
+
+
+class HierarquiaQtde(RegraLinha):
+    """QtdeTabela1..3: preenchidas em sequência e em ordem crescente."""
+
+    vetorizavel = True
+
+    def __init__(self, campos):
+        super().__init__()
+        self.campos = campos
+        self.dependencias = campos
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        c1, c2, c3 = self.campos
+        i1, i2, i3 = (header.get(c) for c in self.campos)
+        sozinha, requer_duas, requer, menor_12, menor_23 = self._mensagens()
+
+        def verificar(row, mensagens, ctx):
+            p1 = i1 is not None and bool(row[i1].value)
+            p2 = i2 is not None and bool(row[i2].value)
+            p3 = i3 is not None and bool(row[i3].value)
+            if p1 and not p2:
+                mensagens.append(sozinha)
+            elif p3 and not p2:
+                mensagens.append(requer_duas)
+            elif p2 and not p1:
+                mensagens.append(requer)
+            v1, v2, v3 = ctx.get(c1), ctx.get(c2), ctx.get(c3)
+            if v1 and v2 and v1 >= v2:
+                mensagens.append(menor_12)
+            if v2 and v3 and v2 >= v3:
+                mensagens.append(menor_23)
+
+        return verificar
+
+    def _mensagens(self):
+        c1, c2, c3 = self.campos
+        return (
+            Mensagem("QTDE_SOZINHA", c1, c2),
+            Mensagem("QTDE_REQUER_DUAS", c3, c1, c2),
+            Mensagem("QTDE_REQUER", c2, c1),
+            Mensagem("MENOR_QUE", c1, c2),
+            Mensagem("MENOR_QUE", c2, c3),
+        )
 
+    def vetorizar(self, header, validador, colunas):
+        sozinha, requer_duas, requer, menor_12, menor_23 = self._mensagens()
+        p1, p2, p3 = (colunas.preenchida(c) for c in self.campos)
+        efeitos = Efeitos()
+        efeitos.mensagem(p1 & ~p2, (sozinha,))
+        efeitos.mensagem(p3 & ~p2 & ~p1, (requer_duas,))
+        efeitos.mensagem(p2 & ~p1, (requer,))
+        (l1, v1), (l2, v2), (l3, v3) = (colunas.numero(c) for c in self.campos)
+        efeitos.mensagem(l1 & l2 & (v1 != 0) & (v2 != 0) & (v1 >= v2), (menor_12,))
+        efeitos.mensagem(l2 & l3 & (v2 != 0) & (v3 != 0) & (v2 >= v3), (menor_23,))
+        return efeitos
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
 
-        self.gerar_status_por_aba(
-            "TRANSP", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+class Preco(Regra):
+    """
+    Preço entre 0,01 e 999999,99, regravado com vírgula (pontos convertidos
+    por convert_price_to_comma_format). O preço válido fica em ctx[campo].
+    obrigatoria: vazio ou "-" é erro; sem obrigatoria, vazio é aceito.
+    menor_que / qtdes: com todas as `qtdes` preenchidas, o preço precisa ser
+        menor que o de `menor_que`.
+    """
 
-    def validar_ESTADOS(self):
-        if "ESTADOS" not in self.wb.sheetnames:
-            return
-        sheet = self.wb["ESTADOS"]
-
-
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["SiglaEstado", "NomeEstado", "Padrao", "ClienteNovoTabPreco"]
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            # Garanta que a palavra "advertencia" esteja em minúsculas para que a função determinar_fill_resultado a reconheça.
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                            " estavam com nome errado, o correto é " +
-                            ", ".join(correctos))
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
+    vetorizavel = True
+
+    def __init__(self, campo, obrigatoria=False, menor_que=None, qtdes=()):
+        super().__init__(campo, obrigatoria)
+        self.menor_que = menor_que
+        self.qtdes = qtdes
+        self.dependencias = qtdes
+
+    def _avaliador(self, validador):
+        """avaliar(valor) -> (mensagens, novo valor ou MANTER, preço válido ou None)."""
+        campo, obrigatoria = self.campo, self.obrigatoria
+        texto = validador.pool_valores.texto
+        converter = validador.cache_precos.preco
+        if obrigatoria:
+            msg_traco = Mensagem("PRECO_TRACO_OU_VAZIO", campo)
+            tracos = ("-", "")
+        else:
+            msg_traco = Mensagem("PRECO_TRACO", campo)
+            tracos = ("-",)
+        msg_zero = Mensagem("PRECO_TRACO_OU_ZERO", campo)
+        msg_negativo = Mensagem("PRECO_NAO_POSITIVO", campo)
+        msg_intervalo = Mensagem("FORA_INTERVALO", campo)
+        msg_invalido = Mensagem("INVALIDO", campo)
+
+        def avaliar(bruto):
+            if not obrigatoria and (bruto is None or str(bruto).strip() == ""):
+                return (), MANTER, None
             mensagens = []
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
-            cell_sigla = self.get_mandatory_cell(row, header, "SiglaEstado")
-            sigla = ""
-            if cell_sigla is None:
-                mensagens.append("SiglaEstado ausente")
-            else:
-                sigla = self.get_valor_string(cell_sigla)
-                if sigla not in ESTADOS_BRASIL:
-                    cell_sigla.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, 'SiglaEstado' inválida")
-                else:
-                    cell_sigla.fill = COR_VALIDO
-            cell_nome = self.get_mandatory_cell(row, header, "NomeEstado")
-            if cell_nome is None:
-                mensagens.append("NomeEstado ausente")
-            else:
-                nome_estado = self.get_valor_string(cell_nome)
-                esperado = ESTADOS_BRASIL.get(sigla, "")
-                if sigla in ESTADOS_BRASIL and nome_estado.lower() != esperado.lower():
-                    cell_nome.value = esperado
-                    cell_nome.fill = COR_VALIDO
-                else:
-                    if len(nome_estado) > 20:
-                        cell_nome.fill = COR_ADVERTENCIA
-                        mensagens.append(
-                            "Advertencia, 'NomeEstado' excedeu o limite de caracteres"
-                        )
+            novo = MANTER
+            preco = None
+            try:
+                if bruto is None:
+                    raise ValueError("Valor vazio")
+                if isinstance(bruto, str) and bruto.strip() in tracos:
+                    novo = ""
+                    mensagens.append(msg_traco)
+                elif isinstance(bruto, (int, float)):
+                    numero = float(bruto)
+                    if numero <= 0:
+                        mensagens.append(msg_negativo)
+                    elif numero > 999999.99:
+                        mensagens.append(msg_intervalo)
                     else:
-                        cell_nome.fill = COR_VALIDO
-            cell_pad = self.get_mandatory_cell(row, header, "Padrao")
-            if cell_pad is None:
-                mensagens.append("Padrao ausente")
-            else:
-                if corrigir_campo(cell_pad, {"1", "2"}):
-                    cell_pad.fill = COR_ERRO
-                    mensagens.append("Padrao inválido")
+                        novo = f"{numero:.2f}".replace(".", ",")
+                        preco = numero
                 else:
-                    cell_pad.fill = COR_VALIDO
-            idx = header.get("ClienteNovoTabPreco")
-            if idx is not None:
-                cell_cliente = row[idx]
-                if cell_cliente.value:
-                    try:
-                        val = int(cell_cliente.value)
-                        if val not in [0, 1, 2, 3]:
-                            cell_cliente.fill = COR_ERRO
-                            mensagens.append("ClienteNovoTabPreco deve ser 0,1,2 ou 3")
+                    valor_str = texto(bruto)
+                    if valor_str in ("-", "0", "0,00", "0.00", ""):
+                        novo = ""
+                        mensagens.append(msg_zero)
+                    else:
+                        convertido, foi_alterado, numero = converter(valor_str)
+                        if foi_alterado:
+                            mensagens.append(Mensagem("CORRIGIDO_DE_PARA", campo, valor_str, convertido))
+                        novo = convertido
+                        if numero is None:
+                            mensagens.append(msg_invalido)
+                        elif not (0.01 <= numero <= 999999.99):
+                            mensagens.append(msg_intervalo)
                         else:
-                            cell_cliente.fill = COR_VALIDO
-                    except:
-                        cell_cliente.fill = COR_ERRO
-                        mensagens.append("ClienteNovoTabPreco inválido")
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+                            preco = numero
+            except Exception:
+                mensagens.append(msg_invalido)
+                preco = None
+            return tuple(mensagens), novo, preco
+
+        return avaliar
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo, anterior = self.campo, self.menor_que
+        idx_qtdes = [header.get(c) for c in self.qtdes]
+        hierarquia = anterior is not None and None not in idx_qtdes
+        msg_hierarquia = Mensagem("MENOR_QUE", campo, anterior)
+        avaliar = self._avaliador(validador)
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            erros, novo, preco = avaliar(cell.value)
+            if novo is not MANTER:
+                cell.value = novo
+            if erros:
+                mensagens.extend(erros)
+            if preco is not None and hierarquia and all(row[i].value for i in idx_qtdes):
+                preco_anterior = ctx.get(anterior)
+                if preco_anterior and preco >= preco_anterior:
+                    mensagens.append(msg_hierarquia)
+            ctx[campo] = preco
+
+        return verificar
+
+    def _vetorizar(self, coluna, validador, colunas):
+        vetor = coluna.vetor({int, float}, "float64")
+        if vetor is None:
+            avaliacao = coluna.avaliar(self._avaliador(validador))
+            efeitos = avaliacao.efeitos()
+            lido, precos = avaliacao.numeros("float64")
+        else:
+            efeitos, lido, precos = self._vetorizar_numeros(coluna, *vetor)
+        colunas.numeros[self.campo] = (lido, precos)
+        anterior = self.menor_que
+        if anterior is not None and all(c in colunas.header for c in self.qtdes):
+            mascara = lido
+            for c in self.qtdes:
+                mascara = mascara & colunas.preenchida(c)
+            lido_anterior, precos_anteriores = colunas.numero(anterior)
+            mascara = mascara & lido_anterior & (precos_anteriores != 0) & (precos >= precos_anteriores)
+            efeitos.mensagem(mascara, (Mensagem("MENOR_QUE", self.campo, anterior),))
+        return efeitos
+
+    def _vetorizar_numeros(self, coluna, presente, numeros):
+        """Coluna só com números (e vazios): faixas comparadas no vetor, sem avaliar valor a valor."""
+        campo = self.campo
+        negativo = presente & (numeros <= 0)
+        fora = presente & (numeros > 999999.99)
+        valido = presente & ~negativo & ~fora
+        novos = np.empty(len(numeros), dtype=object)
+        novos[valido] = [f"{numero:.2f}".replace(".", ",") for numero in numeros[valido].tolist()]
+        indices = coluna.indices
+        efeitos = Efeitos()
+        if self.obrigatoria:
+            efeitos.mensagem(~presente[indices], (Mensagem("INVALIDO", campo),))
+        efeitos.mensagem(negativo[indices], (Mensagem("PRECO_NAO_POSITIVO", campo),))
+        efeitos.mensagem(fora[indices], (Mensagem("FORA_INTERVALO", campo),))
+        valido = valido[indices]
+        efeitos.escrever(coluna.idx, valido, novos[indices])
+        return efeitos, valido, numeros[indices]
+
+
+class LeitorDatas:
+    """
+    Conversão dos textos de uma coluna de datas. Os primeiros `AMOSTRA` textos
+    distintos decidem o formato dominante, que passa a ser tentado primeiro;
+    os outros formatos só são tentados quando ele falha. Cada texto distinto
+    é convertido uma vez (as datas de estoque se repetem muito).
+    """
 
+    AMOSTRA = 50
+    # Acima disso, textos novos são convertidos sem entrar no cache
+    LIMITE_CACHE = 65536
+
+    def __init__(self, formatos):
+        self.formatos = tuple(formatos)
+        self._acertos_formato = dict.fromkeys(self.formatos, 0)
+        self._amostrados = 0
+        self._datas = {}
+
+    def converter(self, texto):
+        """datetime do texto, ou None se nenhum formato servir."""
+        dt = self._datas.get(texto, False)
+        if dt is not False:
+            return dt
+        dt = None
+        for fmt in self.formatos:
+            try:
+                dt = datetime.strptime(texto, fmt)
+            except ValueError:
+                continue
+            if self._amostrados < self.AMOSTRA:
+                self._acertos_formato[fmt] += 1
+            break
+        if self._amostrados < self.AMOSTRA:
+            self._amostrados += 1
+            if self._amostrados == self.AMOSTRA:
+                # Os formatos não se sobrepõem: a ordem só muda quantas tentativas falham
+                self.formatos = tuple(sorted(self.formatos, key=self._acertos_formato.get, reverse=True))
+        if len(self._datas) < self.LIMITE_CACHE:
+            self._datas[texto] = dt
+        return dt
+
+
+class Data(Regra):
+    """
+    Data opcional em dd/mm/aaaa ou aaaa-mm-dd, regravada como data. Com data
+    preenchida, a coluna `saldo` vazia gera advertência.
+    """
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
+    FORMATOS = ("%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+    def __init__(self, campo, saldo=None):
+        super().__init__(campo)
+        self.saldo = saldo
+
+    def _compilar(self, idx, header, validador, sheet, estado):
+        campo = self.campo
+        idx_saldo = header.get(self.saldo) if self.saldo else None
+        msg_saldo = Mensagem("SALDO_INSUFICIENTE", self.saldo, campo)
+        msg_formato = Mensagem("DATA_FORMATO", campo)
+        msg_invalida = Mensagem("INVALIDA", campo)
+        texto = validador.pool_valores.texto
+        converter = LeitorDatas(self.FORMATOS).converter
+
+        def verificar(row, mensagens, ctx):
+            cell = row[idx]
+            valor = cell.value
+            if not valor:
+                return
+            if valor.__class__ is datetime and not valor.microsecond:
+                # Data lida como data: o texto dela ("aaaa-mm-dd hh:mm:ss") voltaria à mesma data
+                cell.number_format = "DD/MM/YYYY"
+            else:
+                try:
+                    dt = converter(texto(valor))
+                    if dt:
+                        cell.value = dt
+                        cell.number_format = "DD/MM/YYYY"
+                    else:
+                        mensagens.append(msg_formato)
+                except Exception:
+                    mensagens.append(msg_invalida)
+            if idx_saldo is not None:
+                saldo = row[idx_saldo].value
+                if not saldo or str(saldo).strip() == "":
+                    mensagens.append(msg_saldo)
 
-        self.gerar_status_por_aba(
-            "ESTADOS", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+        return verificar
 
-        # Ao final do método validar_XXX, depois de aplicar bordas e ajustar colunas:
 
-    def validar_CLIENTES(self):
-        if "CLIENTES" not in self.wb.sheetnames:
-            return
-        sheet = self.wb["CLIENTES"]
-
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodCliente", "NomeFantasia", "CodRepresentante", "RazaoSocial", "Logradouro", "Bairro", "Cidade",	"UF",	"CEP",	"CNPJCPF",	"IERG",	"Observacao",	"CodTransportadora",	"NomeTransportadora",	"PrecoTabela",	"NomeContato", "EMail", "DDD", "Telefone1",	"Telefone2"]
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Excluir linhas completamente duplicadas (todas as colunas iguais)
-        self.excluir_linhas_duplicadas_clientes(sheet, header)
-
-        # Excluir linhas totalmente vazias
-        linhas_para_excluir = []
-        for row_num in range(sheet.max_row, 1, -1):  # De baixo para cima, ignorando cabeçalho
-            row_values = [sheet.cell(row=row_num, column=col).value for col in range(1, sheet.max_column + 1)]
-            if all(v is None or str(v).strip() == "" for v in row_values):
-                linhas_para_excluir.append(row_num)
-        for row_num in linhas_para_excluir:
-            sheet.delete_rows(row_num)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                      " estavam com nome errado, o correto é " +
-                      ", ".join(correctos))
+class ArquivoImagem(Regra):
+    """Nome do arquivo de foto: tamanho e existência na pasta de imagens do SRPP."""
 
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_advertencias = 0
-        linhas_erros = 0
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        
-        # Rastrear CodCliente normalizados para detectar duplicatas considerando zeros à esquerda
-        # Formato: {valor_normalizado: (valor_original_string, numero_linha)}
-        seen_codcliente_normalized = {}
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
-            cell = self.get_mandatory_cell(row, header, "CodCliente")
-            if cell is None:
-                mensagens.append("CodCliente ausente")
-            else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 9999999):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodCliente inválido")
-                else:
-                    # Verificar duplicatas considerando zeros à esquerda
-                    normalized_cod = int(valor)  # Remove zeros à esquerda
-                    if normalized_cod in seen_codcliente_normalized:
-                        original_cod, original_linha = seen_codcliente_normalized[normalized_cod]
-                        linha_atual = row[0].row
-                        
-                        # Se são strings diferentes (zeros à esquerda), mostrar exemplo com linhas
-                        if original_cod != valor:
-                            mensagem = f"CodCliente duplicado: {valor} na linha {linha_atual} já existe como {original_cod} na linha {original_linha}"
-                        else:
-                            mensagem = f"CodCliente duplicado: {valor} na linha {linha_atual} já existe na linha {original_linha}"
-                            
-                        cell.fill = COR_ERRO
-                        mensagens.append(mensagem)
-                    else:
-                        linha_atual = row[0].row
-                        seen_codcliente_normalized[normalized_cod] = (valor, linha_atual)
-                        cell.fill = COR_VALIDO
-            cell_nf = self.get_mandatory_cell(row, header, "NomeFantasia")
-            if cell_nf is None:
-                mensagens.append("NomeFantasia ausente")
-            else:
-                nf = self.get_valor_string(cell_nf)
-                # Se NomeFantasia estiver vazio, copiar de RazaoSocial
-                if not nf:
-                    idx_rs = header.get("RazaoSocial")
-                    if idx_rs is not None:
-                        cell_rs = row[idx_rs]
-                        rs_val = self.get_valor_string(cell_rs)
-                        if rs_val:
-                            cell_nf.value = rs_val
-                            nf = rs_val
-                        else:
-                            cell_nf.fill = COR_ERRO
-                            mensagens.append("NomeFantasia vazio e RazaoSocial também vazia")
-                    else:
-                        cell_nf.fill = COR_ERRO
-                        mensagens.append("NomeFantasia vazio e coluna RazaoSocial não encontrada")
-
-                # Validar tamanho após possível cópia
-                if nf:
-                    if len(nf) > 20:
-                        cell_nf.fill = COR_ADVERTENCIA
-                        mensagens.append("Advertencia, NomeFantasia excede 20 caracteres")
-                    else:
-                        cell_nf.fill = COR_VALIDO
-            idx = header.get("CodRepresentante")
-            if idx is not None:
-                cell_cr = row[idx]
-                cr_val = self.get_valor_string(cell_cr)
-                if cr_val == "0":
-                    cell_cr.value = ""
-                    cell_cr.fill = COR_VALIDO
-                elif cr_val:
-                    if not cr_val.isdigit() or cr_val not in self.repr_cod_list:
-                        cell_cr.fill = COR_ERRO
-                        mensagens.append("CodRepresentante inexistente")
-                    else:
-                        cell_cr.fill = COR_VALIDO
-            idx = header.get("RazaoSocial")
-            if idx is not None:
-                cell_rs = row[idx]
-                rs_val = self.get_valor_string(cell_rs)
-                if rs_val and len(rs_val) > 40:
-                    cell_rs.fill = COR_ERRO
-                    mensagens.append("RazaoSocial excede 40 caracteres")
-                else:
-                    cell_rs.fill = COR_VALIDO
-            idx = header.get("PrecoTabela")
-            if idx is not None:
-                cell_pt = row[idx]
-                if cell_pt.value:
-                    try:
-                        val = int(cell_pt.value)
-                        if val not in [0, 1, 2, 3]:
-                            cell_pt.fill = COR_ERRO
-                            mensagens.append("PrecoTabela deve ser 0,1,2 ou 3")
-                        else:
-                            cell_pt.fill = COR_VALIDO
-                    except:
-                        cell_pt.fill = COR_ERRO
-                        mensagens.append("PrecoTabela inválido")
-                else:
-                    # Se estiver em branco, é válido
-                    cell_pt.fill = COR_VALIDO
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+    def __init__(self, campo, tamanho):
+        super().__init__(campo)
+        self.tamanho = tamanho
 
+    def _compilar(self, idx, header, validador, sheet, estado):
+        tamanho = self.tamanho
+        arquivos = validador.cache_arquivos_imagem
+        msg_limite = Mensagem("LIMITE_CARACTERES", self.campo)
+        texto = validador.pool_valores.texto
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
+        def verificar(row, mensagens, ctx):
+            valor = row[idx].value
+            if not valor:
+                return
+            caminho = texto(valor)
+            if len(caminho) > tamanho:
+                mensagens.append(msg_limite)
+            elif arquivos is not None and caminho not in arquivos:
+                mensagens.append(Mensagem("IMAGEM_INEXISTENTE", caminho))
 
-        self.gerar_status_por_aba(
-            "CLIENTES", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+        return verificar
 
-    def validar_FAMILIAS(self):
-        if "FAMILIAS" not in self.wb.sheetnames:
-            return
-        sheet = self.wb["FAMILIAS"]
-
-
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodFamilia", "Familia", "MultiploFamilia", "MinimoFamilia", "DescontoFamilia"]
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                      " estavam com nome errado, o correto é " +
-                      ", ".join(correctos))
-        total_linhas = 0    
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
-        result_col = sheet.max_column + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(
-            start_color="000000", end_color="000000", fill_type="solid"
-        )
-        header_result.font = Font(color="FFFFFF", bold=True)
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
+
+def _preparar_clientes(validador, sheet, header):
+    """Remove as linhas repetidas e as vazias antes da validação."""
+    validador.excluir_linhas_duplicadas_clientes(sheet, header)
+    validador.excluir_linhas_vazias(sheet)
+    return header, {}
+
+
+def _preparar_produtos(validador, sheet, header):
+    """
+    Remove as linhas repetidas e as vazias, limpa os zeros, conta CodProduto e
+    CodAuxiliarProduto (para as regras de duplicados) e, havendo repetidos,
+    insere a coluna Duplicados depois de CodProduto.
+    """
+    validador.excluir_linhas_duplicadas_produtos(sheet, header)
+    validador.excluir_linhas_vazias(sheet)
+
+    seen_codproduto = {}
+    seen_codaux = {}
+    idx_codproduto = header.get("CodProduto")
+    idx_codaux = header.get("CodAuxiliarProduto")
+    total_linhas_planilha = 0  # Contar linhas válidas reais
+
+    for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
+        # Verificação rápida de linha vazia
+        if idx_codproduto is not None:
+            first_val = row[idx_codproduto].value
+            if first_val is None or (isinstance(first_val, str) and first_val.strip() == ""):
                 continue
-            total_linhas += 1
-            mensagens = []
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
-
-                
-            cell = self.get_mandatory_cell(row, header, "CodFamilia")
-            if cell is None:
-                mensagens.append("CodFamilia ausente")
+
+        total_linhas_planilha += 1  # Contar apenas linhas com dados
+
+        # Limpar zeros em todas as células da linha
+        for cell in row:
+            if cell.value == 0 or (cell.value is not None and str(cell.value).strip() == "0"):
+                cell.value = ""
+
+        # Contar duplicados
+        if idx_codproduto is not None and row[idx_codproduto].value:
+            cp_val = str(row[idx_codproduto].value).strip()
+            if cp_val:
+                seen_codproduto[cp_val] = seen_codproduto.get(cp_val, 0) + 1
+
+        if idx_codaux is not None and row[idx_codaux].value:
+            aux_val = str(row[idx_codaux].value).strip()
+            if aux_val:
+                seen_codaux[aux_val] = seen_codaux.get(aux_val, 0) + 1
+
+    # Adiciona coluna "Duplicados" se necessário
+    any_duplicates = any(v > 1 for v in seen_codproduto.values()) or any(v > 1 for v in seen_codaux.values())
+    if any_duplicates and "Duplicados" not in header and "CodProduto" in header:
+        codproduto_col = header["CodProduto"] + 1
+        sheet.insert_cols(codproduto_col)
+        dup_header = sheet.cell(row=1, column=codproduto_col, value="Duplicados")
+        dup_header.fill = ESTILO_CABECALHO_FILL
+        dup_header.font = ESTILO_CABECALHO_FONT
+        header = validador.get_header_map(sheet)
+
+    estado = {
+        "contagens": {"CodProduto": seen_codproduto, "CodAuxiliarProduto": seen_codaux},
+        "total_linhas": total_linhas_planilha,
+    }
+    return header, estado
+
+
+def _finalizar_produtos(validador, sheet, header):
+    """Remove a coluna Duplicados se nenhuma linha tiver código repetido."""
+    if "Duplicados" not in header:
+        return 0
+    coluna = header["Duplicados"] + 1
+    for row in sheet.iter_rows(min_row=2, min_col=coluna, max_col=coluna):
+        for cell in row:
+            if cell.value and str(cell.value).strip() != "":
+                return 0
+    sheet.delete_cols(coluna)
+    validador.paleta.excluir_coluna(sheet, coluna)
+    validador.larguras.excluir_coluna(sheet.title, coluna)
+    return 1
+
+
+class RegrasAba:
+    """
+    Regras e ajustes de uma aba tabular (ver PlanilhaValidator._validar_aba).
+    cabecalho: cabeçalhos corrigidos por corrigir_cabecalho; None usa o
+        cabeçalho da planilha como está (sem advertência).
+    coluna_resultado: "nova" (depois da última coluna), "existente" (reusa a
+        coluna RESULTADO já presente) ou "apos_cabecalho" (depois dos
+        cabeçalhos preenchidos; as colunas seguintes ficam ocultas).
+    coluna_chave: linha sem essa coluna preenchida é ignorada; sem ela, só as
+        linhas inteiramente vazias.
+    advertencia_prevalece: advertência da linha pinta de amarelo mesmo com erro.
+    mensagem_sem_linhas: erro gravado na linha 2 quando a aba não tem dados.
+    preparar(validador, sheet, header) -> (header, estado) e
+    finalizar(validador, sheet, header): passos próprios da aba antes e
+        depois do laço das linhas; finalizar devolve quantas colunas excluiu
+        antes da coluna RESULTADO.
+    vetorizar: com NumPy instalado e estado["total_linhas"] grande, as regras
+        com `vetorizavel` rodam sobre as colunas inteiras (validacao_vetorizada).
+    """
+
+    def __init__(self, regras, cabecalho=None, coluna_resultado="nova", coluna_chave=None,
+                 coluna_duplicados=False, advertencia_prevalece=False, mensagem_sem_linhas=None,
+                 ajustar_largura=True, preparar=None, finalizar=None, retorno_ausente=None,
+                 vetorizar=False):
+        self.regras = regras
+        self.cabecalho = cabecalho
+        self.coluna_resultado = coluna_resultado
+        self.coluna_chave = coluna_chave
+        self.coluna_duplicados = coluna_duplicados
+        self.advertencia_prevalece = advertencia_prevalece
+        self.mensagem_sem_linhas = mensagem_sem_linhas
+        self.ajustar_largura = ajustar_largura
+        self.preparar = preparar
+        self.finalizar = finalizar
+        self.retorno_ausente = retorno_ausente
+        self.vetorizar = vetorizar
+
+
+REGRAS_ABAS = {
+    "FILIAL": RegrasAba(
+        [
+            TitulosFilial(),
+            Codigo("CodFilial", 999999, unicidade="sempre", registro="FILIAL",
+                   limite_advertencia=40, valor_padrao="1"),
+            Texto("Filial", 40, Mensagem("LIMITE_CARACTERES", "Filial"),
+                  nome_empresa=True, repetido=Mensagem("DUPLICADA", "Filial")),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["FILIAL"],
+        coluna_resultado="existente",
+        advertencia_prevalece=True,
+        retorno_ausente="Erro: A aba FILIAL não foi encontrada!",
+    ),
+    "REPR": RegrasAba(
+        [
+            Codigo("CodRepresentante", 32767, unicidade="se_valido", registro="REPR"),
+            Texto("Representante", 20, Mensagem("EXCEDE_CARACTERES_ADV_ASPAS", "Representante", 20),
+                  vazio="mensagem", repetido=Mensagem("REPETIDO", "Representante")),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["REPR"],
+        mensagem_sem_linhas="Inválido, ao menos um representante deve ser cadastrado",
+        retorno_ausente=("Erro", "A aba REPR não foi encontrada!"),
+    ),
+    "PAGTO": RegrasAba(
+        [
+            Codigo("CodCondPagamento", 32767, unicidade="sempre", registro="PAGTO"),
+            Texto("CondPagamento", 20, Mensagem("EXCEDE_CARACTERES_ADV_ASPAS", "CondPagamento", 20), vazio="mensagem"),
+            Dominio("TipoCondPagamento", {"N", "E", "n", "e", ""}, obrigatoria=True),
+            Dominio("CondPagamentoPadrao", SIM_NAO, obrigatoria=True),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["PAGTO"],
+        retorno_ausente=("Erro", "A aba PAGTO não foi encontrada!"),
+    ),
+    "PAGTOFILIAL": RegrasAba(
+        [
+            Referencia("CodCondPagamento", "PAGTO", Mensagem("INEXISTENTE_NA_ABA", "CodCondPagamento", "PAGTO")),
+            Referencia("CodFilial", "FILIAL", Mensagem("INEXISTENTE_NA_ABA", "CodFilial", "FILIAL")),
+            ValorDecimal("VlrMinimoPedido", 0.00, 9999999999.99),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["PAGTOFILIAL"],
+    ),
+    "TRANSP": RegrasAba(
+        [
+            Codigo("CodTransportadora", 32767, unicidade="sempre", registro="TRANSP"),
+            Texto("Transportadora", 20, Mensagem("INVALIDA_OU_EXCEDE", "Transportadora", 20), vazio="mensagem",
+                  repetido=Mensagem("DUPLICADA", "Transportadora"),
+                  registro=("TRANSP", "CodTransportadora")),
+            Dominio("TransportadoraPadrao", SIM_NAO, obrigatoria=True),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["TRANSP"],
+    ),
+    "ESTADOS": RegrasAba(
+        [
+            Conjunto("SiglaEstado", ESTADOS_BRASIL, Mensagem("INVALIDA_ADV", "SiglaEstado")),
+            NomeEstado("NomeEstado", "SiglaEstado", 20),
+            Dominio("Padrao", {"1", "2"}, obrigatoria=True),
+            Inteiro("ClienteNovoTabPreco", 0, 3, mensagem_intervalo=Mensagem("FORA_0_A_3", "ClienteNovoTabPreco")),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["ESTADOS"],
+    ),
+    "CLIENTES": RegrasAba(
+        [
+            Codigo("CodCliente", 9999999, unicidade="numerica"),
+            Texto("NomeFantasia", 20, Mensagem("EXCEDE_CARACTERES_ADV", "NomeFantasia", 20), copiar_de="RazaoSocial"),
+            Referencia("CodRepresentante", "REPR", Mensagem("INEXISTENTE", "CodRepresentante"),
+                       opcional=True, limpar_zero=True),
+            Texto("RazaoSocial", 40, Mensagem("EXCEDE_CARACTERES", "RazaoSocial", 40), obrigatoria=False),
+            Inteiro("PrecoTabela", 0, 3, mensagem_intervalo=Mensagem("FORA_0_A_3", "PrecoTabela")),
+        ],
+        # FAX é opcional: o cabeçalho da última coluna não é corrigido
+        cabecalho=CABECALHOS_ESPERADOS["CLIENTES"][:-1],
+        preparar=_preparar_clientes,
+    ),
+    "FAMILIAS": RegrasAba(
+        [
+            Codigo("CodFamilia", 999999, registro="FAMILIAS"),
+            Texto("Familia", 45, Mensagem("EXCEDE_CARACTERES", "Familia", 45), vazio="mensagem"),
+            Inteiro("MultiploFamilia", 1, 999999),
+            Inteiro("MinimoFamilia", 1, 999999),
+            ValorDecimal("DescontoFamilia", 0.00, 99.99),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["FAMILIAS"],
+        ajustar_largura=False,
+    ),
+    "ESTILOS": RegrasAba(
+        [
+            Codigo("CodEstilo", 999999, registro="ESTILOS"),
+            Texto("Estilo", 45, Mensagem("EXCEDE_CARACTERES", "Estilo", 45), vazio="mensagem"),
+        ],
+        cabecalho=CABECALHOS_ESPERADOS["ESTILOS"],
+        ajustar_largura=False,
+    ),
+    "PRODUTOS": RegrasAba(
+        [
+            CodigoEmpresa("CodProduto"),
+            CodigoEmpresa("CodAuxiliarProduto", auxiliar=True),
+            Texto("Produto", 45, Mensagem("LIMITE_CARACTERES", "Produto"), vazio=Mensagem("VAZIO", "Produto")),
+            Referencia("CodFilial", "FILIAL", Mensagem("INEXISTENTE", "CodFilial"), limite_advertencia=40,
+                       mensagem_vazio=Mensagem("AUSENTE_VARIAS_OPCOES", "CodFilial"), corrigir_unico=True),
+            Referencia("CodFamilia", "FAMILIAS", Mensagem("INEXISTENTE", "CodFamilia"), opcional=True,
+                       mensagem_nao_inteiro=Mensagem("NAO_INTEIRO", "CodFamilia")),
+            Referencia("CodEstilo", "ESTILOS", Mensagem("INEXISTENTE", "CodEstilo"), opcional=True,
+                       mensagem_nao_inteiro=Mensagem("NAO_INTEIRO", "CodEstilo")),
+            Inteiro("QtdeMultipla", 1, 999999),
+            Inteiro("QtdeMinima", 1, 999999),
+            Inteiro("QtdeTabela1", 1, 999999, guardar=True),
+            Inteiro("QtdeTabela2", 1, 999999, guardar=True),
+            Inteiro("QtdeTabela3", 1, 999999, guardar=True),
+            HierarquiaQtde(("QtdeTabela1", "QtdeTabela2", "QtdeTabela3")),
+            Preco("PrecoTabela1", obrigatoria=True),
+            Preco("PrecoTabela2", menor_que="PrecoTabela1", qtdes=("QtdeTabela1", "QtdeTabela2")),
+            Preco("PrecoTabela3", menor_que="PrecoTabela2", qtdes=("QtdeTabela1", "QtdeTabela2", "QtdeTabela3")),
+            ValorDecimal("LimiteDescIndividual", 0.00, 99.99),
+            Inteiro("MultiploGrade", 1, 999999, guardar=True),
+            ValorDecimal("DescontoGrade", 0.00, 99.99, requer="MultiploGrade"),
+            Dominio("PrecoPromocional", SIM_NAO),
+            ValorDecimal("AliquotaIPI", 0.00, 99.99),
+            Dominio("TipoVendaSemEstoque", {"L", "l", "b", "B", "c", "C", ""}),
+            Inteiro("QtdeEstoqueAtual", 1, 999999),
+            Inteiro("QtdeEstoqueFuturo", 1, 999999, zero_vazio=True),
+            Data("DtEstoqueFuturo", saldo="QtdeEstoqueFuturo"),
+            ArquivoImagem("PathFotografia", 60),
+            Inteiro("QtdeEtiquetas", 1, 999),
+        ],
+        coluna_resultado="apos_cabecalho",
+        coluna_chave="CodProduto",
+        coluna_duplicados=True,
+        preparar=_preparar_produtos,
+        finalizar=_finalizar_produtos,
+        retorno_ausente=("Erro", "A aba PRODUTOS não foi encontrada!"),
+        vetorizar=True,
+    ),
+}
+
+
+class PlanilhaValidator:
+    def get_valor_string(self, cell):
+        """
+        Converte valor de célula para string de forma otimizada.
+        Evita conversões desnecessárias e já faz strip; o texto de valores
+        repetidos sai do cache do pool (sempre o mesmo objeto).
+        """
+        if cell is None:
+            return ""
+        return self.pool_valores.texto(cell.value)
+
+    def __init__(self, arquivo, progress_callback=None, dev_mode=False, modo_leitura="completo",
+                 falha_rapida=False, leitura_paralela=False, cache=None, modo_saida="cores"):
+        """
+        Args:
+            arquivo: Caminho do arquivo Excel
+            progress_callback: Função opcional callback(percentual, mensagem) para reportar progresso
+            dev_mode: Se True, mantem colunas de debug como 'Status da Linha'
+            modo_leitura: "completo" (Worksheet do openpyxl) ou "streaming"
+                (read_only + linhas compactas, para arquivos grandes). Arquivos
+                .xlsb, .xls e .csv são sempre lidos em modo streaming. Em
+                streaming, cada aba do .xlsx só é lida no primeiro acesso.
+            falha_rapida: Se True, processar() é interrompido logo após
+                validar_EMPRESA quando a configuração de códigos (C7, C8,
+                C10, C11) usada na validação de PRODUTOS estiver inválida
+            leitura_paralela: Em streaming (.xlsx), decodifica as abas de dados
+                em paralelo, um processo por núcleo
+            cache: CacheResultados opcional (cache_resultados.py). Com cache, a
+                planilha só é carregada em processar(), e só se o resultado
+                para o mesmo conteúdo/versões ainda não estiver no cache.
+            modo_saida: "cores" (cada célula recebe a cor do status e a borda)
+                ou "condicional" (nas abas tabulares, códigos de status numa
+                coluna oculta e regras de formatação condicional do Excel
+                reproduzem as cores e as bordas; ver StatusAba)
+        """
+        self.arquivo = arquivo
+        self.progress_callback = progress_callback
+        self.dev_mode = dev_mode
+        self.modo_leitura = modo_leitura
+        self.falha_rapida = falha_rapida
+        self.leitura_paralela = leitura_paralela
+        self.modo_saida = modo_saida
+
+        self.cache = cache if isinstance(arquivo, (str, os.PathLike)) else None
+        self._chave_cache = None
+        self._registro_cache = None  # meta.json da entrada (acerto ou recém-gravada)
+        self.acerto_cache = False
+        self._revalidacao = None  # validador de _validar_de_novo (acerto do cache)
+
+        # Carregar workbook apenas com valores para validação (uma única leitura do arquivo)
+        self.pool_valores = PoolValores()
+        self.cache_precos = CachePrecos()
+        if obter_leitor(arquivo) is not None:
+            # .xlsb/.xls/.csv: sempre pelas abas compactas, lidas pelo leitor do formato
+            self.modo_leitura = "streaming"
+        self.wb = None
+        self.paleta = None  # PaletaEstilos do workbook carregado
+        self.larguras = LargurasColunas()
+        self.linhas_excluidas = {}  # aba -> [deslocamentos de cada exclusão (_excluir_linhas)]
+        self.linhas_sinalizadas = None  # LinhasSinalizadas com somente_erros
+        if self.cache is None:
+            self._carregar_workbook()
+
+        self.resultados_validacao = {}  # resumo por aba
+
+        # Inicializa a variável de tempo estimado
+        self.tempo_estimado_validacao = None
+        
+        # Cache extremamente rápido para validação de PathFotografia
+        self.cache_arquivos_imagem = None
+        self._carregar_cache_imagens()
+        self.tempo_inicio = None
+
+        # Dados da aba EMPRESA (para validações cruzadas)
+        self.emp_nome = None
+        self.emp_cod_tipo = None  # "N" ou "A"
+        self.emp_cod_tamanho = None  # valor de C8
+        self.emp_cod_aux = None  # "X", "N" ou "A"
+        self.emp_cod_aux_tamanho = None  # valor de C11
+
+        # Códigos das abas mestre (FILIAL, REPR, PAGTO, TRANSP, FAMILIAS,
+        # ESTILOS) para as referências das abas seguintes
+        self.chaves = IndiceChaves()
+
+        # Orçamento de erros (ver processar): linhas com erro por aba e no
+        # total; acima dele as linhas restantes não são avaliadas
+        self.limite_erros_aba = None
+        self.limite_erros_total = None
+        self.erros_total = 0
+
+    def _carregar_workbook(self):
+        """Carrega self.wb conforme o formato do arquivo e o modo de leitura."""
+        arquivo = self.arquivo
+        if obter_leitor(arquivo) is not None:
+            self.wb = carregar_workbook_compacto(arquivo, self.pool_valores)
+            print(f"✅ Workbook carregado pelo leitor de {os.path.splitext(arquivo)[1].lower()}")
+        elif self.modo_leitura == "streaming":
+            self.wb = carregar_workbook_compacto(
+                arquivo, self.pool_valores, sob_demanda=True,
+                processos=(os.cpu_count() or 1) if self.leitura_paralela else 0,
+            )
+            if self.wb.processos_leitura:
+                print(f"✅ Workbook aberto em modo streaming ({self.wb.processos_leitura} processos de leitura)")
             else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 999999):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodFamilia inválido")
-                else:
-                    cell.fill = COR_VALIDO
-                    if valor not in self.familia_cod_list:
-                        self.familia_cod_list.append(valor)
-            cell_fam = self.get_mandatory_cell(row, header, "Familia")
-            if cell_fam is None:
-                mensagens.append("Familia ausente")
+                print("✅ Workbook aberto em modo streaming (abas lidas sob demanda)")
+        else:
+            self._carregar_workbook_completo(arquivo)
+        self.paleta = PaletaEstilos(self.wb, condicional=self.modo_saida == "condicional")
+
+    def _carregar_workbook_completo(self, arquivo):
+        """Carrega o workbook inteiro (Worksheet do openpyxl) apenas com valores."""
+        try:
+            self.wb = load_workbook(arquivo, data_only=True)
+            print("✅ Workbook carregado com data_only=True - fórmulas convertidas automaticamente")
+        except Exception as e:
+            print(f"⚠️ Falha ao carregar com data_only=True: {e}")
+            # Fallback: usar workbook original e converter manualmente
+            self.wb = load_workbook(arquivo)
+            self.converter_formulas_para_valores()
+
+    def _carregar_cache_imagens(self):
+        """
+        Carrega cache de arquivos de imagem para validação extremamente rápida.
+        Uma única leitura do diretório para milhares de verificações O(1).
+        """
+        import os
+        caminho_imagens = r"C:\Users\Public\Documents\SRPP\Imagens_Produto"
+        
+        try:
+            if os.path.exists(caminho_imagens):
+                # Set é extremamente rápido para lookup - O(1)
+                arquivos = os.listdir(caminho_imagens)
+                self.cache_arquivos_imagem = set(arquivos)
+                print(f"✅ Cache de imagens carregado: {len(arquivos)} arquivos")
             else:
-                fam_val = self.get_valor_string(cell_fam)
-                if not fam_val or len(fam_val) > 45:
-                    cell_fam.fill = COR_ERRO
-                    mensagens.append("Familia excede 45 caracteres")
-                else:
-                    cell_fam.fill = COR_VALIDO
-            for campo in ["MultiploFamilia", "MinimoFamilia"]:
-                if campo in header:
-                    idx = header.get(campo)
-                    cell_val = row[idx]
-                    if cell_val.value:
+                self.cache_arquivos_imagem = set()
+                print("⚠️ Diretório de imagens não encontrado - validação PathFotografia desabilitada")
+        except Exception as e:
+            self.cache_arquivos_imagem = set()
+            print(f"⚠️ Erro ao carregar cache de imagens: {e}")
+
+    def _reportar_progresso(self, percentual, mensagem):
+        """Reporta progresso via callback se disponível."""
+        if self.progress_callback:
+            self.progress_callback(percentual, mensagem)
+
+    def limpar_espacos(self):
+        """
+        Remove espaços à esquerda e à direita dos dados das abas especificadas,
+        exceto nos cabeçalhos e na coluna "RESULTADO".
+        """
+        abas_processar = ['FILIAL', 'REPR', 'PAGTO', 'PAGTOFILIAL', 'TRANSP',
+                          'ESTADOS', 'CLIENTES', 'FAMILIAS', 'ESTILOS', 'PRODUTOS']
+        
+        for sheet_name in self.wb.sheetnames:
+            if sheet_name.upper() in abas_processar:
+                ws = self.wb[sheet_name]
+                # Lê os cabeçalhos da primeira linha
+                headers = {}
+                for col in range(1, ws.max_column + 1):
+                    header_value = ws.cell(row=1, column=col).value
+                    if header_value:
+                        headers[col] = str(header_value).strip().upper()
+                # Itera sobre as linhas a partir da segunda (ignorando o cabeçalho)
+                for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
+                    for cell in row:
+                        if isinstance(cell.value, str):
+                            header = headers.get(cell.column, "")
+                            if header != "RESULTADO":
+                                cell.value = cell.value.strip()   
+
+    def tentar_recalcular_formulas(self, sheet):
+        """
+        Tenta recalcular fórmulas da planilha. 
+        Retorna número de fórmulas não calculadas.
+        """
+        formulas_nao_calculadas = 0
+        try:
+            for row in sheet.iter_rows():
+                for cell in row:
+                    if cell.data_type == 'f':  # célula com fórmula
                         try:
-                            num = int(cell_val.value)
-                            if not (1 <= num <= 999999):
-                                cell_val.fill = COR_ERRO
-                                mensagens.append(f"{campo} fora do intervalo")
-                            else:
-                                cell_val.fill = COR_VALIDO
+                            # Força recálculo tentando acessar o valor
+                            _ = cell.value
+                            if not hasattr(cell, 'cached_value') or cell.cached_value is None:
+                                formulas_nao_calculadas += 1
                         except:
-                            cell_val.fill = COR_ERRO
-                            mensagens.append(f"{campo} inválido")
-            idx = header.get("DescontoFamilia")
-            if idx is not None:
-                cell_desc = row[idx]
-                if cell_desc.value:
-                    try:
-                        desc_str = self.get_valor_string(cell_desc)
-                        desc_val = float(desc_str.replace(",", "."))
-                        if not (0.00 <= desc_val <= 99.99):
-                            cell_desc.fill = COR_ERRO
-                            mensagens.append("DescontoFamilia fora do intervalo")
-                        else:
-                            cell_desc.fill = COR_VALIDO
-                            cell_desc.value = f"{desc_val:.2f}".replace(".", ",")
-                    except:
-                        cell_desc.fill = COR_ERRO
-                        mensagens.append("DescontoFamilia inválido")
-            resultado_fill = self.determinar_fill_resultado(mensagens)
+                            formulas_nao_calculadas += 1
+        except:
+            pass
+        return formulas_nao_calculadas
+
+    def converter_formulas_para_valores(self):
+        """
+        Converte todas as fórmulas em valores fixos nas abas especificadas.
+        Preserva EMPRESA, converte todas as outras.
+        """
+        abas_para_converter = ["FILIAL", "REPR", "PAGTO", "PAGTOFILIAL", "TRANSP", 
+                              "ESTADOS", "CLIENTES", "FAMILIAS", "ESTILOS", "PRODUTOS"]
+        
+        total_convertidas = 0
+        total_falharam = 0
+        
+        for sheet_name in self.wb.sheetnames:
+            if sheet_name.upper() in [aba.upper() for aba in abas_para_converter]:
+                sheet = self.wb[sheet_name]
+                convertidas, falharam = self._converter_formulas_aba(sheet, sheet_name)
+                total_convertidas += convertidas
+                total_falharam += falharam
+        
+        if total_convertidas > 0:
+            print(f"✅ {total_convertidas} fórmulas convertidas para valores")
+        if total_falharam > 0:
+            print(f"⚠️ {total_falharam} fórmulas não puderam ser convertidas")
+
+    def _converter_formulas_aba(self, sheet, sheet_name):
+        """Converte fórmulas de uma aba específica para valores"""
+        convertidas = 0
+        falharam = 0
+        
+        for row in sheet.iter_rows():
             for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
-            
+                if cell.data_type == 'f':  # É fórmula
+                    valor_original = cell.value
+                    try:
+                        # Método 1: usar cached_value se disponível
+                        if hasattr(cell, 'cached_value') and cell.cached_value is not None:
+                            # Se cached_value é float, formatar com 2 casas decimais para evitar erro de precisão
+                            if isinstance(cell.cached_value, float):
+                                cell.value = f"{cell.cached_value:.2f}"
+                            else:
+                                cell.value = cell.cached_value
+                            convertidas += 1
+                            continue
+                        
+                        # Método 2: usar _value se disponível
+                        if hasattr(cell, '_value') and cell._value is not None and not str(cell._value).startswith('='):
+                            cell.value = cell._value
+                            convertidas += 1
+                            continue
+                        
+                        # Método 3: tentar avaliar fórmula simples
+                        if valor_original and str(valor_original).startswith('='):
+                            resultado = tentar_avaliar_formula_simples(str(valor_original))
+                            if resultado is not None:
+                                cell.value = resultado
+                                convertidas += 1
+                                continue
+                        
+                        # Se chegou aqui, não conseguiu converter
+                        falharam += 1
+                        
+                    except Exception as e:
+                        # Em caso de erro, manter fórmula original
+                        falharam += 1
+        
+        return convertidas, falharam
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
-            )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
+    def estimar_tempo_validacao(self):
+        """
+        Estima o tempo total de execução das funções de validação.
+        Uma abordagem é medir individualmente algumas funções (ou usar um valor fixo se a medição não for viável).
+        """
+        # Exemplo: vamos simular a medição de duas funções de validação:
+        tempos = {}
+        
+        inicio = time.time()
+        # Suponha que validar_EMPRESA seja rápido
+        self.validar_EMPRESA()  # Essa função não deve ter efeitos colaterais
+        tempos['validar_EMPRESA'] = time.time() - inicio
 
+        # Simule outra etapa (você pode repetir para as demais funções)
+        inicio = time.time()
+        self.validar_FILIAL()
+        tempos['validar_FILIAL'] = time.time() - inicio
 
-        self.gerar_status_por_aba(
-            "FAMILIAS", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
+        # Some os tempos medidos – ou use um valor fixo se preferir
+        total_time = sum(tempos.values())
+        if total_time == 0:
+            total_time = 30  # valor padrão em segundos
+        self.tempo_estimado_validacao = total_time
+        return total_time
+    
+    
+
+    def iniciar_tempo_processamento(self):
+        """
+        Armazena o timestamp do início do processamento da validação.
+        """
+        self.tempo_inicio = time.time()
+        print(
+            f"Processamento iniciado em {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.tempo_inicio))}"
         )
-        self.aplicar_borda(sheet)
 
-    def validar_ESTILOS(self):
-        if "ESTILOS" not in self.wb.sheetnames:
-            return
-        sheet = self.wb["ESTILOS"]
-
-
-        # Define a lista dos cabeçalhos esperados para essa aba
-        expected = ["CodEstilo", "Estilo"]
-        # Chama o método para normalizar (corrigir) os cabeçalhos
-        header, corrections = self.corrigir_cabecalho(sheet, expected)
-
-        # Se houver correções, monta a mensagem informando apenas os cabeçalhos que foram alterados
-        header_warning = ""
-        if corrections:
-            correctos = []
-            for corr in corrections:
-                parts = corr.split(" para ")
-                if len(parts) == 2:
-                    correct_header = parts[1].strip().strip("'")
-                    correctos.append(correct_header)
-                else:
-                    correctos.append(corr)
-            header_warning = ("Advertencia: " + ", ".join(corrections) +
-                      " estavam com nome errado, o correto é " +
-                      ", ".join(correctos))
-        total_linhas = 0
-        linhas_validas = 0
-        linhas_erros = 0
-        linhas_advertencias = 0
+        funcoes_validacao = [
+            self.validar_EMPRESA,
+            self.pre_validar_filial,
+            self.validar_FILIAL,
+            self.validar_REPR,
+            self.validar_PAGTO,
+            self.validar_PAGTOFILIAL,
+            self.validar_TRANSP,
+            self.validar_ESTADOS,
+            self.validar_CLIENTES,
+            self.validar_FAMILIAS,
+            self.validar_ESTILOS,
+            self.validar_PRODUTOS,
+        ]
+
+        tempos_execucao = []
+
+        for func in funcoes_validacao:
+            inicio = time.time()
+            func()  # Executa a validação sem salvar resultados
+            fim = time.time()
+            tempos_execucao.append(fim - inicio)
+
+        # Calcula tempo total estimado
+        self.tempo_estimado_validacao = sum(tempos_execucao)
+
+        print(
+            f"Tempo estimado de validação: {self.tempo_estimado_validacao:.2f} segundos"
+        )
+
+    def limpar_planilha(self):
+        # 1. Remove a aba "RESULTADO DAS VALIDAÇÕES", se existir.
+        if "RESULTADO DAS VALIDAÇÕES" in self.wb.sheetnames:
+            del self.wb["RESULTADO DAS VALIDAÇÕES"]
+
+        # 2. Para cada aba do workbook (no modo streaming, quando a aba for lida):
+        if isinstance(self.wb, WorkbookCompacto):
+            self.wb.ao_carregar(self._limpar_colunas_auxiliares)
+        else:
+            for sheet in self.wb.worksheets:
+                self._limpar_colunas_auxiliares(sheet)
+
+    def _limpar_colunas_auxiliares(self, sheet):
+        """Remove de uma aba as colunas geradas por validações anteriores."""
+        # Obtenha o mapeamento de cabeçalhos (retorna um dicionário {nome: índice})
+        header = self.get_header_map(sheet)
+
+        # Encontra todas as colunas cujo cabeçalho seja "RESULTADO"
+        indices_resultado = [
+            idx for key, idx in header.items() if key.strip().upper() == "RESULTADO"
+        ]
+        # Exclua as colunas em ordem decrescente (para não alterar os índices das demais colunas)
+        for idx in sorted(indices_resultado, reverse=True):
+            sheet.delete_cols(
+                idx + 1
+            )  # openpyxl trabalha com índices 1-base para exclusão
+
+        # Remover coluna "duplicados" de todas as abas (PRODUTOS, CLIENTES, etc.)
+        header = self.get_header_map(
+            sheet
+        )  # Atualize o header, pois ele pode ter mudado
+        indices_duplicados = [
+            idx
+            for key, idx in header.items()
+            if key.strip().lower() == "duplicados"
+        ]
+        for idx in sorted(indices_duplicados, reverse=True):
+            sheet.delete_cols(idx + 1)
+
+        # Remover coluna "CodProdutoRepetido" se existir
+        header = self.get_header_map(sheet)
+        indices_codprodutorepetido = [
+            idx
+            for key, idx in header.items()
+            if key.strip().lower() == "codprodutorepetido"
+        ]
+        for idx in sorted(indices_codprodutorepetido, reverse=True):
+            sheet.delete_cols(idx + 1)
+
+        # Remover coluna "Status da Linha" (exceto em modo dev)
+        if not self.dev_mode:
+            header = self.get_header_map(sheet)
+            indices_status = [
+                idx
+                for key, idx in header.items()
+                if key.strip().lower() == "status da linha"
+            ]
+            for idx in sorted(indices_status, reverse=True):
+                sheet.delete_cols(idx + 1)
+
+        # Remover a coluna de códigos do modo "condicional" e as regras que a leem
+        header = self.get_header_map(sheet)
+        indices_codigos = [
+            idx
+            for key, idx in header.items()
+            if str(key).strip().upper() == StatusAba.CABECALHO
+        ]
+        for idx in sorted(indices_codigos, reverse=True):
+            sheet.delete_cols(idx + 1)
+        StatusAba.remover_regras(sheet)
+
+    def converter_tudo_para_texto(self):
+        for aba in self.wb.worksheets:
+            for row in aba.iter_rows():
+                for cell in row:
+                    if cell.value is not None:
+                        cell.value = str(cell.value)
+
+    def gerar_status_por_aba(
+        self,
+        nome_aba,
+        total_linhas,
+        linhas_validas,
+        linhas_advertencias=0,
+        linhas_erros=0,
+        linhas_nao_avaliadas=0,
+    ):
+        self.resultados_validacao[nome_aba] = {
+            "lidas": total_linhas,
+            "validas": linhas_validas,
+            "advertencias": linhas_advertencias,
+            "erros": linhas_erros,
+        }
+        if linhas_nao_avaliadas:
+            self.resultados_validacao[nome_aba]["nao_avaliadas"] = linhas_nao_avaliadas
+
+    def gerar_relatorio_final(self, wb=None):
+        """Aba de resumo da validação no início de `wb` (por padrão, a planilha validada)."""
+        wb = self.wb if wb is None else wb
+        ws = wb.create_sheet("RESULTADO DAS VALIDAÇÕES", 0)
+        headers = ["Planilha", "Mensagem"]
+        ws.append(headers)
+        larguras = self.larguras
+        larguras.descartar(ws.title)
+        larguras.registrar_linha(ws.title, headers)
+
+        # Estilos do cabeçalho: Fundo #00CCFF, Fonte Calibri 11 negrito
+        header_fill = PatternFill(
+            start_color="00CCFF", end_color="00CCFF", fill_type="solid"
+        )
+        header_font = Font(name="Calibri", size=11, bold=True)
+        for col in range(1, len(headers) + 1):
+            cell = ws.cell(row=1, column=col)
+            cell.fill = header_fill
+            cell.font = header_font
+
+        # Criar bordas para todas as células
+        thin_border = Border(
+            left=Side(style="thin"),
+            right=Side(style="thin"),
+            top=Side(style="thin"),
+            bottom=Side(style="thin"),
+        )
+
+        abas_relatorio = [
+            "EMPRESA",
+            "FILIAL",
+            "REPR",
+            "PAGTO",
+            "PAGTOFILIAL",
+            "TRANSP",
+            "ESTADOS",
+            "CLIENTES",
+            "FAMILIAS",
+            "ESTILOS",
+            "PRODUTOS",
+        ]
+
+        row_idx = 2
+        for aba_nome in abas_relatorio:
+            if aba_nome in self.resultados_validacao:
+                dados = self.resultados_validacao[aba_nome]
+                mensagem = (
+                    f"Linhas Lidas: {dados['lidas']} | Válidas: {dados['validas']} | "
+                    f"Advertências: {dados.get('advertencias', 0)} | Erros: {dados['erros']}"
+                )
+                if dados.get("nao_avaliadas"):
+                    mensagem += f" | Não avaliadas: {dados['nao_avaliadas']} (limite de erros atingido)"
+            else:
+                mensagem = "Aba não encontrada ou não preenchida"
+
+            # Criar link para a aba correspondente
+            link_formula = f'=HYPERLINK("#\'{aba_nome}\'!A1", "{aba_nome}")'
+            msg_formula = f'=HYPERLINK("#\'{aba_nome}\'!A1", "{mensagem}")'
+
+            # Adicionar linha ao relatório
+            ws.append(["", ""])  # Criar células vazias para preenchimento posterior
+
+            # Inserir link na coluna "Planilha"
+            ws.cell(row=row_idx, column=1, value=link_formula)
+            ws.cell(row=row_idx, column=2, value=msg_formula)
+            larguras.registrar_linha(ws.title, (link_formula, msg_formula))
+
+            # Determinar a cor de fundo da linha
+            if aba_nome in self.resultados_validacao:
+                erros = int(self.resultados_validacao[aba_nome].get("erros", 0))
+                advertencias = int(
+                    self.resultados_validacao[aba_nome].get("advertencias", 0)
+                )
+                if erros > 0:
+                    fill = COR_ERRO
+                elif advertencias > 0:
+                    fill = COR_ADVERTENCIA
+                else:
+                    fill = COR_VALIDO
+            else:
+                fill = PatternFill(
+                    start_color="FFFFFF", end_color="FFFFFF", fill_type="solid"
+                )
+
+            # Aplicar estilos para cada célula na linha
+            for cell in ws[row_idx]:
+                cell.fill = fill
+                cell.font = Font(name="Arial", size=10, bold=True)
+                cell.border = thin_border  # Adiciona bordas
+
+            # Ajustar altura da linha (exceto cabeçalho)
+            ws.row_dimensions[row_idx].height = 17
+            row_idx += 1
+
+        # Largura das colunas pelo maior texto gravado
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = (
+                larguras.maximo(ws.title, col) * 0.8
+            )  # Ajuste extra para espaçamento
+
+        # Ativar filtro automático
+        ws.auto_filter.ref = ws.dimensions
+
+    def gerar_planilha_erros(self):
+        """
+        Planilha resumida de processar(somente_erros=True): o resumo da
+        validação e, para cada aba com problemas, só as linhas com erro ou
+        advertência, com o número da linha na planilha de entrada, os valores
+        e o RESULTADO, nas cores da planilha completa.
+        """
+        wb = Workbook()
+        wb.remove(wb.active)
+        paleta = PaletaEstilos(wb)
+        sinalizadas = self.linhas_sinalizadas
+        larguras = LargurasColunas()
+        for aba, linhas in sinalizadas.linhas.items():
+            ws = wb.create_sheet(aba)
+            cabecalho = ["Linha"] + list(sinalizadas.cabecalhos.get(aba, ())) + ["RESULTADO"]
+            result_col = len(cabecalho)
+            ws.append(cabecalho)
+            for row_num, (linha, valores, mensagem, cor, gravidades) in enumerate(linhas, 2):
+                valores = list(valores[:result_col - 2])
+                valores += [None] * (result_col - 2 - len(valores))
+                ws.append([self.linha_original(aba, linha)] + valores + [mensagem])
+                for idx, gravidade in gravidades.items():
+                    paleta.aplicar(ws.cell(row=row_num, column=idx + 2), "fill", COR_SEVERIDADE[gravidade])
+                paleta.aplicar(ws.cell(row=row_num, column=result_col), "fill", cor)
+                larguras.registrar(aba, result_col, mensagem)
+            paleta.formatacao_final(ws, 1)
+            ws.column_dimensions[get_column_letter(result_col)].width = larguras.maximo(aba, result_col) * 1.2
+            ws.auto_filter.ref = ws.dimensions
+        self.gerar_relatorio_final(wb)
+        return wb
+
+    def obter_result_col(self, sheet):
+        for cell in sheet[1]:  # Percorre a primeira linha (cabeçalhos)
+            if cell.value and str(cell.value).strip() == "RESULTADO":
+                return cell.column
+        return sheet.max_column + 1
+
+
+    def get_header_map(self, sheet):
+        header = [cell.value for cell in sheet[1]]
+        return {name: idx for idx, name in enumerate(header) if name is not None}
+
+    def get_mandatory_cell(self, row, header, field):
+        idx = header.get(field)
+        if idx is None:
+            return None
+        return row[idx]
+
+    def escrever_resultado_linha(
+        self, sheet, row_num, result_message, result_col, fill=None
+    ):
+        cell = sheet.cell(row=row_num, column=result_col, value=result_message)
+        self.larguras.registrar(sheet.title, result_col, result_message)
+        if fill:
+            self.paleta.aplicar(cell, "fill", fill)
+        return cell
+
+    def determinar_fill_resultado(self, mensagens):
+        """Cor da maior severidade entre as mensagens (Mensagem) da linha."""
+        gravidade = Severidade.NOTA
+        for m in mensagens:
+            if m.severidade > gravidade:
+                gravidade = m.severidade
+        return COR_SEVERIDADE[gravidade]
+
+    def aplicar_filtro(self, sheet, ultima_linha=None):
+        """
+        Desprotege a aba e liga o filtro automático quando há linhas de dados
+        (com `ultima_linha`, as seguintes não foram avaliadas). As bordas só
+        são aplicadas na formatação final (aplicar_formatacao_final_aba).
+        """
+        if sheet.title.upper() in ["EMPRESA", "RESULTADO DAS VALIDAÇÕES"]:
+            return
+        sheet.protection.sheet = False
+        max_row = sheet.max_row if ultima_linha is None else min(sheet.max_row, ultima_linha)
+        if max_row <= 1:
+            return
+        sheet.auto_filter.ref = sheet.dimensions
+
+    def excluir_linhas_duplicadas_produtos(self, sheet, header):
+        ignore_cols = set()
+        for key, idx in header.items():
+            if key.lower() in ["duplicados", "resultado"]:
+                ignore_cols.add(idx)
+
+        # OTIMIZAÇÃO: Verificação rápida de linha vazia usando CodProduto
+        idx_codproduto = header.get("CodProduto")
+
+        seen = {}
+        rows_to_delete = []
+        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
+            # Verificação rápida de linha vazia
+            if idx_codproduto is not None:
+                first_val = row[idx_codproduto].value
+                if first_val is None or (isinstance(first_val, str) and not first_val.strip()):
+                    continue
+            elif row[0].value is None:
+                continue
+
+            # Criar tupla apenas com valores relevantes (otimizado)
+            row_tuple = tuple(
+                str(cell.value).strip() if cell.value is not None else ""
+                for idx, cell in enumerate(row)
+                if idx not in ignore_cols
+            )
+            if row_tuple in seen:
+                rows_to_delete.append(row[0].row)
+            else:
+                seen[row_tuple] = row[0].row
+
+        self._excluir_linhas(sheet, rows_to_delete)
+
+    def excluir_linhas_duplicadas_clientes(self, sheet, header):
+        """
+        Remove linhas completamente idênticas na aba CLIENTES.
+        Similar ao tratamento de PRODUTOS.
+        """
+        ignore_cols = set()
+        for key, idx in header.items():
+            if key.lower() in ["duplicados", "resultado"]:
+                ignore_cols.add(idx)
+
+        # Verificação rápida de linha vazia usando CodCliente
+        idx_codcliente = header.get("CodCliente")
+
+        seen = {}
+        rows_to_delete = []
+        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
+            # Verificação rápida de linha vazia
+            if idx_codcliente is not None:
+                first_val = row[idx_codcliente].value
+                if first_val is None or (isinstance(first_val, str) and not first_val.strip()):
+                    continue
+            elif row[0].value is None:
+                continue
+
+            # Criar tupla apenas com valores relevantes
+            row_tuple = tuple(
+                str(cell.value).strip() if cell.value is not None else ""
+                for idx, cell in enumerate(row)
+                if idx not in ignore_cols
+            )
+            if row_tuple in seen:
+                rows_to_delete.append(row[0].row)
+            else:
+                seen[row_tuple] = row[0].row
+
+        self._excluir_linhas(sheet, rows_to_delete)
+
+    @staticmethod
+    def corrigir_cabecalho(sheet, expected):
+        """
+        Corrige os cabeçalhos da planilha comparando com a lista 'expected'.
+        Se o valor na célula da primeira linha não for exatamente o esperado
+        (ignorando espaços e case), ele é atualizado.
+        Retorna: (mapping, corrections)
+          mapping: dicionário {nome_corrigido: índice} (base 0)
+          corrections: lista de strings com as correções efetuadas.
+        """
+        corrections = []
+        new_headers = []
+        for i in range(1, len(expected) + 1):
+            cell = sheet.cell(row=1, column=i)
+            current = cell.value if cell.value is not None else ""
+            # Se o valor atual não corresponder exatamente ao esperado, corrige-o.
+            if str(current).strip().lower() != expected[i - 1].lower():
+                corrections.append(f"'{current}' foi alterado para '{expected[i - 1]}'")
+                cell.value = expected[i - 1]
+                new_headers.append(expected[i - 1])
+            else:
+                new_headers.append(current)
+        mapping = {h: i for i, h in enumerate(new_headers)}
+        return mapping, corrections
+
+    def pre_validar_filial(self):
+        filial_sheet = self.wb["FILIAL"]
+        data_found = False
+        for row in filial_sheet.iter_rows(min_row=2):
+            if any(cell.value and str(cell.value).strip() != "" for cell in row):
+                data_found = True
+                break
+
+        if not data_found:
+            header = self.get_header_map(filial_sheet)
+            if "CodFilial" in header and "Filial" in header:
+                cod_index = header["CodFilial"]  # índice 0-based
+                filial_index = header["Filial"]
+
+                # Insere valores padrão para CodFilial e Filial
+                filial_sheet.cell(row=2, column=cod_index + 1, value="1")
+                filial_sheet.cell(
+                    row=2,
+                    column=filial_index + 1,
+                    value=self.emp_nome if self.emp_nome else "",
+                )
+
+            # Nova regra: se C2 estiver vazio, copia o valor de C39 da aba EMPRESA
+            # e se D2 estiver vazio, copia o valor de C40 da aba EMPRESA.
+            # C2 é coluna 3 e D2 é coluna 4.
+            empresa_sheet = self.wb["EMPRESA"]
+            valor_C39 = empresa_sheet.cell(row=39, column=3).value  # C39
+            valor_C40 = empresa_sheet.cell(row=40, column=3).value  # C40
+
+            cell_C2 = filial_sheet.cell(row=2, column=3)
+            if not (cell_C2.value and str(cell_C2.value).strip()):
+                cell_C2.value = valor_C39
+                cell_C2.fill = COR_ADVERTENCIA
+
+            cell_D2 = filial_sheet.cell(row=2, column=4)
+            if not (cell_D2.value and str(cell_D2.value).strip()):
+                cell_D2.value = valor_C40
+                cell_D2.fill = COR_ADVERTENCIA
+
+            # Cria a coluna "RESULTADO" se ainda não existir, e insere a mensagem de correção
+            result_col = filial_sheet.max_column + 1
+            if not filial_sheet.cell(row=1, column=result_col).value:
+                header_result = filial_sheet.cell(
+                    row=1, column=result_col, value="RESULTADO"
+                )
+                header_result.fill = PatternFill(
+                    start_color="000000", end_color="000000", fill_type="solid"
+                )
+                header_result.font = Font(color="FFFFFF", bold=True)
+
+            filial_sheet.cell(
+                row=2,
+                column=result_col,
+                value="Advertencias, CodFilial corrigido automaticamente",
+            ).fill = COR_ADVERTENCIA
+
+    # --- VALIDAÇÕES das demais abas (mantidas) ---
+    def validar_EMPRESA(self):
+        if "EMPRESA" not in self.wb.sheetnames:
+            return "Erro: A aba EMPRESA não foi encontrada!"
+        sheet = self.wb["EMPRESA"]
+        total_linhas = 1
+        linhas_validas = 1
+        linhas_erros = 0
+        msgs = []
+        celulas_erro = []  # célula de cada mensagem de msgs
+        cell = sheet["C5"]
+        if not cell.value:
+            cell.fill = COR_ERRO
+            msgs.append(Mensagem("EMPRESA_NOME_AUSENTE"))
+            celulas_erro.append(cell)
+            linhas_erros += 1
+        else:
+            cell.fill = COR_VALIDO
+            self.emp_nome = cell.value
+        cell = sheet["C7"]
+        if cell.value not in ["N=Numérico", "A=Alfanumérico"]:
+            cell.fill = COR_ERRO
+            msgs.append(Mensagem("EMPRESA_TIPO_CODIGO"))
+            celulas_erro.append(cell)
+            linhas_erros += 1
+        else:
+            cell.fill = COR_VALIDO
+            self.emp_cod_tipo = cell.value.split("=")[0]
+        cell = sheet["C8"]
+        try:
+            tamanho = int(cell.value)
+            if 4 <= tamanho <= 20:
+                cell.fill = COR_VALIDO
+                self.emp_cod_tamanho = tamanho
+            else:
+                cell.fill = COR_ERRO
+                msgs.append(Mensagem("EMPRESA_TAMANHO_FORA", "principal"))
+                celulas_erro.append(cell)
+                linhas_erros += 1
+        except:
+            cell.fill = COR_ERRO
+            msgs.append(Mensagem("EMPRESA_TAMANHO_NAO_NUMERICO", "principal"))
+            celulas_erro.append(cell)
+            linhas_erros += 1
+        cell = sheet["C10"]
+        if cell.value not in ["X=Não Usado", "N=Numérico", "A=Alfanumérico"]:
+            cell.fill = COR_ERRO
+            msgs.append(Mensagem("EMPRESA_TIPO_AUXILIAR"))
+            celulas_erro.append(cell)
+            linhas_erros += 1
+        else:
+            cell.fill = COR_VALIDO
+            self.emp_cod_aux = cell.value.split("=")[0]
+        
+        # Validar tamanho do código auxiliar (C11) - só se não for "X=Não Usado"
+        if self.emp_cod_aux != "X":
+            cell = sheet["C11"]
+            try:
+                tamanho_aux = int(cell.value)
+                if 4 <= tamanho_aux <= 20:
+                    cell.fill = COR_VALIDO
+                    self.emp_cod_aux_tamanho = tamanho_aux
+                else:
+                    cell.fill = COR_ERRO
+                    msgs.append(Mensagem("EMPRESA_TAMANHO_FORA", "auxiliar"))
+                    celulas_erro.append(cell)
+                    linhas_erros += 1
+            except:
+                cell.fill = COR_ERRO
+                msgs.append(Mensagem("EMPRESA_TAMANHO_NAO_NUMERICO", "auxiliar"))
+                celulas_erro.append(cell)
+                linhas_erros += 1
+        
         result_col = sheet.max_column + 1
         header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
         header_result.fill = PatternFill(
             start_color="000000", end_color="000000", fill_type="solid"
         )
         header_result.font = Font(color="FFFFFF", bold=True)
-        for row in sheet.iter_rows(min_row=2):
-            if all(cell.value is None or str(cell.value).strip() == "" for cell in row):
-                continue
-            total_linhas += 1
-            mensagens = []
-            # Se houver correções no cabeçalho, adiciona essa advertência para cada linha
-            if header_warning:
-                mensagens.append(header_warning)
-            cell = self.get_mandatory_cell(row, header, "CodEstilo")
-            if cell is None:
-                mensagens.append("CodEstilo ausente")
-            else:
-                valor = self.get_valor_string(cell)
-                if not valor or not valor.isdigit() or not (1 <= int(valor) <= 999999):
-                    cell.fill = COR_ERRO
-                    mensagens.append("CodEstilo inválido")
-                else:
-                    cell.fill = COR_VALIDO
-                    if valor not in self.estilo_cod_list:
-                        self.estilo_cod_list.append(valor)
-            cell_est = self.get_mandatory_cell(row, header, "Estilo")
-            if cell_est is None:
-                mensagens.append("Estilo ausente")
-            else:
-                est_val = self.get_valor_string(cell_est)
-                if not est_val or len(est_val) > 45:
-                    cell_est.fill = COR_ERRO
-                    mensagens.append("Estilo excede 45 caracteres")
-                else:
-                    cell_est.fill = COR_VALIDO
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            linhas_erros += 1 if resultado_fill == COR_ERRO else 0
-            linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
-            linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
+        self.escrever_resultado_linha(
+            sheet, 5, "; ".join(map(str, msgs)), result_col, self.determinar_fill_resultado(msgs)
+        )
+        if self.linhas_sinalizadas is not None:
+            self.linhas_sinalizadas.cabecalho("EMPRESA", ["Célula", "Valor"])
+            for cell, mensagem in zip(celulas_erro, msgs):
+                self.linhas_sinalizadas.registrar(
+                    "EMPRESA", cell.row, [cell.coordinate, cell.value], str(mensagem), COR_ERRO,
+                    {1: Severidade.ERRO},
+                )
+        self.gerar_status_por_aba("EMPRESA", total_linhas, linhas_validas, 0, linhas_erros)
+        return None
 
-            mensagem_resultado = "; ".join(mensagens)
-            if not mensagem_resultado.strip():
-                mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
+    def verificar_configuracao_empresa(self):
+        """
+        Falha rápida (falha_rapida=True): interrompe o processamento se a
+        configuração de códigos da EMPRESA, da qual dependem as validações de
+        tamanho/tipo de CodProduto e CodAuxiliarProduto, estiver inválida.
+        Evita ler e validar as demais abas (principalmente PRODUTOS) à toa.
+        """
+        if not self.falha_rapida:
+            return
+        problemas = []
+        if self.emp_cod_tipo is None:
+            problemas.append("C7 (tipo do código)")
+        if self.emp_cod_tamanho is None:
+            problemas.append("C8 (tamanho do código)")
+        if self.emp_cod_aux is None:
+            problemas.append("C10 (tipo do código auxiliar)")
+        elif self.emp_cod_aux != "X" and self.emp_cod_aux_tamanho is None:
+            problemas.append("C11 (tamanho do código auxiliar)")
+        if problemas:
+            if isinstance(self.wb, WorkbookCompacto):
+                self.wb.fechar_leitura()
+            raise ValueError(
+                "Validação interrompida: configuração inválida na aba EMPRESA - "
+                + ", ".join(problemas)
+                + ". Corrija esses campos e valide novamente."
             )
-            # Aplicar negrito caso seja "Validado com sucesso!"
-            if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
-        self.gerar_status_por_aba(
-            "ESTILOS", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
-        )
-        self.aplicar_borda(sheet)
+
+    def validar_FILIAL(self):
+        return self._validar_aba("FILIAL")
+
+    def validar_REPR(self):
+        return self._validar_aba("REPR")
+
+    def validar_PAGTO(self):
+        return self._validar_aba("PAGTO")
+
+    def validar_PAGTOFILIAL(self):
+        return self._validar_aba("PAGTOFILIAL")
+
+    def validar_TRANSP(self):
+        return self._validar_aba("TRANSP")
+
+    def validar_ESTADOS(self):
+        return self._validar_aba("ESTADOS")
+
+    def validar_CLIENTES(self):
+        return self._validar_aba("CLIENTES")
+
+    def validar_FAMILIAS(self):
+        return self._validar_aba("FAMILIAS")
+
+    def validar_ESTILOS(self):
+        return self._validar_aba("ESTILOS")
 
     def validar_PRODUTOS(self, progress_base=None, progress_range=None):
         """
         Valida a aba PRODUTOS.
-
+        
         Args:
             progress_base: Percentual base para reportar progresso (ex: 77)
             progress_range: Range de percentual disponível para esta validação (ex: 15 significa 77-92%)
         """
-        if "PRODUTOS" not in self.wb.sheetnames:
-            return "Erro", "A aba PRODUTOS não foi encontrada!"
-
-        sheet = self.wb["PRODUTOS"]
-        # Obtém o header atual da planilha, sem forçar uma ordem específica
-        header = self.get_header_map(sheet)
-        header_warning = ""
-
-        # Excluir linhas duplicadas (linhas idênticas)
-        self.excluir_linhas_duplicadas_produtos(sheet, header)
-
-        # Excluir linhas totalmente vazias
-        linhas_para_excluir = []
-        for row_num in range(sheet.max_row, 1, -1):  # De baixo para cima, ignorando cabeçalho
-            row_values = [sheet.cell(row=row_num, column=col).value for col in range(1, sheet.max_column + 1)]
-            if all(v is None or str(v).strip() == "" for v in row_values):
-                linhas_para_excluir.append(row_num)
-        for row_num in linhas_para_excluir:
-            sheet.delete_rows(row_num)
-
-        # PASSADA 1: Contagem de duplicados + limpeza de zeros (OTIMIZADO)
-        seen_codproduto = {}
-        seen_codaux = {}
-        idx_codproduto = header.get("CodProduto")
-        idx_codaux = header.get("CodAuxiliarProduto")
-        total_linhas_planilha = 0  # Contar linhas válidas reais
-
-        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-            # Verificação rápida de linha vazia
-            if idx_codproduto is not None:
-                first_val = row[idx_codproduto].value
-                if first_val is None or (isinstance(first_val, str) and first_val.strip() == ""):
-                    continue
+        return self._validar_aba("PRODUTOS", progress_base, progress_range)
 
-            total_linhas_planilha += 1  # Contar apenas linhas com dados
+    @staticmethod
+    def aviso_cabecalho(corrections):
+        """Advertência repetida em todas as linhas quando corrigir_cabecalho alterou algum cabeçalho."""
+        if not corrections:
+            return None
+        correctos = []
+        for corr in corrections:
+            parts = corr.split(" para ")
+            if len(parts) == 2:
+                correctos.append(parts[1].strip().strip("'"))
+            else:
+                correctos.append(corr)
+        return Mensagem("CABECALHO_CORRIGIDO", ", ".join(corrections), ", ".join(correctos))
+
+    def _excluir_linhas(self, sheet, linhas, a_partir_de=None):
+        """excluir_linhas() guardando as linhas removidas (ver linha_original)."""
+        if linhas:
+            # excluída - posição: a linha que sobrou com número r tinha, antes,
+            # r + (quantos destes valores são <= r)
+            deslocamentos = [r - i for i, r in enumerate(sorted(set(linhas)))]
+            self.linhas_excluidas.setdefault(sheet.title, []).append(deslocamentos)
+        excluir_linhas(sheet, linhas, a_partir_de)
+
+    def linha_original(self, aba, linha):
+        """Número que a `linha` atual da aba tinha na planilha de entrada."""
+        for deslocamentos in reversed(self.linhas_excluidas.get(aba, ())):
+            linha += bisect_right(deslocamentos, linha)
+        return linha
+
+    def excluir_linhas_vazias(self, sheet):
+        """Remove as linhas de dados totalmente vazias."""
+        largura = sheet.max_column
+        linhas, a_partir_de = linhas_vazias(sheet)
+        self._excluir_linhas(sheet, linhas, a_partir_de)
+        if sheet.max_row > 1 and sheet.max_column < largura:
+            # As colunas só formatadas das linhas excluídas continuam contando
+            # em max_column (a coluna RESULTADO vai depois delas)
+            sheet.cell(row=2, column=largura)
+
+    def _limite_erros_aba(self):
+        """
+        (linhas com erro aceitas na próxima aba, descrição do limite), ou
+        (None, None) sem orçamento de erros. Vale o menor entre o limite por
+        aba e o que sobrou do limite total.
+        """
+        limites = []
+        if self.limite_erros_aba is not None:
+            limites.append((self.limite_erros_aba, f"{self.limite_erros_aba} por aba"))
+        if self.limite_erros_total is not None:
+            limites.append((max(self.limite_erros_total - self.erros_total, 0),
+                            f"{self.limite_erros_total} no total"))
+        if not limites:
+            return None, None
+        return min(limites, key=lambda limite: limite[0])
+
+    def _validar_aba(self, nome_aba, progress_base=None, progress_range=None):
+        """
+        Valida uma aba tabular conforme REGRAS_ABAS[nome_aba]: corrige o
+        cabeçalho, compila as regras das colunas e roda todas num único laço
+        pelas linhas, gravando o RESULTADO de cada linha e o resumo da aba.
+        """
+        regras = REGRAS_ABAS[nome_aba]
+        if nome_aba not in self.wb.sheetnames:
+            return regras.retorno_ausente
 
-            # Limpar zeros em todas as células da linha
-            for cell in row:
-                if cell.value == 0 or (cell.value is not None and str(cell.value).strip() == "0"):
-                    cell.value = ""
-
-            # Contar duplicados
-            if idx_codproduto is not None and row[idx_codproduto].value:
-                cp_val = str(row[idx_codproduto].value).strip()
-                if cp_val:
-                    seen_codproduto[cp_val] = seen_codproduto.get(cp_val, 0) + 1
-
-            if idx_codaux is not None and row[idx_codaux].value:
-                aux_val = str(row[idx_codaux].value).strip()
-                if aux_val:
-                    seen_codaux[aux_val] = seen_codaux.get(aux_val, 0) + 1
-
-        # Verifica se há duplicatas
-        any_duplicates = any(v > 1 for v in seen_codproduto.values()) or any(v > 1 for v in seen_codaux.values())
-
-        # Adiciona coluna "Duplicados" se necessário
-        if any_duplicates and "Duplicados" not in header:
-            if "CodProduto" in header:
-                codproduto_col = header["CodProduto"] + 1
-                sheet.insert_cols(codproduto_col)
-                dup_header = sheet.cell(row=1, column=codproduto_col, value="Duplicados")
-                dup_header.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-                dup_header.font = Font(color="FFFFFF", bold=True)
-                header = self.get_header_map(sheet)
-
-        # Configurar coluna RESULTADO
-        result_col = len(header) + 1
-        header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
-        header_result.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-        header_result.font = Font(color="FFFFFF", bold=True)
+        sheet = self.wb[nome_aba]
 
-        # Ocultar colunas extras
-        for col in range(result_col + 1, sheet.max_column + 1):
-            sheet.column_dimensions[get_column_letter(col)].hidden = True
+        if regras.cabecalho is not None:
+            header, corrections = self.corrigir_cabecalho(sheet, regras.cabecalho)
+            header_warning = self.aviso_cabecalho(corrections)
+        else:
+            header = self.get_header_map(sheet)
+            header_warning = None
+
+        estado = {}
+        if regras.preparar is not None:
+            header, estado = regras.preparar(self, sheet, header)
+
+        # Coluna RESULTADO
+        if regras.coluna_resultado == "existente":
+            result_col = self.obter_result_col(sheet)
+            criar_cabecalho = not sheet.cell(row=1, column=result_col).value
+        elif regras.coluna_resultado == "apos_cabecalho":
+            result_col = len(header) + 1
+            criar_cabecalho = True
+        else:
+            result_col = sheet.max_column + 1
+            criar_cabecalho = True
+        paleta = self.paleta.para_aba(sheet)
+        if criar_cabecalho:
+            header_result = sheet.cell(row=1, column=result_col, value="RESULTADO")
+            paleta.aplicar(header_result, "fill", ESTILO_CABECALHO_FILL)
+            paleta.aplicar(header_result, "font", ESTILO_CABECALHO_FONT)
+        if regras.coluna_resultado == "apos_cabecalho":
+            # Ocultar colunas extras
+            for col in range(result_col + 1, sheet.max_column + 1):
+                sheet.column_dimensions[get_column_letter(col)].hidden = True
+
+        texto = self.pool_valores.texto
+        larguras = self.larguras
+        sinalizadas = self.linhas_sinalizadas
+        usar_chave = regras.coluna_chave is not None
+        idx_chave = header.get(regras.coluna_chave) if usar_chave else None
+        limite_erros, descricao_limite = self._limite_erros_aba()
+
+        verificacoes = None
+        # Com orçamento de erros a aba pode parar no meio: validar as colunas
+        # inteiras de antemão seria trabalho perdido
+        if (regras.vetorizar and limite_erros is None
+                and vetorizacao_disponivel(estado.get("total_linhas", 0))):
+            # Mesmo critério de linha ignorada do laço abaixo, sobre os valores
+            if idx_chave is not None:
+                def linha_vazia(valores):
+                    chave = valores[idx_chave]
+                    return chave is None or (isinstance(chave, str) and not chave.strip())
+            elif usar_chave:
+                def linha_vazia(valores):
+                    return all(v is None for v in valores[:3])
+            else:
+                def linha_vazia(valores):
+                    return all(v is None or texto(v) == "" for v in valores)
+            try:
+                verificacoes = self._compilar_vetorizado(regras.regras, header, sheet, estado, linha_vazia)
+                print(f"✅ {nome_aba}: regras numéricas vetorizadas (NumPy)")
+            except NaoVetorizavel:
+                verificacoes = None
+        if verificacoes is None:
+            verificacoes = []
+            for regra in regras.regras:
+                verificar = regra.compilar(header, self, sheet, estado)
+                if verificar is not None:
+                    verificacoes.append(verificar)
+        idx_duplicados = header.get("Duplicados") if regras.coluna_duplicados else None
+        advertencia_prevalece = regras.advertencia_prevalece
+        inicio_regras = 1 if header_warning else 0
 
         # Configuração de progresso
-        intervalo_progresso = max(100, total_linhas_planilha // 100) if total_linhas_planilha > 0 else 100
-        linha_atual = 0
+        total_previsto = estado.get("total_linhas", 0)
+        reportar = progress_base is not None and progress_range is not None and total_previsto > 0
+        intervalo_progresso = max(100, total_previsto // 100) if total_previsto > 0 else 100
         ultimo_progresso_reportado = -1
 
-        # PASSADA 2: Validação completa
         total_linhas = 0
         linhas_validas = 0
-        linhas_erros = 0
         linhas_advertencias = 0
-        seen_produto = {}
-
-        # Rastrear primeira ocorrência de duplicados (primeira = amarelo, demais = vermelho)
-        first_seen_codproduto = {}
-        first_seen_codaux = {}
-
-        # OTIMIZAÇÃO: Pré-calcular índices fora do loop (evita 79k lookups)
-        idx_codproduto = header.get("CodProduto")
-        idx_codaux = header.get("CodAuxiliarProduto")
-        idx_produto = header.get("Produto")
-        idx_codfilial = header.get("CodFilial")
-        idx_codfamilia = header.get("CodFamilia")
-        idx_codestilo = header.get("CodEstilo")
-        idx_duplicados = header.get("Duplicados")
-
-        # OTIMIZAÇÃO: Pré-calcular valores da empresa
-        emp_cod_tipo = self.emp_cod_tipo
-        emp_cod_tamanho = self.emp_cod_tamanho
-        emp_cod_aux = self.emp_cod_aux
-        emp_cod_aux_tamanho = self.emp_cod_aux_tamanho
-        filial_cod_list = self.filial_cod_list
-        filial_unica = len(filial_cod_list) == 1
-        filial_valor_unico = filial_cod_list[0] if filial_unica else None
-        familia_cod_set = set(self.familia_cod_list)  # Set para lookup O(1)
-        estilo_cod_set = set(self.estilo_cod_list)    # Set para lookup O(1)
-
-        # OTIMIZAÇÃO: Função inline para obter valor string
-        def get_val(cell):
-            if cell is None or cell.value is None:
-                return ""
-            v = cell.value
-            return v.strip() if isinstance(v, str) else str(v).strip()
+        linhas_erros = 0
+        linhas_nao_avaliadas = 0
+        nao_avaliada = None
+        registros = ()  # registro de chaves das linhas não avaliadas
+        ultima_avaliada = None
 
         for row in sheet.iter_rows(min_row=2):
-            # Verificação rápida de linha vazia
-            if idx_codproduto is not None:
-                first_val = row[idx_codproduto].value
-                if first_val is None or (isinstance(first_val, str) and not first_val.strip()):
-                    continue
-            elif all(c.value is None for c in row[:3]):
+            if usar_chave:
+                if idx_chave is not None:
+                    chave = row[idx_chave].value
+                    pular = chave is None or (isinstance(chave, str) and not chave.strip())
+                else:
+                    pular = all(c.value is None for c in row[:3])
+            else:
+                pular = all(cell.value is None or texto(cell.value) == "" for cell in row)
+            if pular:
+                # O que já estava na coluna RESULTADO fica e conta na largura
+                if result_col <= len(row):
+                    larguras.registrar(sheet.title, result_col, row[result_col - 1].value)
                 continue
 
-            # Reportar progresso granular
-            linha_atual += 1
-            if progress_base is not None and progress_range is not None and total_linhas_planilha > 0:
-                if linha_atual % intervalo_progresso == 0:
-                    progresso_linha = int((linha_atual / total_linhas_planilha) * 100)
-                    if progresso_linha != ultimo_progresso_reportado:
-                        ultimo_progresso_reportado = progresso_linha
-                        percentual_atual = progress_base + int((linha_atual / total_linhas_planilha) * progress_range)
-                        self._reportar_progresso(percentual_atual, f"Validando PRODUTOS... {progresso_linha}% ({linha_atual}/{total_linhas_planilha})")
-
             total_linhas += 1
-            mensagens = []
-            dup_valores = []
-
-            if header_warning:
-                mensagens.append(header_warning)
-
-            # Validar CodProduto (usando índice direto)
-            if idx_codproduto is None:
-                mensagens.append("CodProduto ausente")
-            else:
-                cell_cp = row[idx_codproduto]
-                cp_val = get_val(cell_cp)
-                if emp_cod_tipo == "N":
-                    if not cp_val.isdigit():
-                        cell_cp.fill = COR_ERRO
-                        mensagens.append(f"CodProduto '{cp_val}' é alfanumérico, mas a empresa está configurada para código numérico")
-                    elif len(cp_val) > emp_cod_tamanho:
-                        cell_cp.fill = COR_ERRO
-                        mensagens.append(f"CodProduto excede tamanho permitido ({len(cp_val)} > {emp_cod_tamanho})")
-                    else:
-                        cell_cp.fill = COR_VALIDO
-                elif emp_cod_tipo == "A":
-                    # Alfanumérico aceita letras e/ou números (não precisa ter ambos)
-                    if len(cp_val) > emp_cod_tamanho:
-                        cell_cp.fill = COR_ERRO
-                        mensagens.append(f"CodProduto excede tamanho permitido ({len(cp_val)} > {emp_cod_tamanho})")
-                    else:
-                        cell_cp.fill = COR_VALIDO
-                if cp_val and seen_codproduto.get(cp_val, 0) > 1:
-                    dup_valores.append(cp_val)
-                    if cp_val not in first_seen_codproduto:
-                        # Primeira ocorrência: advertência (amarelo)
-                        first_seen_codproduto[cp_val] = True
-                        mensagens.append("Advertencia, CodProduto duplicado")
-                    else:
-                        # Demais ocorrências: erro (vermelho)
-                        mensagens.append("CodProduto duplicado")
-
-            # Validar CodAuxiliarProduto (usando índice direto)
-            if idx_codaux is not None:
-                aux_cell = row[idx_codaux]
-                aux_val = get_val(aux_cell)
-                if aux_val:
-                    if emp_cod_aux == "X":
-                        aux_cell.fill = COR_ERRO
-                        mensagens.append("CodAuxiliarProduto não permitido (configurado como não usado)")
-                    elif emp_cod_aux == "N":
-                        if not aux_val.isdigit():
-                            aux_cell.fill = COR_ERRO
-                            mensagens.append(f"CodAuxiliarProduto '{aux_val}' é alfanumérico, mas a empresa está configurada para código numérico")
-                        elif emp_cod_aux_tamanho and len(aux_val) > emp_cod_aux_tamanho:
-                            aux_cell.fill = COR_ERRO
-                            mensagens.append(f"CodAuxiliarProduto excede tamanho permitido ({len(aux_val)} > {emp_cod_aux_tamanho})")
-                        else:
-                            aux_cell.fill = COR_VALIDO
-                    elif emp_cod_aux == "A":
-                        # Alfanumérico aceita letras e/ou números (não precisa ter ambos)
-                        if emp_cod_aux_tamanho and len(aux_val) > emp_cod_aux_tamanho:
-                            aux_cell.fill = COR_ERRO
-                            mensagens.append(f"CodAuxiliarProduto excede tamanho permitido ({len(aux_val)} > {emp_cod_aux_tamanho})")
-                        else:
-                            aux_cell.fill = COR_VALIDO
-                    if seen_codaux.get(aux_val, 0) > 1:
-                        dup_valores.append(aux_val)
-                        if aux_val not in first_seen_codaux:
-                            # Primeira ocorrência: advertência (amarelo)
-                            first_seen_codaux[aux_val] = True
-                            mensagens.append("Advertencia, CodAuxiliarProduto duplicado")
-                        else:
-                            # Demais ocorrências: erro (vermelho)
-                            mensagens.append("CodAuxiliarProduto duplicado")
-                else:
-                    aux_cell.fill = COR_VALIDO
+            if reportar and total_linhas % intervalo_progresso == 0:
+                progresso_linha = int((total_linhas / total_previsto) * 100)
+                if progresso_linha != ultimo_progresso_reportado:
+                    ultimo_progresso_reportado = progresso_linha
+                    percentual_atual = progress_base + int((total_linhas / total_previsto) * progress_range)
+                    self._reportar_progresso(
+                        percentual_atual,
+                        f"Validando {nome_aba}... {progresso_linha}% ({total_linhas}/{total_previsto})",
+                    )
 
-            # Validar Produto (usando índice direto)
-            if idx_produto is None:
-                mensagens.append("Produto ausente")
-            else:
-                cell_prod = row[idx_produto]
-                prod_val = get_val(cell_prod)
-                if not prod_val:
-                    cell_prod.fill = COR_ERRO
-                    mensagens.append("Produto vazio")
-                elif len(prod_val) > 45:
-                    cell_prod.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, 'Produto' excedeu o limite de caracteres")
-                else:
-                    cell_prod.fill = COR_VALIDO
-                seen_produto[prod_val] = seen_produto.get(prod_val, 0) + 1
+            if limite_erros is not None and linhas_erros >= limite_erros:
+                # Orçamento de erros esgotado: só marca a linha e registra os
+                # códigos dela (abas mestre) para as referências das abas seguintes
+                if nao_avaliada is None:
+                    nao_avaliada = str(Mensagem("NAO_AVALIADA", descricao_limite))
+                    ultima_avaliada = row[0].row - 1
+                    registros = [
+                        registrar for registrar in (
+                            regra.compilar_registro(header, self) for regra in regras.regras
+                        ) if registrar is not None
+                    ]
+                for registrar in registros:
+                    registrar(row)
+                linhas_nao_avaliadas += 1
+                self.escrever_resultado_linha(sheet, row[0].row, nao_avaliada, result_col)
+                continue
 
-            # Validar CodFilial (usando índice direto)
-            if idx_codfilial is None:
-                mensagens.append("CodFilial ausente")
-            else:
-                cell_cf = row[idx_codfilial]
-                cf_val = get_val(cell_cf)
-                if cf_val and len(cf_val) > 40:
-                    cell_cf.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, 'CodFilial' excedeu o limite de caracteres")
-                if not cf_val and filial_unica:
-                    cell_cf.value = filial_valor_unico
-                    cf_val = filial_valor_unico
-                    cell_cf.fill = COR_ADVERTENCIA
-                    mensagens.append("Advertencia, CodFilial corrigido automaticamente")
-                elif not cf_val:
-                    cell_cf.fill = COR_ERRO
-                    mensagens.append("CodFilial ausente e múltiplas opções disponíveis")
-                elif cf_val not in filial_cod_list:
-                    if filial_unica:
-                        cell_cf.value = filial_valor_unico
-                        cf_val = filial_valor_unico
-                        cell_cf.fill = COR_ADVERTENCIA
-                        mensagens.append("Advertencia, CodFilial corrigido automaticamente")
-                    else:
-                        cell_cf.fill = COR_ERRO
-                        mensagens.append("CodFilial inexistente")
-                else:
-                    cell_cf.fill = COR_VALIDO
-
-            # Validar CodFamilia (usando índice direto e Set)
-            if idx_codfamilia is not None:
-                cell_cfam = row[idx_codfamilia]
-                cfam_val = get_val(cell_cfam)
-                if cfam_val:
-                    if not cfam_val.isdigit():
-                        cell_cfam.fill = COR_ERRO
-                        mensagens.append("CodFamilia deve ser inteiro")
-                    elif cfam_val not in familia_cod_set:
-                        cell_cfam.fill = COR_ERRO
-                        mensagens.append("CodFamilia inexistente")
-                    else:
-                        cell_cfam.fill = COR_VALIDO
-                else:
-                    cell_cfam.fill = COR_VALIDO
-
-            # Validar CodEstilo (usando índice direto e Set)
-            if idx_codestilo is not None:
-                cell_ce = row[idx_codestilo]
-                ce_val = get_val(cell_ce)
-                if ce_val:
-                    if not ce_val.isdigit():
-                        cell_ce.fill = COR_ERRO
-                        mensagens.append("CodEstilo deve ser inteiro")
-                    elif ce_val not in estilo_cod_set:
-                        cell_ce.fill = COR_ERRO
-                        mensagens.append("CodEstilo inexistente")
-                    else:
-                        cell_ce.fill = COR_VALIDO
-                else:
-                    cell_ce.fill = COR_VALIDO
-            # Validar QtdeMultipla e QtdeMinima primeiro (regras simples)
-            for campo in ["QtdeMultipla", "QtdeMinima"]:
-                idx = header.get(campo)
-                if idx is not None:
-                    cell_q = row[idx]
-                    if cell_q.value:
-                        try:
-                            q_val = int(cell_q.value)
-                            if not (1 <= q_val <= 999999):
-                                cell_q.fill = COR_ERRO
-                                mensagens.append(f"{campo} fora do intervalo")
-                            else:
-                                cell_q.fill = COR_VALIDO
-                        except:
-                            cell_q.fill = COR_ERRO
-                            mensagens.append(f"{campo} inválido")
+            mensagens = [header_warning] if header_warning else []
+            ctx = {}
+            for verificar in verificacoes:
+                verificar(row, mensagens, ctx)
 
-            # Nova lógica para QtdeTabela1, QtdeTabela2, QtdeTabela3
-            qtde1_idx = header.get("QtdeTabela1")
-            qtde2_idx = header.get("QtdeTabela2")
-            qtde3_idx = header.get("QtdeTabela3")
-            
-            qtde1_val = None
-            qtde2_val = None
-            qtde3_val = None
-            qtde1_preenchida = False
-            qtde2_preenchida = False
-            qtde3_preenchida = False
-            
-            # Verificar quais QtdeTabela estão preenchidas
-            if qtde1_idx is not None:
-                cell_q1 = row[qtde1_idx]
-                if cell_q1.value:
-                    qtde1_preenchida = True
-                    try:
-                        qtde1_val = int(cell_q1.value)
-                        if not (1 <= qtde1_val <= 999999):
-                            cell_q1.fill = COR_ERRO
-                            mensagens.append("QtdeTabela1 fora do intervalo")
-                        else:
-                            cell_q1.fill = COR_VALIDO
-                    except:
-                        cell_q1.fill = COR_ERRO
-                        mensagens.append("QtdeTabela1 inválido")
-                        qtde1_val = None
-                        
-            if qtde2_idx is not None:
-                cell_q2 = row[qtde2_idx]
-                if cell_q2.value:
-                    qtde2_preenchida = True
-                    try:
-                        qtde2_val = int(cell_q2.value)
-                        if not (1 <= qtde2_val <= 999999):
-                            cell_q2.fill = COR_ERRO
-                            mensagens.append("QtdeTabela2 fora do intervalo")
-                        else:
-                            cell_q2.fill = COR_VALIDO
-                    except:
-                        cell_q2.fill = COR_ERRO
-                        mensagens.append("QtdeTabela2 inválido")
-                        qtde2_val = None
-                        
-            if qtde3_idx is not None:
-                cell_q3 = row[qtde3_idx]
-                if cell_q3.value:
-                    qtde3_preenchida = True
-                    try:
-                        qtde3_val = int(cell_q3.value)
-                        if not (1 <= qtde3_val <= 999999):
-                            cell_q3.fill = COR_ERRO
-                            mensagens.append("QtdeTabela3 fora do intervalo")
-                        else:
-                            cell_q3.fill = COR_VALIDO
-                    except:
-                        cell_q3.fill = COR_ERRO
-                        mensagens.append("QtdeTabela3 inválido")
-                        qtde3_val = None
-
-            # Validar padrão das QtdeTabela
-            if qtde1_preenchida and not qtde2_preenchida:
-                # QtdeTabela1 sozinha é inválido
-                if qtde1_idx is not None:
-                    row[qtde1_idx].fill = COR_ERRO
-                mensagens.append("QtdeTabela1 não pode estar sozinha - QtdeTabela2 é obrigatória")
-                
-            elif qtde3_preenchida and not qtde2_preenchida:
-                # QtdeTabela3 sem QtdeTabela2 é inválido
-                if qtde3_idx is not None:
-                    row[qtde3_idx].fill = COR_ERRO
-                mensagens.append("QtdeTabela3 requer QtdeTabela1 e QtdeTabela2 preenchidas")
-                
-            elif qtde2_preenchida and not qtde1_preenchida:
-                # QtdeTabela2 sem QtdeTabela1 é inválido
-                if qtde2_idx is not None:
-                    row[qtde2_idx].fill = COR_ERRO
-                mensagens.append("QtdeTabela2 requer QtdeTabela1 preenchida")
-                
-            # Validar hierarquia das quantidades (se válidas)
-            if qtde1_val and qtde2_val and qtde1_val >= qtde2_val:
-                if qtde1_idx is not None:
-                    row[qtde1_idx].fill = COR_ERRO
-                if qtde2_idx is not None:
-                    row[qtde2_idx].fill = COR_ERRO
-                mensagens.append("QtdeTabela1 deve ser menor que QtdeTabela2")
-                
-            if qtde2_val and qtde3_val and qtde2_val >= qtde3_val:
-                if qtde2_idx is not None:
-                    row[qtde2_idx].fill = COR_ERRO
-                if qtde3_idx is not None:
-                    row[qtde3_idx].fill = COR_ERRO
-                mensagens.append("QtdeTabela2 deve ser menor que QtdeTabela3")
-
-            # Validar PrecoTabela1 (sempre obrigatório)
-            cell_pt1 = self.get_mandatory_cell(row, header, "PrecoTabela1")
-            pt1_val = None
-            if cell_pt1 is None:
-                mensagens.append("PrecoTabela1 ausente")
+            if advertencia_prevalece and any(
+                m.severidade is Severidade.ADVERTENCIA for m in mensagens[inicio_regras:]
+            ):
+                resultado_fill = COR_ADVERTENCIA
             else:
-                try:
-                    # Verificar se é "-" ou valor inválido
-                    valor_raw = cell_pt1.value
-                    if valor_raw is None:
-                        raise ValueError("Valor vazio")
-
-                    # Tratar "-" como erro
-                    if isinstance(valor_raw, str) and valor_raw.strip() in ["-", ""]:
-                        cell_pt1.fill = COR_ERRO
-                        cell_pt1.value = ""
-                        mensagens.append("PrecoTabela1 inválido (valor '-' ou vazio)")
-                        pt1_val = None
-                    elif isinstance(valor_raw, (int, float)):
-                        pt1_val = float(valor_raw)
-                        # Verificar se é 0 ou negativo
-                        if pt1_val <= 0:
-                            cell_pt1.fill = COR_ERRO
-                            mensagens.append("PrecoTabela1 inválido (valor zero ou negativo)")
-                            pt1_val = None
-                        elif pt1_val > 999999.99:
-                            cell_pt1.fill = COR_ERRO
-                            mensagens.append("PrecoTabela1 fora do intervalo")
-                            pt1_val = None
-                        else:
-                            # Converter para formato com vírgula para manter consistência
-                            cell_pt1.value = f"{pt1_val:.2f}".replace(".", ",")
-                            cell_pt1.fill = COR_VALIDO
-                    else:
-                        # Tratar como string e converter formato
-                        valor_str = self.get_valor_string(cell_pt1)
-
-                        # Verificar se é "-" ou "0"
-                        if valor_str.strip() in ["-", "0", "0,00", "0.00", ""]:
-                            cell_pt1.fill = COR_ERRO
-                            cell_pt1.value = ""
-                            mensagens.append("PrecoTabela1 inválido (valor '-' ou zero)")
-                            pt1_val = None
-                        else:
-                            # Converter pontos para vírgulas inteligentemente
-                            converted_value, foi_alterado = convert_price_to_comma_format(valor_str)
-                            if foi_alterado:
-                                mensagens.append(f"Advertencia: PrecoTabela1 corrigido de '{valor_str}' para '{converted_value}'")
-
-                            cell_pt1.value = converted_value  # Atualiza a célula com formato correto
-                            pt1_val = float(converted_value.replace(",", "."))
-
-                            if not (0.01 <= pt1_val <= 999999.99):
-                                cell_pt1.fill = COR_ERRO
-                                mensagens.append("PrecoTabela1 fora do intervalo")
-                                pt1_val = None
-                            else:
-                                cell_pt1.fill = COR_VALIDO
-                except:
-                    cell_pt1.fill = COR_ERRO
-                    mensagens.append("PrecoTabela1 inválido")
-                    pt1_val = None
-
-            # Validar PrecoTabela2
-            idx_pt2 = header.get("PrecoTabela2")
-            pt2_val = None
-            if idx_pt2 is not None:
-                cell_pt2 = row[idx_pt2]
-                if cell_pt2.value is not None and str(cell_pt2.value).strip() != "":
-                    try:
-                        valor_raw = cell_pt2.value
-
-                        # Tratar "-" como erro
-                        if isinstance(valor_raw, str) and valor_raw.strip() in ["-"]:
-                            cell_pt2.fill = COR_ERRO
-                            cell_pt2.value = ""
-                            mensagens.append("PrecoTabela2 inválido (valor '-')")
-                            pt2_val = None
-                        elif isinstance(valor_raw, (int, float)):
-                            pt2_val = float(valor_raw)
-                            # Verificar se é 0 ou negativo
-                            if pt2_val <= 0:
-                                cell_pt2.fill = COR_ERRO
-                                mensagens.append("PrecoTabela2 inválido (valor zero ou negativo)")
-                                pt2_val = None
-                            elif pt2_val > 999999.99:
-                                cell_pt2.fill = COR_ERRO
-                                mensagens.append("PrecoTabela2 fora do intervalo")
-                                pt2_val = None
-                            else:
-                                # Converter para formato com vírgula para manter consistência
-                                cell_pt2.value = f"{pt2_val:.2f}".replace(".", ",")
-                                # Verificar hierarquia
-                                if (qtde1_preenchida and qtde2_preenchida) and pt1_val and pt2_val >= pt1_val:
-                                    cell_pt2.fill = COR_ERRO
-                                    mensagens.append("PrecoTabela2 deve ser menor que PrecoTabela1")
-                                else:
-                                    cell_pt2.fill = COR_VALIDO
-                        else:
-                            # Tratar como string e converter formato
-                            valor_str = self.get_valor_string(cell_pt2)
-
-                            # Verificar se é "-" ou "0"
-                            if valor_str.strip() in ["-", "0", "0,00", "0.00"]:
-                                cell_pt2.fill = COR_ERRO
-                                cell_pt2.value = ""
-                                mensagens.append("PrecoTabela2 inválido (valor '-' ou zero)")
-                                pt2_val = None
-                            else:
-                                # Converter pontos para vírgulas inteligentemente
-                                converted_value, foi_alterado = convert_price_to_comma_format(valor_str)
-                                if foi_alterado:
-                                    mensagens.append(f"Advertencia: PrecoTabela2 corrigido de '{valor_str}' para '{converted_value}'")
-
-                                cell_pt2.value = converted_value  # Atualiza a célula com formato correto
-                                pt2_val = float(converted_value.replace(",", "."))
-
-                                if not (0.01 <= pt2_val <= 999999.99):
-                                    cell_pt2.fill = COR_ERRO
-                                    mensagens.append("PrecoTabela2 fora do intervalo")
-                                    pt2_val = None
-                                else:
-                                    # Verificar hierarquia
-                                    if (qtde1_preenchida and qtde2_preenchida) and pt1_val and pt2_val >= pt1_val:
-                                        cell_pt2.fill = COR_ERRO
-                                        mensagens.append("PrecoTabela2 deve ser menor que PrecoTabela1")
-                                    else:
-                                        cell_pt2.fill = COR_VALIDO
-                    except:
-                        cell_pt2.fill = COR_ERRO
-                        mensagens.append("PrecoTabela2 inválido")
-                        pt2_val = None
-
-            # Validar PrecoTabela3
-            idx_pt3 = header.get("PrecoTabela3")
-            pt3_val = None
-            if idx_pt3 is not None:
-                cell_pt3 = row[idx_pt3]
-                if cell_pt3.value is not None and str(cell_pt3.value).strip() != "":
-                    try:
-                        valor_raw = cell_pt3.value
-
-                        # Tratar "-" como erro
-                        if isinstance(valor_raw, str) and valor_raw.strip() in ["-"]:
-                            cell_pt3.fill = COR_ERRO
-                            cell_pt3.value = ""
-                            mensagens.append("PrecoTabela3 inválido (valor '-')")
-                            pt3_val = None
-                        elif isinstance(valor_raw, (int, float)):
-                            pt3_val = float(valor_raw)
-                            # Verificar se é 0 ou negativo
-                            if pt3_val <= 0:
-                                cell_pt3.fill = COR_ERRO
-                                mensagens.append("PrecoTabela3 inválido (valor zero ou negativo)")
-                                pt3_val = None
-                            elif pt3_val > 999999.99:
-                                cell_pt3.fill = COR_ERRO
-                                mensagens.append("PrecoTabela3 fora do intervalo")
-                                pt3_val = None
-                            else:
-                                # Converter para formato com vírgula para manter consistência
-                                cell_pt3.value = f"{pt3_val:.2f}".replace(".", ",")
-                                # Verificar hierarquia
-                                if (qtde1_preenchida and qtde2_preenchida and qtde3_preenchida) and pt2_val and pt3_val >= pt2_val:
-                                    cell_pt3.fill = COR_ERRO
-                                    mensagens.append("PrecoTabela3 deve ser menor que PrecoTabela2")
-                                else:
-                                    cell_pt3.fill = COR_VALIDO
-                        else:
-                            # Tratar como string e converter formato
-                            valor_str = self.get_valor_string(cell_pt3)
-
-                            # Verificar se é "-" ou "0"
-                            if valor_str.strip() in ["-", "0", "0,00", "0.00"]:
-                                cell_pt3.fill = COR_ERRO
-                                cell_pt3.value = ""
-                                mensagens.append("PrecoTabela3 inválido (valor '-' ou zero)")
-                                pt3_val = None
-                            else:
-                                # Converter pontos para vírgulas inteligentemente
-                                converted_value, foi_alterado = convert_price_to_comma_format(valor_str)
-                                if foi_alterado:
-                                    mensagens.append(f"Advertencia: PrecoTabela3 corrigido de '{valor_str}' para '{converted_value}'")
-
-                                cell_pt3.value = converted_value  # Atualiza a célula com formato correto
-                                pt3_val = float(converted_value.replace(",", "."))
-
-                                if not (0.01 <= pt3_val <= 999999.99):
-                                    cell_pt3.fill = COR_ERRO
-                                    mensagens.append("PrecoTabela3 fora do intervalo")
-                                    pt3_val = None
-                                else:
-                                    # Verificar hierarquia
-                                    if (qtde1_preenchida and qtde2_preenchida and qtde3_preenchida) and pt2_val and pt3_val >= pt2_val:
-                                        cell_pt3.fill = COR_ERRO
-                                        mensagens.append("PrecoTabela3 deve ser menor que PrecoTabela2")
-                                    else:
-                                        cell_pt3.fill = COR_VALIDO
-                    except:
-                        cell_pt3.fill = COR_ERRO
-                        mensagens.append("PrecoTabela3 inválido")
-            idx = header.get("LimiteDescIndividual")
-            if idx is not None:
-                cell_lim = row[idx]
-                if cell_lim.value:
-                    try:
-                        lim_str = self.get_valor_string(cell_lim)
-                        lim_val = float(lim_str.replace(",", "."))
-                        if not (0.00 <= lim_val <= 99.99):
-                            cell_lim.fill = COR_ERRO
-                            mensagens.append("LimiteDescIndividual fora do intervalo")
-                        else:
-                            cell_lim.fill = COR_VALIDO
-                            cell_lim.value = f"{lim_val:.2f}".replace(".", ",")
-                    except:
-                        cell_lim.fill = COR_ERRO
-                        mensagens.append("LimiteDescIndividual inválido")
-            multiplo_grade = None
-            idx = header.get("MultiploGrade")
-            if idx is not None:
-                cell_mg = row[idx]
-                if cell_mg.value:
-                    try:
-                        multiplo_grade = int(cell_mg.value)
-                        if not (1 <= multiplo_grade <= 999999):
-                            cell_mg.fill = COR_ERRO
-                            mensagens.append("MultiploGrade fora do intervalo")
-                        else:
-                            cell_mg.fill = COR_VALIDO
-                    except:
-                        cell_mg.fill = COR_ERRO
-                        mensagens.append("MultiploGrade inválido")
-            if multiplo_grade is not None:
-                idx = header.get("DescontoGrade")
-                if idx is not None:
-                    cell_dg = row[idx]
-                    if cell_dg.value:
-                        try:
-                            dg_str = self.get_valor_string(cell_dg)
-                            dg_val = float(dg_str.replace(",", "."))
-                            if not (0.00 <= dg_val <= 99.99):
-                                cell_dg.fill = COR_ERRO
-                                mensagens.append("DescontoGrade fora do intervalo")
-                            else:
-                                cell_dg.fill = COR_VALIDO
-                                cell_dg.value = f"{dg_val:.2f}".replace(".", ",")
-                        except:
-                            cell_dg.fill = COR_ERRO
-                            mensagens.append("DescontoGrade inválido")
-            idx = header.get("PrecoPromocional")
-            if idx is not None:
-                cell_pp = row[idx]
-                if corrigir_campo(cell_pp, {"S", "s", "N", "n", ""}):
-                    cell_pp.fill = COR_ERRO
-                    mensagens.append("PrecoPromocional inválido")
-                else:
-                    cell_pp.fill = COR_VALIDO
-            idx = header.get("AliquotaIPI")
-            if idx is not None:
-                cell_ipi = row[idx]
-                if cell_ipi.value:
-                    try:
-                        # Converter para string primeiro, depois tratar
-                        ipi_str = self.get_valor_string(cell_ipi)
-                        ipi_val = float(ipi_str.replace(",", "."))
-                        if not (0.00 <= ipi_val <= 99.99):
-                            cell_ipi.fill = COR_ERRO
-                            mensagens.append("AliquotaIPI fora do intervalo")
-                        else:
-                            cell_ipi.fill = COR_VALIDO
-                            cell_ipi.value = f"{ipi_val:.2f}".replace(".", ",")
-                    except:
-                        cell_ipi.fill = COR_ERRO
-                        mensagens.append("AliquotaIPI inválido")
-            idx = header.get("TipoVendaSemEstoque")
-            if idx is not None:
-                cell_tv = row[idx]
-                if corrigir_campo(cell_tv, {"L", "l", "b", "B", "c", "C", ""}):
-                    cell_tv.fill = COR_ERRO
-                    mensagens.append("TipoVendaSemEstoque inválido")
-                else:
-                    cell_tv.fill = COR_VALIDO
-            idx = header.get("QtdeEstoqueAtual")
-            if idx is not None:
-                cell_qea = row[idx]
-                if cell_qea.value:
-                    try:
-                        qea_val = int(cell_qea.value)
-                        if not (1 <= qea_val <= 999999):
-                            cell_qea.fill = COR_ERRO
-                            mensagens.append("QtdeEstoqueAtual fora do intervalo")
-                        else:
-                            cell_qea.fill = COR_VALIDO
-                    except:
-                        cell_qea.fill = COR_ERRO
-                        mensagens.append("QtdeEstoqueAtual inválido")
-            idx = header.get("QtdeEstoqueFuturo")
-            if idx is not None:
-                cell_qef = row[idx]
-                if cell_qef.value:
-                    try:
-                        qef_val = int(cell_qef.value)
-                        if qef_val == 0:
-                            cell_qef.value = ""
-                            cell_qef.fill = COR_VALIDO
-                        elif not (1 <= qef_val <= 999999):
-                            cell_qef.fill = COR_ERRO
-                            mensagens.append("QtdeEstoqueFuturo fora do intervalo")
-                        else:
-                            cell_qef.fill = COR_VALIDO
-                    except:
-                        cell_qef.fill = COR_ERRO
-                        mensagens.append("QtdeEstoqueFuturo inválido")
-            idx = header.get("DtEstoqueFuturo")
-            if idx is not None:
-                cell_data = row[idx]
-                if cell_data.value:
-                    try:
-                        dt = None
-                        for fmt in ("%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-                            try:
-                                dt = datetime.strptime(self.get_valor_string(cell_data), fmt)
-                                break
-                            except:
-                                continue
-                        if dt:
-                            cell_data.value = dt
-                            cell_data.number_format = "DD/MM/YYYY"
-                            cell_data.fill = COR_VALIDO
-                        else:
-                            cell_data.fill = COR_ERRO
-                            mensagens.append("DtEstoqueFuturo com formato inválido")
-                    except:
-                        cell_data.fill = COR_ERRO
-                        mensagens.append("DtEstoqueFuturo inválida")
-                    idx_qef = header.get("QtdeEstoqueFuturo")
-                    if idx_qef is not None:
-                        cell_qef = row[idx_qef]
-                        if not cell_qef.value or str(cell_qef.value).strip() == "":
-                            mensagens.append(
-                                "Advertência(s): QtdeEstoqueFuturo não contém saldo suficiente para a DtEstoqueFuturo"
-                            )
-            idx = header.get("PathFotografia")
-            if idx is not None:
-                cell_pf = row[idx]
-                if cell_pf.value:
-                    path_foto = self.get_valor_string(cell_pf)
-                    
-                    # Validação de tamanho (existente)
-                    if len(path_foto) > 60:
-                        cell_pf.fill = COR_ADVERTENCIA
-                        mensagens.append("Advertencia, 'PathFotografia' excedeu o limite de caracteres")
-                    
-                    # Validação EXTREMAMENTE RÁPIDA de existência de arquivo
-                    elif self.cache_arquivos_imagem is not None and path_foto not in self.cache_arquivos_imagem:
-                        cell_pf.fill = COR_ADVERTENCIA
-                        mensagens.append(f"Advertencia: '{path_foto}' não existe na pasta C:\\Users\\Public\\Documents\\SRPP\\Imagens_Produto")
-                    
-                    else:
-                        cell_pf.fill = COR_VALIDO
-                else:
-                    cell_pf.fill = COR_VALIDO
-            idx = header.get("QtdeEtiquetas")
-            if idx is not None:
-                cell_qe = row[idx]
-                if cell_qe.value:
-                    try:
-                        qe_val = int(cell_qe.value)
-                        if not (1 <= qe_val <= 999):
-                            cell_qe.fill = COR_ERRO
-                            mensagens.append("QtdeEtiquetas fora do intervalo")
-                        else:
-                            cell_qe.fill = COR_VALIDO
-                    except:
-                        cell_qe.fill = COR_ERRO
-                        mensagens.append("QtdeEtiquetas inválido")
-            resultado_fill = self.determinar_fill_resultado(mensagens)
-            for cell in row:
-                cell.fill = resultado_fill
-            dup_col = header.get("Duplicados")
-            if dup_col is not None:
-                dup_cell = row[dup_col]
-                if dup_valores:
-                    dup_cell.value = ";".join(dup_valores)
-                    dup_cell.fill = COR_DUPLICADO
+                resultado_fill = self.determinar_fill_resultado(mensagens)
+            # A cor da linha fica na célula RESULTADO (escrever_resultado_linha)
+            gravidades = None
+            for m in mensagens:
+                if m.severidade is not Severidade.NOTA:
+                    idx = header.get(m.campo)
+                    if idx is not None and idx < len(row):
+                        if gravidades is None:
+                            gravidades = {}
+                        if m.severidade > gravidades.get(idx, Severidade.NOTA):
+                            gravidades[idx] = m.severidade
+            if gravidades:
+                for idx, gravidade in gravidades.items():
+                    paleta.aplicar(row[idx], "fill", COR_SEVERIDADE[gravidade])
+
+            if idx_duplicados is not None:
+                dup_cell = row[idx_duplicados]
+                duplicados = ctx.get("duplicados")
+                if duplicados:
+                    dup_cell.value = ";".join(duplicados)
+                    paleta.aplicar(dup_cell, "fill", COR_DUPLICADO)
                 else:
                     dup_cell.value = ""
+
             linhas_erros += 1 if resultado_fill == COR_ERRO else 0
             linhas_validas += 1 if resultado_fill == COR_VALIDO else 0
             linhas_advertencias += 1 if resultado_fill == COR_ADVERTENCIA else 0
 
-
-            mensagem_resultado = "; ".join(mensagens)
+            mensagem_resultado = "; ".join(map(str, mensagens))
             if not mensagem_resultado.strip():
                 mensagem_resultado = "Validado com sucesso!"
-            self.escrever_resultado_linha(
-                sheet, row[0].row, mensagem_resultado, result_col, resultado_fill
+            cell_result = self.escrever_resultado_linha(
+                sheet, row[0].row, mensagem_resultado, result_col
             )
+            paleta.aplicar(cell_result, "fill", resultado_fill)
             # Aplicar negrito caso seja "Validado com sucesso!"
             if mensagem_resultado == "Validado com sucesso!":
-                cell = sheet.cell(row=row[0].row, column=result_col)
-                cell.font = Font(bold=True)
-                
-        duplicados_vazios = True
-        if "Duplicados" in header:
-            for row in sheet.iter_rows(
-                min_row=2,
-                min_col=header.get("Duplicados") + 1,
-                max_col=header.get("Duplicados") + 1,
-            ):
-                for cell in row:
-                    if cell.value and str(cell.value).strip() != "":
-                        duplicados_vazios = False
-                        break
-            if duplicados_vazios:
-                sheet.delete_cols(header.get("Duplicados") + 1)
+                paleta.aplicar(cell_result, "font", FONTE_NEGRITO)
+            if sinalizadas is not None and resultado_fill != COR_VALIDO:
+                sinalizadas.registrar(
+                    sheet.title, row[0].row, [c.value for c in row[:result_col - 1]],
+                    mensagem_resultado, resultado_fill, gravidades,
+                )
+
+        # Aba sem nenhuma linha de dados
+        if total_linhas == 0 and regras.mensagem_sem_linhas:
+            cell_result = self.escrever_resultado_linha(sheet, 2, regras.mensagem_sem_linhas, result_col)
+            paleta.aplicar(cell_result, "fill", COR_ERRO)
+            linhas_erros += 1
+            if sinalizadas is not None:
+                sinalizadas.registrar(sheet.title, 2, [], regras.mensagem_sem_linhas, COR_ERRO)
+
+        if sinalizadas is not None:
+            cabecalho = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            sinalizadas.cabecalho(sheet.title, cabecalho[:result_col - 1])
+
+        if regras.finalizar is not None:
+            result_col -= regras.finalizar(self, sheet, header)
+
+        self.erros_total += linhas_erros
         self.gerar_status_por_aba(
-            "PRODUTOS", total_linhas, linhas_validas, linhas_advertencias, linhas_erros
+            nome_aba, total_linhas, linhas_validas, linhas_advertencias, linhas_erros,
+            linhas_nao_avaliadas,
         )
-        self.aplicar_borda(sheet)
-        max_length = 0
-        for row in sheet.iter_rows(min_row=2, min_col=result_col, max_col=result_col):
-            for cell in row:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-        sheet.column_dimensions[get_column_letter(result_col)].width = max_length * 1.2
+        if linhas_nao_avaliadas:
+            print(f"⚠️ {nome_aba}: {linhas_nao_avaliadas} linhas não avaliadas (limite de erros atingido)")
+
+        if regras.coluna_resultado == "existente":
+            # Reaplica a cor preta no cabeçalho da coluna "RESULTADO" para evitar perda da formatação
+            header_result = sheet.cell(row=1, column=result_col)
+            paleta.aplicar(header_result, "fill", ESTILO_CABECALHO_FILL)
+            paleta.aplicar(header_result, "font", ESTILO_CABECALHO_FONT)
+
+        self.aplicar_filtro(sheet, ultima_avaliada)
+
+        if regras.ajustar_largura:
+            largura = larguras.maximo(sheet.title, result_col)
+            sheet.column_dimensions[get_column_letter(result_col)].width = largura * 1.2
+
+        if isinstance(paleta, StatusAba):
+            paleta.gravar(sheet)
         return None
 
+    def _compilar_vetorizado(self, regras, header, sheet, estado, linha_vazia):
+        """
+        Como a compilação normal, mas cada sequência de regras com `vetorizavel`
+        vira uma única função que só aplica, linha a linha, os efeitos já
+        calculados sobre as colunas inteiras.
+        """
+        campos = []
+        for regra in regras:
+            if regra.vetorizavel:
+                campos.extend(c for c in (regra.campo, *regra.dependencias) if c is not None)
+        colunas = ColunasVetorizadas.ler(sheet, header, campos, linha_vazia)
+
+        verificacoes = []
+        bloco = []
+        for regra in regras:
+            if regra.vetorizavel:
+                efeitos = regra.vetorizar(header, self, colunas)
+                if efeitos is not None:
+                    bloco.append(efeitos)
+                continue
+            if bloco:
+                verificacoes.append(colunas.aplicar(bloco))
+                bloco = []
+            verificar = regra.compilar(header, self, sheet, estado)
+            if verificar is not None:
+                verificacoes.append(verificar)
+        if bloco:
+            verificacoes.append(colunas.aplicar(bloco))
+        return verificacoes
 
     def obter_nome_empresa(self):
         """Obtém o nome da empresa da célula C5 da aba EMPRESA. Se não existir, retorna 'erro'."""
@@ -3108,7 +4178,37 @@ class PlanilhaValidator:
 
 
 
-    def gerar_planilha_etiquetas(self):
+    def gerar_planilha_etiquetas(self, destino=None):
+        """
+        Como _gerar_planilha_etiquetas, passando pelo cache de resultados: num
+        acerto a planilha guardada é copiada; senão, a gerada é guardada na
+        entrada criada por processar(). Se a entrada veio de uma execução que
+        não gerou etiquetas, a planilha é validada de novo uma vez para gerá-las.
+        """
+        if self.acerto_cache:
+            if "etiquetas" in self._registro_cache:
+                sufixo = self._registro_cache["etiquetas"]
+                if sufixo is None:
+                    return None
+                nome_arquivo = f"{datetime.now().strftime('%Y.%m.%d %H-%M')}_{sufixo}"
+                etiquetas = self.cache.arquivo(self._chave_cache, "etiquetas.xlsx")
+                return self._salvar_saida(etiquetas, destino, nome_arquivo), nome_arquivo
+            resultado = self._validar_de_novo()._gerar_planilha_etiquetas(destino)
+        else:
+            if self.wb is None:
+                self._carregar_workbook()
+            resultado = self._gerar_planilha_etiquetas(destino)
+        if self._registro_cache is not None:
+            self._registro_cache["etiquetas"] = resultado[1].split("_", 1)[1] if resultado else None
+            self.cache.gravar(
+                self._chave_cache,
+                "etiquetas.xlsx" if resultado else None,
+                resultado[0] if resultado else None,
+                self._registro_cache,
+            )
+        return resultado
+
+    def _gerar_planilha_etiquetas(self, destino=None):
         """
         Gera a planilha de etiquetas a partir da aba 'PRODUTOS', mas somente se houver
         pelo menos uma linha com QtdeEtiquetas > 0.
@@ -3120,7 +4220,9 @@ class PlanilhaValidator:
         dividindo o texto sem cortar palavras (máximo 23 caracteres por linha).
         Todas as células são formatadas como texto, com fonte Arial 10; o cabeçalho é negrito,
         centralizado e com fundo amarelo (#FFFF00); os dados são alinhados à esquerda.
-        Retorna o caminho do arquivo gerado ou None se não houver etiquetas.
+        destino: como em processar (caminho, pasta ou objeto de arquivo); sem
+        destino o arquivo é gerado em memória.
+        Retorna (dados ou destino, nome do arquivo) ou None se não houver etiquetas.
         """
         try:
             from openpyxl import Workbook
@@ -3200,6 +4302,9 @@ class PlanilhaValidator:
 
             # Adiciona o cabeçalho fixo
             sheet_etiquetas.append(final_header)
+            larguras = self.larguras
+            larguras.descartar(sheet_etiquetas.title)
+            larguras.registrar_linha(sheet_etiquetas.title, final_header)
 
             # Processa cada linha filtrada e monta a nova linha com as colunas adequadas
             for row in linhas_etiquetas:
@@ -3222,6 +4327,7 @@ class PlanilhaValidator:
                         else:
                             nova_linha.append("")
                 sheet_etiquetas.append(nova_linha)
+                larguras.registrar_linha(sheet_etiquetas.title, nova_linha)
 
             # Formatação: Cabeçalho: Arial 10, negrito, centralizado, fundo amarelo (#FFFF00);
             # dados: Arial 10, alinhados à esquerda
@@ -3247,32 +4353,23 @@ class PlanilhaValidator:
                     cell.alignment = align_data
                     cell.number_format = "@"  # forçar como texto
 
-            # Ajustar a largura de cada coluna com base no maior conteúdo
-            for col in sheet_etiquetas.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    if cell.value is not None:
-                        try:
-                            length = len(str(cell.value))
-                            if length > max_length:
-                                max_length = length
-                        except Exception:
-                            pass
-                sheet_etiquetas.column_dimensions[column].width = max_length + 2
+            # Largura de cada coluna pelo maior conteúdo gravado
+            for col in range(1, len(final_header) + 1):
+                column = get_column_letter(col)
+                sheet_etiquetas.column_dimensions[column].width = (
+                    larguras.maximo(sheet_etiquetas.title, col) + 2
+                )
 
             # Define o nome do arquivo de etiquetas usando self.emp_nome e timestamp
             nome_base = self.emp_nome if self.emp_nome and self.emp_nome.strip() else "erro"
             timestamp = datetime.now().strftime("%Y.%m.%d %H-%M")  # novo formato: Ano.Mês.Dia Hora-Minuto
             nome_arquivo = f"{timestamp}_{nome_base}_ETIQUETAS.xls"
             
-            # Salva o workbook em um buffer de memória em vez de um arquivo físico
-            from io import BytesIO
-            etiquetas_data = BytesIO()
-            wb_etiquetas.save(etiquetas_data)
-            etiquetas_data.seek(0)  # Retorna o ponteiro para o início do buffer
-            
-            # Retorna o objeto BytesIO e o nome do arquivo
+            # Grava direto no disco (pasta, caminho ou objeto de arquivo) ou,
+            # sem destino, num buffer de memória
+            etiquetas_data = self._salvar_saida(wb_etiquetas, destino, nome_arquivo)
+
+            # Retorna os dados (ou o destino gravado) e o nome do arquivo
             return etiquetas_data, nome_arquivo
 
 
@@ -3329,39 +4426,32 @@ class PlanilhaValidator:
 
         return True
 
-    def inserir_colinha_cabecalhos(self, sheet, nome_aba):
+    def colinha_cabecalhos(self, sheet, nome_aba):
         """
-        Insere uma linha de referência (colinha) na linha 1 com os cabeçalhos corretos
-        se algum cabeçalho estiver faltando ou errado.
-        Move todos os dados uma linha para baixo.
+        Cabeçalhos da linha de referência (colinha) a inserir na linha 1 se
+        algum cabeçalho estiver faltando ou errado; lista vazia se não for
+        preciso. A inserção (os dados descem uma linha) é feita na passada da
+        formatação final (PaletaEstilos.formatacao_final).
         """
         if nome_aba.upper() not in CABECALHOS_ESPERADOS:
-            return False  # Aba não mapeada, não faz nada
+            return []  # Aba não mapeada, não faz nada
 
         if self.verificar_cabecalhos_aba(sheet, nome_aba):
-            return False  # Cabeçalhos OK, não precisa inserir colinha
-
-        esperados = CABECALHOS_ESPERADOS[nome_aba.upper()]
-
-        # Inserir nova linha no topo
-        sheet.insert_rows(1)
+            return []  # Cabeçalhos OK, não precisa inserir colinha
 
-        # Preencher a nova linha 1 com os cabeçalhos esperados (colinha)
-        for col_idx, cabecalho in enumerate(esperados, start=1):
-            cell = sheet.cell(row=1, column=col_idx)
-            cell.value = cabecalho
-            # Aplicar estilo diferenciado para a colinha (fundo cinza claro, itálico)
-            cell.fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-            cell.font = Font(italic=True, color="333333")
+        return CABECALHOS_ESPERADOS[nome_aba.upper()]
 
-        return True
-
-    def aplicar_formatacao_final_aba(self, sheet, nome_aba):
+    def aplicar_formatacao_final_aba(self, sheet, nome_aba, colinha=None):
         """
         Aplica formatação final em uma aba:
-        1. Cabeçalho com fundo preto e letra branca
-        2. Desocultar todas as colunas
-        3. Aplicar bordas em todas as células com dados
+        1. Desocultar todas as colunas
+        2. Inserir a colinha de cabeçalhos, se houver
+        3. Cabeçalho com fundo preto e letra branca
+        4. Aplicar bordas em todas as células com dados
+        A colinha, o cabeçalho e as bordas saem numa única passada pelas
+        células (PaletaEstilos.formatacao_final). `colinha`: os cabeçalhos de
+        colinha_cabecalhos (None: não inserir, e verificar pela fonte em
+        itálico de A1 se a aba já tem uma).
         """
         if nome_aba.upper() in ["EMPRESA", "RESULTADO DAS VALIDAÇÕES"]:
             return  # Não formatar essas abas
@@ -3370,38 +4460,23 @@ class PlanilhaValidator:
         for col_letter in sheet.column_dimensions:
             sheet.column_dimensions[col_letter].hidden = False
 
-        # 2. Formatar cabeçalho (primeira linha com dados)
-        # Identificar qual é a linha do cabeçalho real (pode ser 1 ou 2 se tiver colinha)
-        linha_cabecalho = 1
-
-        # Verificar se a primeira célula parece ser uma colinha (itálico)
-        primeira_celula = sheet.cell(row=1, column=1)
-        if primeira_celula.font and primeira_celula.font.italic:
-            linha_cabecalho = 2  # Colinha existe, cabeçalho real é na linha 2
-
-        # Aplicar estilo no cabeçalho
-        for cell in sheet[linha_cabecalho]:
-            if cell.value is not None:
-                cell.fill = ESTILO_CABECALHO_FILL
-                cell.font = ESTILO_CABECALHO_FONT
-
-        # 3. Aplicar bordas em todas as células com dados
-        max_row = sheet.max_row
-        max_col = sheet.max_column
-
-        if max_row > 0 and max_col > 0:
-            for row in sheet.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col):
-                for cell in row:
-                    if cell.value is not None:
-                        cell.border = BORDA
+        # 2 a 4. Cabeçalho real na linha 2 quando há colinha
+        if colinha is None:
+            primeira_celula = sheet.cell(row=1, column=1)
+            tem_colinha = bool(primeira_celula.font and primeira_celula.font.italic)
+            colinha = ()
+        else:
+            tem_colinha = bool(colinha)
+        self.paleta.formatacao_final(sheet, 2 if tem_colinha else 1, colinha)
 
     def finalizar_todas_abas(self):
         """
         Aplica formatação final em todas as abas (exceto EMPRESA).
-        Esta função deve ser chamada como ÚLTIMO processo da validação.
+        Esta função deve ser chamada como ÚLTIMO processo da validação: as
+        bordas só são aplicadas aqui, uma vez, já com o layout final da aba.
 
-        1. Insere 'colinha' de cabeçalhos se necessário
-        2. Aplica formatação final (cabeçalho preto/branco, desocultar colunas, bordas)
+        1. Verifica se a aba precisa da 'colinha' de cabeçalhos
+        2. Aplica formatação final (colinha, cabeçalho preto/branco, desocultar colunas, bordas)
         """
         abas_para_finalizar = ["FILIAL", "REPR", "PAGTO", "PAGTOFILIAL", "TRANSP",
                                "ESTADOS", "CLIENTES", "FAMILIAS", "ESTILOS", "PRODUTOS"]
@@ -3410,11 +4485,11 @@ class PlanilhaValidator:
             if nome_aba in self.wb.sheetnames:
                 sheet = self.wb[nome_aba]
 
-                # 1. Inserir colinha se cabeçalhos estiverem errados
-                self.inserir_colinha_cabecalhos(sheet, nome_aba)
+                # 1. Colinha se cabeçalhos estiverem errados
+                colinha = self.colinha_cabecalhos(sheet, nome_aba)
 
                 # 2. Aplicar formatação final
-                self.aplicar_formatacao_final_aba(sheet, nome_aba)
+                self.aplicar_formatacao_final_aba(sheet, nome_aba, colinha)
 
     def alterar_versao_srppwin(self):
         """
@@ -3422,7 +4497,6 @@ class PlanilhaValidator:
         A aba está protegida com senha, então desprotege, modifica e reprotege.
         A coluna C fica desbloqueada para edição.
         """
-        from openpyxl.styles import Protection
         from openpyxl.worksheet.protection import SheetProtection
 
         if "EMPRESA" not in self.wb.sheetnames:
@@ -3442,15 +4516,16 @@ class PlanilhaValidator:
             texto_versao = f"QUESTIONÁRIO DE PARAMETRIZAÇÃO SRPPWIN VERSÃO {versao}"
             sheet["B2"].value = texto_versao
 
-            # Bloquear todas as células por padrão
-            for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=1, max_col=sheet.max_column):
-                for cell in row:
-                    cell.protection = Protection(locked=True)
-
-            # Desbloquear a coluna C inteira (para permitir edição)
-            for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=3, max_col=3):
+            # Bloquear todas as células, menos a coluna C inteira (para
+            # permitir edição), numa passada só. Fica fora da formatação
+            # final das abas tabulares: a EMPRESA não passa por ela, e aqui
+            # as células vazias da coluna C também precisam existir
+            # (desbloqueadas) para o usuário preencher.
+            paleta = self.paleta
+            max_col = max(sheet.max_column, 3)
+            for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=1, max_col=max_col):
                 for cell in row:
-                    cell.protection = Protection(locked=False)
+                    paleta.aplicar(cell, "protection", PROTECAO_LIVRE if cell.column == 3 else PROTECAO_BLOQUEADA)
 
             # Aplicar proteção com senha - configuração completa
             sheet.protection = SheetProtection(
@@ -3490,16 +4565,96 @@ class PlanilhaValidator:
             return result
         return funcao(*args, **kwargs)
 
-    def processar(self, empresa):
+    def processar(self, empresa, destino=None, limite_erros_aba=None, limite_erros_total=None,
+                  somente_erros=False):
+        """
+        Processa a validação e salva o resultado.
+        destino: caminho do arquivo, pasta (o arquivo é criado nela com o nome
+        gerado) ou objeto de arquivo. Caminhos são gravados de forma atômica
+        (ver salvar_workbook_atomico). Sem destino, os dados ficam em memória.
+        limite_erros_aba / limite_erros_total: orçamento de linhas com erro
+        (por aba tabular / somando as abas). Esgotado, as linhas restantes da
+        aba (e, no total, as das abas seguintes) não são validadas nem
+        pintadas: o RESULTADO diz "Linha não avaliada" e o resumo da aba
+        conta as não avaliadas. Códigos das linhas não avaliadas das abas
+        mestre continuam entrando no cadastro, então as referências a eles
+        nas abas seguintes não aparecem como inexistentes.
+        somente_erros: salva só a planilha resumida (gerar_planilha_erros): o
+        resumo e as linhas com erro ou advertência de cada aba, com o número
+        da linha na planilha de entrada. A planilha validada completa fica
+        disponível em salvar_saida_completa().
+        Com cache (ver __init__), um resultado já gerado para o mesmo conteúdo
+        é devolvido sem carregar nem validar a planilha.
+        Retorna: (dados_excel ou destino, nome_arquivo, status, resultados)
+        """
+        self.limite_erros_aba = limite_erros_aba
+        self.limite_erros_total = limite_erros_total
+        self.linhas_sinalizadas = LinhasSinalizadas() if somente_erros else None
+        if self.cache is not None and self.wb is None:
+            self._chave_cache = self.cache.chave(
+                arquivos_de_entrada(self.arquivo),
+                versao_srppwin=getattr(self, 'versao_srppwin', '19.1.5'),
+                modo_leitura=self.modo_leitura,
+                modo_saida=self.modo_saida,
+                dev_mode=self.dev_mode,
+                imagens=sorted(self.cache_arquivos_imagem or ()),
+                limite_erros_aba=limite_erros_aba,
+                limite_erros_total=limite_erros_total,
+                somente_erros=somente_erros,
+            )
+            self._registro_cache = self.cache.buscar(self._chave_cache)
+            if self._registro_cache is not None:
+                return self._processar_do_cache(destino)
+            self._timing("carregar_workbook", self._carregar_workbook)
+
+        status = self._validar()
+
+        self._reportar_progresso(95, "Salvando arquivo...")
+
+        # Prepara o nome do arquivo
+        timestamp = datetime.now().strftime("%Y.%m.%d %H-%M")
+        if somente_erros:
+            nome_arquivo = f"{timestamp}_{self.emp_nome}_ERROS.xlsx"
+            wb_saida = self._timing("gerar_planilha_erros", self.gerar_planilha_erros)
+        else:
+            nome_arquivo = f"{timestamp}_{self.emp_nome}_IMPORTAÇÃO.xlsx"
+            wb_saida = self.wb
+
+        excel_data = self._salvar_saida(wb_saida, destino, nome_arquivo)
+
+        if self._chave_cache is not None:
+            # A entrada já vale com a saída; etiquetas e planilha completa
+            # entram nela quando forem geradas
+            self._registro_cache = {
+                "saida": nome_arquivo.split("_", 1)[1],
+                "status": status,
+                "resultados": self.resultados_validacao,
+                "completo": True,
+            }
+            self.cache.gravar(self._chave_cache, "saida.xlsx", excel_data, self._registro_cache)
+
+        resultados = [
+            {"Planilha": aba, **dados}
+            for aba, dados in self.resultados_validacao.items()
+        ]
+
+        self._reportar_progresso(100, "Concluído!")
+
+        return excel_data, nome_arquivo, status, resultados
+
+    def _validar(self):
         """
-        Processa a validação e retorna os dados em memória.
-        Retorna: (dados_excel, nome_arquivo, status, resultados)
+        Etapas de processar() entre a carga e a gravação: valida as abas e
+        aplica a formatação final em self.wb, sem salvar.
+        Retorna: status ("aprovado", "advertencias" ou "reprovado")
         """
         # Lista de etapas de validação com seus nomes amigáveis
         # PRODUTOS é tratado separadamente pois tem progresso granular
         etapas_pre_produtos = [
             (self.limpar_planilha, "limpar_planilha", "Limpando planilha..."),
             (self.validar_EMPRESA, "validar_EMPRESA", "Validando EMPRESA..."),
+            (self.verificar_configuracao_empresa, "verificar_configuracao_empresa",
+             "Verificando configuração da EMPRESA..."),
             (self.pre_validar_filial, "pre_validar_filial", "Pré-validando FILIAL..."),
             (self.validar_FILIAL, "validar_FILIAL", "Validando FILIAL..."),
             (self.validar_REPR, "validar_REPR", "Validando REPRESENTANTES..."),
@@ -3530,6 +4685,8 @@ class PlanilhaValidator:
         # Finalização: aplicar formatação final e colinha em todas as abas (exceto EMPRESA)
         self._reportar_progresso(90, "Aplicando formatação final...")
         self._timing("finalizar_todas_abas", self.finalizar_todas_abas)
+        if self.paleta.condicional:
+            self._timing("formatacao_condicional", self.paleta.formatacao_condicional)
 
         # Alterar versão SRPPWIN na aba EMPRESA (se definida)
         self._reportar_progresso(91, "Atualizando versão SRPPWIN...")
@@ -3544,25 +4701,85 @@ class PlanilhaValidator:
             status = "advertencias"
         else:
             status = "aprovado"
+        return status
 
-        self._reportar_progresso(95, "Salvando arquivo...")
-
-        # Prepara o nome do arquivo
-        timestamp = datetime.now().strftime("%Y.%m.%d %H-%M")
-        nome_arquivo = f"{timestamp}_{self.emp_nome}_IMPORTAÇÃO.xlsx"
-
+    def _salvar_saida(self, wb, destino, nome_arquivo):
+        """Salva `wb` em `destino` (ver processar) ou, sem destino, num BytesIO."""
+        if destino is not None:
+            # Grava direto no disco, sem passar por um buffer em memória
+            return salvar_workbook_atomico(wb, resolver_destino(destino, nome_arquivo))
         # Salva o workbook em um buffer de memória
         from io import BytesIO
-        excel_data = BytesIO()
-        self.wb.save(excel_data)
-        excel_data.seek(0)  # Retorna o ponteiro para o início do buffer
-
+        dados = BytesIO()
+        wb.save(dados)
+        dados.seek(0)  # Retorna o ponteiro para o início do buffer
+        return dados
+
+    def _processar_do_cache(self, destino):
+        """processar() para um acerto no cache: só copia a saída guardada."""
+        self.acerto_cache = True
+        self._reportar_progresso(95, "Resultado encontrado no cache, salvando arquivo...")
+        registro = self._registro_cache
+        self.resultados_validacao = registro["resultados"]
+        nome_arquivo = f"{datetime.now().strftime('%Y.%m.%d %H-%M')}_{registro['saida']}"
+        excel_data = self._salvar_saida(
+            self.cache.arquivo(self._chave_cache, "saida.xlsx"), destino, nome_arquivo
+        )
         resultados = [
             {"Planilha": aba, **dados}
             for aba, dados in self.resultados_validacao.items()
         ]
-
         self._reportar_progresso(100, "Concluído!")
+        return excel_data, nome_arquivo, registro["status"], resultados
 
-        return excel_data, nome_arquivo, status, resultados
+    def _validar_de_novo(self):
+        """
+        Num acerto do cache a planilha não foi carregada: valida de novo, sem
+        cache, com as mesmas opções e sem salvar (a planilha validada fica no
+        wb do validador retornado). Feito uma vez só: as etiquetas e a
+        planilha completa saem do mesmo validador.
+        """
+        if self._revalidacao is not None:
+            return self._revalidacao
+        validador = PlanilhaValidator(
+            self.arquivo,
+            progress_callback=self.progress_callback,
+            dev_mode=self.dev_mode,
+            modo_leitura=self.modo_leitura,
+            leitura_paralela=self.leitura_paralela,
+            modo_saida=self.modo_saida,
+        )
+        validador.versao_srppwin = getattr(self, 'versao_srppwin', '19.1.5')
+        validador.limite_erros_aba = self.limite_erros_aba
+        validador.limite_erros_total = self.limite_erros_total
+        validador._validar()
+        self._revalidacao = validador
+        return validador
+
+    def salvar_saida_completa(self, destino=None):
+        """
+        Planilha validada completa, sob demanda, depois de um
+        processar(somente_erros=True); `destino` como em processar. Num acerto
+        do cache ela é copiada do cache se já tiver sido gerada antes; senão a
+        planilha é validada de novo com as mesmas opções.
+        Retorna: (dados_excel ou destino, nome_arquivo)
+        """
+        timestamp = datetime.now().strftime("%Y.%m.%d %H-%M")
+        if self.acerto_cache:
+            sufixo = self._registro_cache.get("completa")
+            if sufixo is not None:
+                nome_arquivo = f"{timestamp}_{sufixo}"
+                completa = self.cache.arquivo(self._chave_cache, "completa.xlsx")
+                return self._salvar_saida(completa, destino, nome_arquivo), nome_arquivo
+            validador = self._validar_de_novo()
+        else:
+            validador = self
+        nome_arquivo = f"{timestamp}_{validador.emp_nome}_IMPORTAÇÃO.xlsx"
+        excel_data = self._timing(
+            "salvar_saida_completa", self._salvar_saida, validador.wb, destino, nome_arquivo
+        )
+        if self._registro_cache is not None:
+            self._registro_cache["completa"] = nome_arquivo.split("_", 1)[1]
+            self.cache.gravar(self._chave_cache, "completa.xlsx", excel_data, self._registro_cache)
+        return excel_data, nome_arquivo
 
@@ -0,0 +1,42 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+QUESTIONARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "questionario.xlsx")
+
+
+@pytest.fixture
+def questionario(tmp_path):
+    """Cópia de fixtures/questionario.xlsx (gerar_questionario.py) numa pasta temporária."""
+    destino = tmp_path / "questionario.xlsx"
+    shutil.copy(QUESTIONARIO, destino)
+    return str(destino)
+
+
+@pytest.fixture
+def validar():
+    """
+    validar(arquivo, empresa="x", etiquetas=False, **opcoes) roda
+    PlanilhaValidator(arquivo, **opcoes).processar(empresa) sem imprimir nada
+    e retorna (validador, retorno de processar). Opções de processar vão em
+    `processar={...}`.
+    """
+    from planilha_validator import PlanilhaValidator
+
+    def validar(arquivo, empresa="x", etiquetas=False, processar=None, **opcoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            validador = PlanilhaValidator(arquivo, **opcoes)
+            retorno = validador.processar(empresa, **(processar or {}))
+            if etiquetas:
+                validador.gerar_planilha_etiquetas()
+        return validador, retorno
+
+    return validar
@@ -0,0 +1,177 @@
+"""
+Gera as planilhas de tests/fixtures/leitores: o questionario.xlsx de
+referência e as mesmas abas em .xls, .xlsb e .csv (um arquivo por aba e o
+CSV único com a coluna ABA). Só precisa rodar de novo quando o conteúdo das
+abas mudar:
+
+    python tests/fixtures/gerar_fixtures_leitores.py
+
+Requer o pacote xlwt (só para gerar o .xls). O .xlsb é escrito aqui mesmo,
+registro a registro, com os tipos de célula que o leitor trata: RK inteiro,
+RK com centésimos, número real, texto compartilhado, texto direto, booleano e
+data pelo estilo.
+"""
+import csv
+import datetime
+import os
+import struct
+import zipfile
+
+from openpyxl import Workbook
+from openpyxl.utils.datetime import to_excel
+
+PASTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "leitores")
+
+ABAS = [
+    ("FILIAL", [
+        ["CodFilial", "Descricao", "Ativa"],
+        ["1", "Matriz São Paulo", True],
+        ["02", "Filial; Curitiba", False],
+        [3, "Depósito \"Norte\"", None],
+    ]),
+    ("PRODUTOS", [
+        ["CodProduto", "Descricao", "PrecoTabela1", "QtdeTabela1", "DataCadastro", "Saldo"],
+        ["A001", "Caneta azul", 1.25, 10, datetime.datetime(2024, 1, 31), -7],
+        ["A002", "Lápis nº 2", 0.1, 1000000000, datetime.datetime(1999, 12, 1), 3.75],
+        [None, None, None, None, None, None],
+        ["A004", "Borracha", 12.5, 0, None, 123456789012],
+        ["A005", None, None, None, None, "fim"],
+    ]),
+]
+
+
+def _registro(tipo, dados=b""):
+    cabecalho = bytes([(tipo & 0x7F) | 0x80, tipo >> 7]) if tipo >= 0x80 else bytes([tipo])
+    n = len(dados)
+    tamanho = b""
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        tamanho += bytes([byte | 0x80 if n else byte])
+        if not n:
+            break
+    return cabecalho + tamanho + dados
+
+
+def _texto(s):
+    return struct.pack("<I", len(s)) + s.encode("utf-16-le")
+
+
+def _celula_xlsb(coluna, valor, textos):
+    celula = struct.pack("<I", coluna)
+    if isinstance(valor, bool):
+        return _registro(4, celula + b"\0\0\0\0" + bytes([valor]))
+    if isinstance(valor, datetime.datetime):
+        return _registro(5, celula + struct.pack("<I", 1) + struct.pack("<d", to_excel(valor)))
+    if isinstance(valor, int) and -2 ** 29 <= valor < 2 ** 29:
+        return _registro(2, celula + b"\0\0\0\0" + struct.pack("<I", ((valor << 2) | 0x02) & 0xFFFFFFFF))
+    if isinstance(valor, float) and (valor * 100).is_integer() and abs(valor) < 2 ** 20:
+        rk = ((int(valor * 100) << 2) | 0x03) & 0xFFFFFFFF
+        return _registro(2, celula + b"\0\0\0\0" + struct.pack("<I", rk))
+    if isinstance(valor, (int, float)):
+        return _registro(5, celula + b"\0\0\0\0" + struct.pack("<d", valor))
+    if valor.startswith("Filial"):  # texto direto na célula (BrtCellSt)
+        return _registro(6, celula + b"\0\0\0\0" + _texto(valor))
+    if valor not in textos:
+        textos[valor] = len(textos)
+    return _registro(7, celula + b"\0\0\0\0" + struct.pack("<I", textos[valor]))
+
+
+def gerar_xlsx(caminho):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for nome, linhas in ABAS:
+        ws = wb.create_sheet(nome)
+        for r, linha in enumerate(linhas, 1):
+            for c, valor in enumerate(linha, 1):
+                if valor is not None:
+                    ws.cell(r, c, valor)
+                    if isinstance(valor, datetime.datetime):
+                        ws.cell(r, c).number_format = "DD/MM/YYYY"
+    wb.save(caminho)
+
+
+def gerar_xls(caminho):
+    import xlwt
+
+    wb = xlwt.Workbook()
+    data = xlwt.easyxf(num_format_str="DD/MM/YYYY")
+    for nome, linhas in ABAS:
+        ws = wb.add_sheet(nome)
+        for r, linha in enumerate(linhas):
+            for c, valor in enumerate(linha):
+                if isinstance(valor, datetime.datetime):
+                    ws.write(r, c, valor, data)
+                elif valor is not None:
+                    ws.write(r, c, valor)
+    wb.save(caminho)
+
+
+def gerar_xlsb(caminho):
+    textos = {}
+    abas = []
+    for nome, linhas in ABAS:
+        dados = [_registro(129), _registro(145)]  # BrtBeginSheet, BrtBeginSheetData
+        for r, linha in enumerate(linhas):
+            if all(valor is None for valor in linha):
+                continue
+            dados.append(_registro(0, struct.pack("<I", r) + b"\0" * 13))
+            dados.extend(_celula_xlsb(c, v, textos) for c, v in enumerate(linha) if v is not None)
+        dados.append(_registro(146))  # BrtEndSheetData
+        abas.append((nome, b"".join(dados)))
+
+    relacoes = ['<?xml version="1.0"?><Relationships '
+                'xmlns="http://schemas.openxmlformats.org/package/2006/relationships">']
+    livro = [_registro(131), _registro(153, struct.pack("<I", 0) + b"\0" * 8)]
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, (nome, dados) in enumerate(abas, 1):
+            livro.append(_registro(156, struct.pack("<II", 0, i) + _texto(f"rId{i}") + _texto(nome)))
+            relacoes.append(f'<Relationship Id="rId{i}" Type="worksheet" Target="worksheets/sheet{i}.bin"/>')
+            zf.writestr(f"xl/worksheets/sheet{i}.bin", dados)
+        relacoes.append("</Relationships>")
+        zf.writestr("xl/workbook.bin", b"".join(livro))
+        zf.writestr("xl/_rels/workbook.bin.rels", "".join(relacoes))
+        zf.writestr(
+            "xl/sharedStrings.bin",
+            _registro(159) + b"".join(_registro(19, b"\0" + _texto(s)) for s in textos) + _registro(160),
+        )
+        # cellXfs: 0 = Geral, 1 = formato 14 (data)
+        zf.writestr(
+            "xl/styles.bin",
+            _registro(278) + _registro(617)
+            + _registro(47, struct.pack("<HH", 0xFFFF, 0) + b"\0" * 12)
+            + _registro(47, struct.pack("<HH", 0, 14) + b"\0" * 12)
+            + _registro(618) + _registro(279),
+        )
+
+
+def texto_csv(valor):
+    """Como o Excel em português grava cada valor num CSV."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "VERDADEIRO" if valor else "FALSO"
+    if isinstance(valor, datetime.datetime):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, float):
+        return str(valor).replace(".", ",")
+    return str(valor)
+
+
+def gerar_csvs(pasta_csv, caminho_unico):
+    os.makedirs(pasta_csv, exist_ok=True)
+    for nome, linhas in ABAS:
+        with open(os.path.join(pasta_csv, f"{nome}.csv"), "w", newline="", encoding="utf-8-sig") as f:
+            csv.writer(f, delimiter=";").writerows([texto_csv(v) for v in linha] for linha in linhas)
+    with open(caminho_unico, "w", newline="", encoding="cp1252") as f:
+        escritor = csv.writer(f, delimiter=";")
+        escritor.writerow(["ABA"])
+        for nome, linhas in ABAS:
+            escritor.writerows([nome] + [texto_csv(v) for v in linha] for linha in linhas)
+
+
+if __name__ == "__main__":
+    os.makedirs(PASTA, exist_ok=True)
+    gerar_xlsx(os.path.join(PASTA, "questionario.xlsx"))
+    gerar_xls(os.path.join(PASTA, "questionario.xls"))
+    gerar_xlsb(os.path.join(PASTA, "questionario.xlsb"))
+    gerar_csvs(os.path.join(PASTA, "csv"), os.path.join(PASTA, "unico.csv"))
@@ -0,0 +1,104 @@
+"""
+Gera tests/fixtures/questionario.xlsx: um questionário completo (EMPRESA e
+todas as abas tabulares) com valores válidos e inválidos de todos os tipos,
+linhas repetidas e vazias, cabeçalho com erro de digitação e uma fórmula.
+Os valores saem de um gerador aleatório com semente fixa; só precisa rodar de
+novo (e atualizar os resultados esperados dos testes) quando as abas mudarem:
+
+    python tests/fixtures/gerar_questionario.py
+"""
+import os
+import random
+from datetime import datetime
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+
+def gerar(caminho, produtos=200, semente=1, c7="N=Numérico", c8=8, linhas_em_branco=0):
+    random.seed(semente)
+    wb = Workbook()
+    ws = wb.active; ws.title = "EMPRESA"
+    ws["B2"] = "QUESTIONÁRIO"; ws["B2"].font = Font(bold=True, size=14)
+    ws.merge_cells("B2:D2")
+    ws["B5"] = "Nome"; ws["C5"] = "ACME LTDA"
+    ws["C7"] = c7; ws["C8"] = c8; ws["C10"] = "N=Numérico"; ws["C11"] = 6
+    ws["C39"] = "Titulo 1"; ws["C40"] = "Titulo 2"
+    ws.column_dimensions["B"].width = 40
+    f = wb.create_sheet("FILIAL")
+    f.append(["CodFilial", "Filial", "TituloAdicional1", "TituloAdicional2", "Logotipo"])
+    f.append(["1", "Matriz", None, None, None])
+    f.append(["2", "Filial 2", "x", "y", None])
+    f.append(["2", "Filial 2", "x", "y", None])
+    r = wb.create_sheet("REPR")
+    r.append(["codrepresentante ", "Representante"])  # cabeçalho corrigido pelo validador
+    for i in range(1, 30):
+        r.append([str(i), f"Rep {i}" if i % 7 else "Representante com nome muito longo"])
+    r.append(["abc", "X"]); r.append([5, "Rep 5"]); r.append([None, None]); r.append(["40000", "Rep"])
+    p = wb.create_sheet("PAGTO")
+    p.append(["CodCondPagamento", "CondPagamento", "TipoCondPagamento", "CondPagamentoPadrao",
+              "VlrMinimoPedido", "VlrMinimoComEstAtual", "VlrMinimoComEstFuturo",
+              "VlrMinimoComEstEsgotado", "Desconto1", "Desconto2", "Desconto3"])
+    for i in range(1, 15):
+        p.append([str(i), f"Cond {i}", random.choice(["N", "E", "x", "", None]), random.choice(["S", "n", "Z", None]), "10.5", None, None, None, 1, 2, 3])
+    p.append(["1", "Cond dup", "N", "S", None, None, None, None, None, None, None])
+    pf = wb.create_sheet("PAGTOFILIAL")
+    pf.append(["CodCondPagamento", "CodFilial", "VlrMinimoPedido"])
+    for i in range(1, 20):
+        pf.append([str(i), random.choice(["1", "2", "9"]), random.choice(["10", "10,5", "abc", 12.25, None, "-5", "1.5"])])
+    t = wb.create_sheet("TRANSP")
+    t.append(["CodTransportadora", "Transportadora", "TransportadoraPadrao"])
+    for i in range(1, 8):
+        t.append([str(i), f"Transp {i % 5}", random.choice(["S", "N", "q", None])])
+    e = wb.create_sheet("ESTADOS")
+    e.append(["SiglaEstado", "NomeEstado", "Padrao", "ClienteNovoTabPreco"])
+    for s in ["SP", "RJ", "XX", "MG", "rs"]:
+        e.append([s, random.choice(["sao paulo", "Rio", "Nome de estado grande demais mesmo", "Minas Gerais"]), random.choice(["1", "2", "3"]), random.choice([0, 1, 5, "a", None])])
+    c = wb.create_sheet("CLIENTES")
+    c.append(["CodCliente", "NomeFantasia", "CodRepresentante", "RazaoSocial", "Logradouro", "Bairro", "Cidade", "UF", "CEP", "CNPJCPF", "IERG", "Observacao", "CodTransportadora", "NomeTransportadora", "PrecoTabela", "NomeContato", "EMail", "DDD", "Telefone1", "Telefone2", "FAX"])
+    for i in range(1, 60):
+        c.append([random.choice([str(i), "0" + str(i), "x"]), random.choice(["", "Cliente", "Nome Fantasia muito longo aqui"]), random.choice(["0", "3", "99", "", "a"]), random.choice(["Razao", "", "R" * 45]), "Rua", "B", "C", "SP", "0000", "1", "2", "obs", "1", "T", random.choice([0, 1, 4, "z", None]), "n", "e@x", "11", "1", "2", "3"])
+        if i % 13 == 0:
+            c.append([None] * 21)
+            c.append(["dup", "X", None, None, "Rua", None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None])
+            c.append(["dup", "X", None, None, "Rua", None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None])
+    fa = wb.create_sheet("FAMILIAS")
+    fa.append(["CodFamilia", "Familia", "MultiploFamilia", "MinimoFamilia", "DescontoFamilia"])
+    for i in range(1, 12):
+        fa.append([str(i), f"Fam {i}" if i != 4 else "", random.choice([1, 0, "x", None, 5]), random.choice([2, None]), random.choice(["5,5", "150", "x", None, 3.333])])
+    es = wb.create_sheet("ESTILOS")
+    es.append(["CodEstilo", "Estilo"])
+    for i in range(1, 6):
+        es.append([str(i), f"Estilo {i}"])
+    es.append(["z", ""])
+    pr = wb.create_sheet("PRODUTOS")
+    hdr = ["CodProduto", "CodAuxiliarProduto", "Produto", "CodFilial", "CodFamilia", "CodEstilo", "QtdeMultipla", "QtdeMinima", "QtdeTabela1", "QtdeTabela2", "QtdeTabela3", "PrecoTabela1", "PrecoTabela2", "PrecoTabela3", "LimiteDescIndividual", "MultiploGrade", "DescontoGrade", "PrecoPromocional", "AliquotaIPI", "TipoVendaSemEstoque", "QtdeEstoqueAtual", "QtdeEstoqueFuturo", "DtEstoqueFuturo", "PathFotografia", "QtdeEtiquetas"]
+    pr.append(hdr)
+    for i in range(1, produtos):
+        cod = random.choice([str(1000 + i), str(1000 + i), 1000 + i, "AB" + str(i), "123456789012", str(1000 + i // 2)])
+        q1, q2, q3 = random.choice([(None, None, None), (10, 20, 30), (10, None, None), (None, 5, None), (20, 10, None), (1, 2, "x")])
+        row = [cod, random.choice([None, str(500 + i), "A1", str(500 + i % 10)]),
+               random.choice(["Produto " + str(i), "", "Produto com um nome realmente muito comprido para caber aqui", "  Prod  "]),
+               random.choice(["1", "2", "", "9", None]), random.choice(["1", "2", "99", "x", None]), random.choice(["1", "7", "a", None]),
+               random.choice([1, 0, "x", 5000000, None]), random.choice([1, None]), q1, q2, q3,
+               random.choice(["10,00", "10.5", 12.3, "1.000", "23.900000000000002", "-", 0, "abc", None, "1.234.56", "7", "5.1234"]),
+               random.choice(["8,00", 9.99, "-", None, "0", "20,00", "x"]), random.choice(["5,00", None, 4.5]),
+               random.choice([None, "5", "150", "x"]), random.choice([None, 2, "q"]), random.choice([None, "3,5", "200"]),
+               random.choice(["S", "n", "x", None]), random.choice([None, "5", 12.5, "a"]), random.choice(["L", "b", "Q", None]),
+               random.choice([None, 10, 0, "x", 9999999]), random.choice([None, 10, 0, "x"]),
+               random.choice([None, "01/02/2025", "2025-02-01", datetime(2025, 3, 4), "lixo", "2025-02-01 00:00:00"]),
+               random.choice([None, "foto.jpg", "x" * 70]), random.choice([None, 1, 5, 0, "x", 2000])]
+        pr.append(row)
+        if i % 37 == 0:
+            pr.append(row)
+            pr.append([None] * len(hdr))
+    for k in range(linhas_em_branco):
+        pr.cell(row=pr.max_row + 1, column=1).fill = PatternFill("solid", start_color="DDDDDD")
+    pr["X3"] = "=1+2"
+    wb.save(caminho)
+
+
+if __name__ == "__main__":
+    gerar(os.path.join(PASTA, "questionario.xlsx"))
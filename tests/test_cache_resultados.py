@@ -0,0 +1,114 @@
+"""Cache de resultados em disco (cache_resultados.CacheResultados)."""
+import os
+from io import BytesIO
+
+import pytest
+from openpyxl import load_workbook
+
+from cache_resultados import ARQUIVO_META, CacheResultados
+from planilha_validator import PlanilhaValidator
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheResultados(pasta=str(tmp_path / "cache"), versao="1.0")
+
+
+def _arquivo(pasta, nome, conteudo):
+    caminho = pasta / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+# --- chave -------------------------------------------------------------------
+def test_chave_depende_do_conteudo_e_dos_parametros(cache, tmp_path):
+    (tmp_path / "copia").mkdir()
+    a = _arquivo(tmp_path, "a.xlsx", b"conteudo")
+    copia = _arquivo(tmp_path / "copia", "a.xlsx", b"conteudo")
+    c = _arquivo(tmp_path, "c.xlsx", b"outro conteudo")
+    chave = cache.chave([a], modo_leitura="completo")
+    assert chave == cache.chave([a], modo_leitura="completo")
+    assert chave == cache.chave([copia], modo_leitura="completo")  # mesmo arquivo em outra pasta
+    assert chave != cache.chave([c], modo_leitura="completo")
+    assert chave != cache.chave([a], modo_leitura="streaming")
+    assert chave != CacheResultados(pasta=cache.pasta, versao="2.0").chave([a], modo_leitura="completo")
+
+
+def test_chave_dos_csvs_por_aba_depende_do_nome(cache, tmp_path):
+    filial = _arquivo(tmp_path, "FILIAL.csv", b"CodFilial\n1\n")
+    repr_ = _arquivo(tmp_path, "REPR.csv", b"CodFilial\n1\n")
+    assert cache.chave([filial]) != cache.chave([repr_])
+
+
+# --- buscar / gravar ---------------------------------------------------------
+def test_falta_e_acerto(cache):
+    assert cache.buscar("x") is None
+    cache.gravar("x", "saida.xlsx", BytesIO(b"dados"), {"saida": "s.xlsx"})
+    assert cache.buscar("x") is None  # entrada sem "completo" não vale
+    cache.gravar("x", None, None, {"saida": "s.xlsx", "completo": True})
+    assert cache.buscar("x") == {"saida": "s.xlsx", "completo": True}
+    destino = BytesIO()
+    cache.arquivo("x", "saida.xlsx").save(destino)
+    assert destino.getvalue() == b"dados"
+    assert (cache.acertos, cache.faltas) == (1, 2)
+
+
+def test_limite_de_tamanho_descarta_o_menos_usado(tmp_path):
+    cache = CacheResultados(pasta=str(tmp_path / "cache"), limite_bytes=2500)
+    for i, chave in enumerate(("antiga", "usada", "nova")):
+        cache.gravar(chave, "saida.xlsx", BytesIO(b"x" * 1000), {"completo": True})
+        meta = os.path.join(cache.pasta, chave, ARQUIVO_META)
+        os.utime(meta, (1000 + i, 1000 + i))
+        if chave == "usada":
+            # "antiga" passa a ser usada depois de "usada"
+            cache.buscar("antiga")
+    assert cache.buscar("antiga") is not None
+    assert cache.buscar("nova") is not None
+    assert cache.buscar("usada") is None
+    assert not os.path.exists(os.path.join(cache.pasta, "usada"))
+
+
+# --- PlanilhaValidator com cache ---------------------------------------------
+@pytest.mark.parametrize("processar", [{}, {"somente_erros": True}])
+def test_processar_sem_etiquetas_ja_completa_a_entrada(questionario, validar, cache, processar):
+    primeiro, (saida, nome, status, resultados) = validar(questionario, cache=cache, processar=processar)
+    assert not primeiro.acerto_cache
+    segundo, (saida_cache, nome_cache, status_cache, resultados_cache) = validar(
+        questionario, cache=cache, processar=processar
+    )
+    assert segundo.acerto_cache and segundo.wb is None
+    assert (status_cache, resultados_cache) == (status, resultados)
+    assert nome_cache.split("_", 1)[1] == nome.split("_", 1)[1]
+    assert saida_cache.getvalue() == saida.getvalue()
+
+
+def test_etiquetas_num_acerto_sem_etiquetas_guardadas(questionario, validar, cache, monkeypatch):
+    sem_cache, _ = validar(questionario, etiquetas=False)
+    esperado = sem_cache.gerar_planilha_etiquetas()
+    validar(questionario, cache=cache, processar={"somente_erros": True})  # entrada sem etiquetas
+
+    acerto, _ = validar(questionario, cache=cache, processar={"somente_erros": True})
+    assert acerto.acerto_cache
+    salvos = []
+    salvar = PlanilhaValidator._salvar_saida
+    monkeypatch.setattr(
+        PlanilhaValidator, "_salvar_saida", lambda self, wb, *args: salvos.append(wb) or salvar(self, wb, *args)
+    )
+    gerado = acerto.gerar_planilha_etiquetas()
+    # A planilha é validada de novo, mas a planilha validada não é gravada
+    assert acerto._revalidacao.wb not in salvos
+    assert (gerado is None) == (esperado is None)
+    if esperado is not None:
+        valores = [list(r) for r in load_workbook(gerado[0]).active.iter_rows(values_only=True)]
+        assert valores == [list(r) for r in load_workbook(esperado[0]).active.iter_rows(values_only=True)]
+
+    # A planilha completa sai do mesmo validador, sem validar outra vez
+    revalidacao = acerto._revalidacao
+    completa, _ = acerto.salvar_saida_completa()
+    assert acerto._revalidacao is revalidacao and salvos[-1] is revalidacao.wb
+    assert load_workbook(completa).sheetnames == load_workbook(sem_cache._salvar_saida(sem_cache.wb, None, "")).sheetnames
+
+    # Agora as etiquetas estão na entrada: o próximo acerto só copia
+    outro, _ = validar(questionario, cache=cache, processar={"somente_erros": True})
+    assert outro.acerto_cache
+    assert "etiquetas" in outro._registro_cache
@@ -0,0 +1,80 @@
+"""Estilos das abas compactas (modo streaming) e PaletaEstilos."""
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from planilha_validator import (
+    BORDA,
+    COR_ERRO,
+    COR_VALIDO,
+    ESTILO_CABECALHO_FILL,
+    ESTILO_COLINHA_FILL,
+    PaletaEstilos,
+    WorkbookCompacto,
+)
+
+
+def _salvar(wb):
+    dados = BytesIO()
+    wb.save(dados)
+    dados.seek(0)
+    return load_workbook(dados)
+
+
+def test_paleta_grava_os_indices_registrados():
+    wb = WorkbookCompacto()
+    ws = wb.create_sheet("PRODUTOS")
+    for row in range(1, 4):
+        ws.append([f"A{row}", f"B{row}"])
+    paleta = PaletaEstilos(wb)
+    paleta.aplicar(ws.cell(1, 1), "fill", COR_ERRO)
+    paleta.aplicar(ws.cell(1, 1), "border", BORDA)
+    paleta.aplicar(ws.cell(2, 2), "fill", COR_VALIDO)
+    ws.cell(3, 1).font = Font(bold=True)  # fora da paleta
+
+    saida = _salvar(wb)["PRODUTOS"]
+    assert saida["A1"].fill == COR_ERRO
+    assert saida["A1"].border == BORDA
+    assert saida["B2"].fill == COR_VALIDO
+    assert saida["A3"].font.b
+    assert not saida["B1"].has_style
+    # O índice que a paleta registrou é o que foi gravado na célula
+    assert saida["A1"]._style.fillId == paleta._indice("fill", COR_ERRO)[1]
+    assert saida["B2"]._style.fillId == paleta._indice("fill", COR_VALIDO)[1]
+
+
+def test_salvar_duas_vezes():
+    wb = WorkbookCompacto()
+    ws = wb.create_sheet("FILIAL")
+    ws.append(["1", "Matriz"])
+    PaletaEstilos(wb).aplicar(ws.cell(1, 2), "fill", COR_ERRO)
+    assert _salvar(wb)["FILIAL"]["B1"].fill == COR_ERRO
+    ws.cell(1, 1).fill = COR_VALIDO
+    segunda = _salvar(wb)["FILIAL"]
+    assert segunda["A1"].fill == COR_VALIDO
+    assert segunda["B1"].fill == COR_ERRO
+
+
+@pytest.mark.parametrize("classe", [Workbook, WorkbookCompacto])
+def test_formatacao_final_com_colinha(classe):
+    wb = classe()
+    ws = wb.create_sheet("FILIAL")
+    ws.append(["CodFilial", "Errado"])
+    ws.append(["1", None, "Matriz"])
+    paleta = PaletaEstilos(wb)
+    paleta.aplicar(ws.cell(2, 1), "fill", COR_ERRO)
+    paleta.formatacao_final(ws, 2, ["CodFilial", "Descricao"])
+
+    saida = _salvar(wb)["FILIAL"]
+    assert [c.value for c in saida[1]][:2] == ["CodFilial", "Descricao"]
+    assert saida["A1"].fill == ESTILO_COLINHA_FILL and saida["A1"].font.i
+    assert saida["A1"].border == BORDA
+    # Os dados descem uma linha, com os estilos que já tinham
+    assert [c.value for c in saida[2]][:2] == ["CodFilial", "Errado"]
+    assert saida["B2"].fill == ESTILO_CABECALHO_FILL
+    assert [c.value for c in saida[3]] == ["1", None, "Matriz"]
+    assert saida["A3"].fill == COR_ERRO and saida["A3"].border == BORDA
+    assert not saida["B3"].has_style
+    assert saida.max_row == 3
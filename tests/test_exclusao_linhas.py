@@ -0,0 +1,119 @@
+"""
+Exclusão das linhas repetidas e vazias numa passada (excluir_linhas,
+linhas_vazias) e o número da linha na planilha de entrada
+(PlanilhaValidator.linha_original) nas linhas que sobram.
+"""
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from planilha_validator import COR_ERRO, AbaCompacta, excluir_linhas, linhas_vazias
+
+LINHAS = [
+    ["Cod", "Nome"],
+    ["1", "a"],
+    [None, None],
+    ["2", "b"],
+    ["  ", None],  # só espaços: vazia
+    ["3", None],
+    [None, "c"],
+    [None, None],
+]
+
+
+def _aba(classe):
+    if classe is AbaCompacta:
+        ws = AbaCompacta("PRODUTOS")
+    else:
+        ws = Workbook().active
+    for linha in LINHAS:
+        ws.append(linha)
+    # Linhas só formatadas no fim, como as que o Excel deixa
+    ws.cell(row=20, column=1).fill = COR_ERRO
+    ws.cell(row=30, column=3).fill = COR_ERRO
+    return ws
+
+
+def _valores(ws):
+    return [[c.value for c in linha] for linha in ws.iter_rows(max_col=2)]
+
+
+@pytest.mark.parametrize("classe", [Workbook, AbaCompacta])
+def test_linhas_vazias(classe):
+    assert linhas_vazias(_aba(classe)) == ([3, 5], 8)
+
+
+@pytest.mark.parametrize("classe", [Workbook, AbaCompacta])
+@pytest.mark.parametrize("linhas, a_partir_de", [([3, 5], 8), ([2, 3, 5, 7], None), ([4], 6), ([], 2)])
+def test_excluir_linhas_igual_delete_rows(classe, linhas, a_partir_de):
+    esperado = _aba(Workbook)
+    if a_partir_de is not None:
+        esperado.delete_rows(a_partir_de, esperado.max_row)
+    for row in sorted(linhas, reverse=True):
+        esperado.delete_rows(row)
+    ws = _aba(classe)
+    excluir_linhas(ws, linhas, a_partir_de)
+    assert ws.max_row == esperado.max_row
+    assert _valores(ws) == _valores(esperado)
+
+
+def _produtos_com_repetidas(questionario):
+    """
+    Reescreve PRODUTOS com linhas repetidas, vazias no meio e formatadas no
+    fim, e um preço "-" (erro) em metade das linhas que ficam.
+    Retorna {CodProduto: linha na planilha de entrada} das linhas que ficam.
+    """
+    wb = load_workbook(questionario)
+    ws = wb["PRODUTOS"]
+    cabecalho = [c.value for c in ws[1]]
+    col_preco = cabecalho.index("PrecoTabela1")
+    unicas, codigos = [], set()
+    for linha in ws.iter_rows(min_row=2, values_only=True):
+        codigo = str(linha[0]).strip()
+        if linha[0] is not None and codigo not in codigos and len(unicas) < 40:
+            codigos.add(codigo)
+            unicas.append(list(linha))
+    ws.delete_rows(2, ws.max_row)
+
+    esperado = {}
+    for i, linha in enumerate(unicas):
+        if i % 2:
+            linha[col_preco] = "-"
+        ws.append(linha)
+        esperado[str(linha[0])] = ws.max_row
+        if i % 3 == 0:
+            ws.append(linha)  # repetida: sai
+        if i % 4 == 0:
+            ws.append([None] * len(linha))  # vazia no meio: sai
+        if i % 5 == 0:
+            ws.append(["   "])  # só espaços: sai
+    fim = ws.max_row
+    ws.cell(row=fim + 10, column=2).fill = COR_ERRO
+    ws.cell(row=fim + 500, column=1).fill = COR_ERRO
+    wb.save(questionario)
+    return esperado
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_linhas_restantes_e_linha_original(questionario, validar, modo_leitura):
+    esperado = _produtos_com_repetidas(questionario)
+    validador, (erros, *_) = validar(
+        questionario, modo_leitura=modo_leitura, processar={"somente_erros": True}
+    )
+
+    # Na planilha validada só ficam as linhas únicas, na ordem de entrada
+    produtos = validador.wb["PRODUTOS"]
+    cabecalho = [c.value for c in produtos[1]]
+    col_codigo = cabecalho.index("CodProduto")
+    codigos = [linha[col_codigo] for linha in produtos.iter_rows(min_row=2, values_only=True)]
+    assert [str(c) for c in codigos] == list(esperado)
+    for row, codigo in enumerate(codigos, 2):
+        assert validador.linha_original("PRODUTOS", row) == esperado[str(codigo)]
+
+    # Na planilha resumida, a coluna Linha é a da planilha de entrada
+    ws = load_workbook(erros)["PRODUTOS"]
+    cabecalho = [c.value for c in ws[1]]
+    col_codigo = cabecalho.index("CodProduto")
+    linhas = [(linha[0], str(linha[col_codigo])) for linha in ws.iter_rows(min_row=2, values_only=True)]
+    assert {codigo for _, codigo in linhas} >= {codigo for i, codigo in enumerate(esperado) if i % 2}
+    for linha, codigo in linhas:
+        assert linha == esperado[codigo], codigo
@@ -0,0 +1,118 @@
+"""
+DtEstoqueFuturo pelo LeitorDatas (formato dominante farejado, textos
+memorizados) contra a conversão célula a célula: cada formato de
+Data.FORMATOS tentado em ordem com strptime.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from openpyxl import load_workbook
+
+from planilha_validator import Data, LeitorDatas
+
+
+def _por_celula(texto):
+    for fmt in Data.FORMATOS:
+        try:
+            return datetime.strptime(texto, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _textos():
+    """Mais textos ISO que a amostra (o dominante vira o ISO), depois os outros formatos."""
+    inicio = datetime(2024, 1, 1)
+    iso = [(inicio + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(LeitorDatas.AMOSTRA + 10)]
+    return iso + [
+        "31/01/2024", "01/12/2023", "2024-01-31 10:00:00", "45322", "45322.5",
+        "31/02/2024", "2024-02-30", "abc", "31-01-2024", "", "31/01/2024", iso[0],
+    ]
+
+
+def test_leitor_igual_a_conversao_por_celula():
+    leitor = LeitorDatas(Data.FORMATOS)
+    textos = _textos()
+    assert [leitor.converter(t) for t in textos] == [_por_celula(t) for t in textos]
+    assert leitor.formatos[0] == "%Y-%m-%d"  # o farejo mudou a ordem
+    # Convertidos de novo, agora pelo cache
+    assert [leitor.converter(t) for t in reversed(textos)] == [_por_celula(t) for t in reversed(textos)]
+
+
+def test_leitor_com_cache_cheio(monkeypatch):
+    monkeypatch.setattr(LeitorDatas, "LIMITE_CACHE", 5)
+    leitor = LeitorDatas(Data.FORMATOS)
+    textos = _textos()
+    assert [leitor.converter(t) for t in textos * 2] == [_por_celula(t) for t in textos * 2]
+    assert len(leitor._datas) == 5
+
+
+VALORES = [
+    datetime(2024, 3, 15),
+    45322,  # número de série do Excel não é aceito
+    45322.5,
+    "15/03/2024",
+    "2024-03-15",
+    "2024-03-15 08:00:00",
+    "31/02/2024",
+    "15-03-2024",
+    "abc",
+]
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_coluna_igual_a_conversao_por_celula(questionario, validar, modo_leitura):
+    wb = load_workbook(questionario)
+    ws = wb["PRODUTOS"]
+    cabecalho = [c.value for c in ws[1]]
+    col_data = cabecalho.index("DtEstoqueFuturo") + 1
+    col_saldo = cabecalho.index("QtdeEstoqueFuturo") + 1
+    entrada = {}
+    repetidos = set()
+    inicio = datetime(2024, 1, 1)
+    for row in range(2, ws.max_row + 1):
+        codigo = ws.cell(row, 1).value
+        if codigo is None:
+            continue
+        i = len(entrada)
+        # Primeiras linhas só com ISO (formato dominante), depois os valores mistos
+        if i < LeitorDatas.AMOSTRA + 10:
+            valor = (inicio + timedelta(days=i)).strftime("%Y-%m-%d")
+        else:
+            valor = VALORES[i % len(VALORES)]
+        ws.cell(row, col_data).value = valor
+        if not isinstance(valor, datetime):
+            ws.cell(row, col_data).number_format = "General"  # número fica número
+        ws.cell(row, col_saldo).value = 1
+        if str(codigo) in entrada:
+            repetidos.add(str(codigo))  # linhas duplicadas saem da planilha
+        entrada[str(codigo)] = valor
+    for codigo in repetidos:
+        del entrada[codigo]
+    assert len(entrada) > LeitorDatas.AMOSTRA + 10 + len(VALORES)
+    wb.save(questionario)
+
+    _, (saida, *_) = validar(questionario, modo_leitura=modo_leitura)
+    ws = load_workbook(saida)["PRODUTOS"]
+    cabecalho = [c.value for c in ws[1]]
+    col_codigo = cabecalho.index("CodProduto")
+    col_data = cabecalho.index("DtEstoqueFuturo")
+    col_resultado = cabecalho.index("RESULTADO")
+    vistos = 0
+    for linha in ws.iter_rows(min_row=2, values_only=True):
+        codigo = linha[col_codigo]
+        if codigo is None or str(codigo) not in entrada:
+            continue
+        vistos += 1
+        valor = entrada[str(codigo)]
+        if isinstance(valor, datetime):
+            esperado = valor
+        else:
+            esperado = _por_celula(str(valor).strip())
+        if esperado is None:
+            assert linha[col_data] == valor, codigo
+            assert "DtEstoqueFuturo com formato inválido" in (linha[col_resultado] or ""), codigo
+        else:
+            assert linha[col_data] == esperado, codigo
+            assert "DtEstoqueFuturo com formato" not in (linha[col_resultado] or ""), codigo
+    assert vistos == len(entrada)
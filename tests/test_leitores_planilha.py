@@ -0,0 +1,113 @@
+"""
+Os leitores de leitores_planilha contra o openpyxl: cada formato gerado por
+fixtures/gerar_fixtures_leitores.py a partir das mesmas abas tem que render os
+mesmos valores que load_workbook + iter_rows(values_only=True) no .xlsx.
+"""
+import os
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+import leitores_planilha
+from fixtures.gerar_fixtures_leitores import texto_csv
+from leitores_planilha import (
+    ler_abas_csv,
+    ler_abas_xls,
+    ler_abas_xlsb,
+    ler_aba_xlsx,
+    obter_leitor,
+)
+from planilha_validator import carregar_workbook_compacto, mapear_abas_xlsx
+
+PASTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "leitores")
+XLSX = os.path.join(PASTA, "questionario.xlsx")
+
+
+def _normalizar(linhas):
+    """Tira os None do fim de cada linha e as linhas vazias do fim da aba."""
+    resultado = []
+    for linha in linhas:
+        linha = list(linha)
+        while linha and linha[-1] is None:
+            linha.pop()
+        resultado.append(tuple(linha))
+    while resultado and not resultado[-1]:
+        resultado.pop()
+    return resultado
+
+
+def _abas(leitor, arquivo):
+    return {nome: _normalizar(linhas) for nome, linhas in leitor(arquivo)}
+
+
+@pytest.fixture(scope="module")
+def esperado():
+    wb = load_workbook(XLSX, data_only=True)
+    try:
+        return {ws.title: _normalizar(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+def _como_csv(abas):
+    return {
+        nome: [tuple(texto_csv(v) or None for v in linha) for linha in linhas]
+        for nome, linhas in abas.items()
+    }
+
+
+def test_xml_direto_igual_openpyxl(esperado):
+    with zipfile.ZipFile(XLSX) as zf:
+        caminhos = mapear_abas_xlsx(zf)
+    assert {nome: _normalizar(ler_aba_xlsx(XLSX, caminho)) for nome, caminho in caminhos.items()} == esperado
+
+
+def test_xlsb_igual_openpyxl(esperado):
+    assert _abas(ler_abas_xlsb, os.path.join(PASTA, "questionario.xlsb")) == esperado
+
+
+def test_xlsb_registros_lidos_em_blocos_pequenos(esperado, monkeypatch):
+    # Registros que atravessam o fim do bloco lido têm que ser remontados.
+    original = leitores_planilha._ler_registros
+    monkeypatch.setattr(leitores_planilha, "_ler_registros", lambda f: original(f, tamanho_bloco=7))
+    assert _abas(ler_abas_xlsb, os.path.join(PASTA, "questionario.xlsb")) == esperado
+
+
+def test_xls_igual_openpyxl(esperado):
+    pytest.importorskip("xlrd")
+    assert _abas(ler_abas_xls, os.path.join(PASTA, "questionario.xls")) == esperado
+
+
+def test_xls_sem_xlrd(monkeypatch):
+    import builtins
+
+    importar = builtins.__import__
+
+    def sem_xlrd(nome, *args, **kwargs):
+        if nome == "xlrd":
+            raise ImportError(nome)
+        return importar(nome, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", sem_xlrd)
+    with pytest.raises(ValueError, match="xlrd"):
+        list(ler_abas_xls(os.path.join(PASTA, "questionario.xls")))
+
+
+def test_csv_um_arquivo_por_aba(esperado):
+    assert _abas(ler_abas_csv, os.path.join(PASTA, "csv", "PRODUTOS.csv")) == _como_csv(esperado)
+
+
+def test_csv_unico_com_coluna_aba(esperado):
+    assert _abas(ler_abas_csv, os.path.join(PASTA, "unico.csv")) == _como_csv(esperado)
+
+
+@pytest.mark.parametrize("arquivo", ["questionario.xlsb", "questionario.xls", "unico.csv"])
+def test_workbook_compacto_pelos_leitores(arquivo, esperado):
+    caminho = os.path.join(PASTA, arquivo)
+    if arquivo.endswith(".xls"):
+        pytest.importorskip("xlrd")
+    assert obter_leitor(caminho) is not None
+    wb = carregar_workbook_compacto(caminho)
+    abas = {ws.title: _normalizar(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+    assert abas == (_como_csv(esperado) if arquivo.endswith(".csv") else esperado)
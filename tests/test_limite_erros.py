@@ -0,0 +1,52 @@
+"""Orçamento de erros (processar(limite_erros_aba=..., limite_erros_total=...))."""
+import pytest
+
+ABAS_MESTRE = ("FILIAL", "REPR", "PAGTO", "TRANSP", "FAMILIAS", "ESTILOS")
+
+
+@pytest.fixture
+def sem_limite(questionario, validar):
+    validador, _ = validar(questionario)
+    return validador
+
+
+@pytest.mark.parametrize("limite", [{"limite_erros_aba": 1}, {"limite_erros_total": 3}])
+def test_chaves_das_linhas_nao_avaliadas_continuam_no_cadastro(questionario, validar, sem_limite, limite):
+    validador, _ = validar(questionario, processar=limite)
+    assert any(d.get("nao_avaliadas") for d in validador.resultados_validacao.values())
+    for aba in ABAS_MESTRE:
+        assert list(validador.chaves[aba]) == list(sem_limite.chaves[aba]), aba
+
+
+@pytest.mark.parametrize("limite", [{"limite_erros_aba": 1}, {"limite_erros_total": 3}])
+def test_sem_codigos_inexistentes_falsos(questionario, validar, sem_limite, limite):
+    # Com o limite menos linhas citam códigos, mas nenhum código que existe
+    # numa linha não avaliada da aba mestre pode virar "inexistente".
+    validador, _ = validar(questionario, processar=limite)
+    for aba in ABAS_MESTRE:
+        orfaos = validador.chaves[aba].orfaos
+        for origem, codigos in orfaos.items():
+            assert set(codigos) <= set(sem_limite.chaves[aba].orfaos.get(origem, {})), (aba, origem)
+
+
+def test_mestre_truncada_nao_gera_inexistente(questionario, validar):
+    # FAMILIAS com código inválido na primeira linha e um código válido
+    # depois do limite, citado por PRODUTOS.
+    from openpyxl import load_workbook
+
+    wb = load_workbook(questionario)
+    familias = wb["FAMILIAS"]
+    familias.delete_rows(2, familias.max_row)
+    familias.append(["abc", "Fam 1", None, None, None])  # código inválido: erro
+    familias.append(["2", "Fam 2", None, None, None])  # não avaliada com limite 1
+    produtos = wb["PRODUTOS"]
+    coluna = [c.value for c in produtos[1]].index("CodFamilia") + 1
+    for row in range(2, produtos.max_row + 1):
+        if produtos.cell(row, 1).value is not None:
+            produtos.cell(row, coluna).value = "2"
+    wb.save(questionario)
+
+    validador, _ = validar(questionario, processar={"limite_erros_aba": 1})
+    assert validador.resultados_validacao["FAMILIAS"]["nao_avaliadas"] == 1
+    assert "2" in validador.chaves["FAMILIAS"]
+    assert not any(validador.chaves["FAMILIAS"].orfaos.values())
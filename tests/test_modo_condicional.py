@@ -0,0 +1,73 @@
+"""Modo de saída "condicional" (StatusAba)."""
+import pytest
+from openpyxl import load_workbook
+
+from planilha_validator import StatusAba
+
+
+def _abas_tabulares(wb):
+    return [ws for ws in wb.worksheets if ws.title not in ("EMPRESA", "RESULTADO DAS VALIDAÇÕES")]
+
+
+def _cabecalho(ws):
+    return [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
+
+
+def test_coluna_de_codigos_com_cabecalho(questionario, validar):
+    _, (saida, *_) = validar(questionario, modo_saida="condicional")
+    wb = load_workbook(saida)
+    for ws in _abas_tabulares(wb):
+        cabecalho = _cabecalho(ws)
+        assert cabecalho[-1] == StatusAba.CABECALHO, ws.title
+        assert ws.column_dimensions[ws.cell(1, len(cabecalho)).column_letter].hidden
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_validar_a_saida_de_novo(questionario, validar, tmp_path, modo_leitura):
+    _, (primeira, *_) = validar(questionario, modo_saida="condicional", processar={"destino": str(tmp_path / "1.xlsx")})
+    _, (segunda, *_) = validar(
+        primeira, modo_saida="condicional", modo_leitura=modo_leitura,
+        processar={"destino": str(tmp_path / "2.xlsx")},
+    )
+    wb1, wb2 = load_workbook(primeira), load_workbook(segunda)
+    for ws1 in _abas_tabulares(wb1):
+        ws2 = wb2[ws1.title]
+        cabecalho = _cabecalho(ws2)
+        assert cabecalho.count(StatusAba.CABECALHO) == 1, ws1.title
+        assert cabecalho.count("RESULTADO") <= 1, ws1.title
+        assert cabecalho == _cabecalho(ws1), ws1.title
+        regras = [regra.formula for intervalo in ws2.conditional_formatting for regra in intervalo.rules]
+        assert len(regras) == len(StatusAba.CORES) + 1, ws1.title
+        assert [str(c.sqref) for c in ws2.conditional_formatting] == [str(c.sqref) for c in ws1.conditional_formatting]
+
+
+def _com_preco_traco(questionario):
+    """PrecoTabela1 = "-" na primeira linha de PRODUTOS: o validador grava "" na célula."""
+    wb = load_workbook(questionario)
+    ws = wb["PRODUTOS"]
+    coluna = _cabecalho(ws).index("PrecoTabela1") + 1
+    ws.cell(2, coluna, "-")
+    wb.save(questionario)
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_borda_igual_ao_modo_normal(questionario, validar, modo_leitura):
+    _com_preco_traco(questionario)
+    _, (normal, *_) = validar(questionario, modo_leitura=modo_leitura)
+    _, (condicional, *_) = validar(questionario, modo_leitura=modo_leitura, modo_saida="condicional")
+    ws_normal = load_workbook(normal)["PRODUTOS"]
+    ws = load_workbook(condicional)["PRODUTOS"]
+    status = len(_cabecalho(ws))
+    coluna = _cabecalho(ws).index("PrecoTabela1") + 1
+    regra = next(r for c in ws.conditional_formatting for r in c.rules if r.dxf.border is not None)
+    assert f'"{StatusAba.SO_BORDA};"' in regra.formula[0]
+
+    assert ws_normal.cell(2, coluna).value is None  # "" sai sem valor no arquivo
+    assert ws_normal.cell(2, coluna).border.left.style
+    for row in ws.iter_rows(max_col=status - 1):
+        codigos = ws.cell(row[0].row, status).value or ""
+        for cell in row:
+            # Simula a regra de borda: célula preenchida ou com o código B
+            borda = cell.value is not None or f";{cell.column}{StatusAba.SO_BORDA};" in codigos
+            esperado = ws_normal.cell(cell.row, cell.column).border.left.style is not None
+            assert borda == esperado, cell.coordinate
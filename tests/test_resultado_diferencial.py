@@ -0,0 +1,45 @@
+"""
+Teste diferencial das regras declaradas (REGRAS_ABAS + _validar_aba) contra
+os validadores escritos aba a aba que elas substituíram.
+
+fixtures/resultado_esperado.json guarda, para cada aba de
+fixtures/questionario.xlsx, o texto e a cor de cada célula da coluna
+RESULTADO na saída do validador anterior à reescrita (commit 477b063). A
+saída atual, nos dois modos de leitura, tem que ser idêntica.
+"""
+import json
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+ESPERADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "resultado_esperado.json")
+
+
+def _coluna_resultado(saida):
+    """{aba: [[texto, cor], ...]} da coluna RESULTADO, da linha 2 em diante."""
+    wb = load_workbook(saida)
+    abas = {}
+    for ws in wb.worksheets:
+        cabecalho = [cell.value for cell in ws[1]]
+        if "RESULTADO" not in cabecalho:
+            continue
+        coluna = cabecalho.index("RESULTADO") + 1
+        abas[ws.title] = [
+            [cell.value, cell.fill.fgColor.rgb if cell.fill.fill_type else None]
+            for (cell,) in ws.iter_rows(min_row=2, min_col=coluna, max_col=coluna)
+        ]
+    return abas
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_resultado_igual_ao_validador_anterior(questionario, validar, modo_leitura):
+    with open(ESPERADO, encoding="utf-8") as f:
+        esperado = json.load(f)
+    _, (saida, *_) = validar(questionario, modo_leitura=modo_leitura)
+    obtido = _coluna_resultado(saida)
+    assert sorted(obtido) == sorted(esperado)
+    for aba, linhas in esperado.items():
+        assert len(obtido[aba]) == len(linhas), aba
+        for row, (linha_esperada, linha_obtida) in enumerate(zip(linhas, obtido[aba]), 2):
+            assert linha_obtida == linha_esperada, f"{aba}!{row}"
@@ -0,0 +1,82 @@
+"""Gravação atômica da planilha de saída (salvar_workbook_atomico)."""
+import os
+import stat
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from planilha_validator import salvar_workbook_atomico
+
+
+class WorkbookQuebrado:
+    """Grava metade do arquivo e falha, como um disco cheio no meio do save."""
+
+    def __init__(self, erro):
+        self.erro = erro
+
+    def save(self, caminho):
+        with open(caminho, "wb") as f:
+            f.write(b"PK\x03\x04 incompleto")
+        raise self.erro
+
+
+def _temporarios(pasta):
+    return [nome for nome in os.listdir(pasta) if nome.startswith(".~") and nome.endswith(".tmp")]
+
+
+def _workbook(valor):
+    wb = Workbook()
+    wb.active["A1"] = valor
+    return wb
+
+
+@pytest.mark.parametrize("erro", [OSError("disco cheio"), KeyboardInterrupt()])
+def test_falha_mantem_o_original(tmp_path, erro):
+    destino = tmp_path / "planilha.xlsx"
+    _workbook("original").save(destino)
+    original = destino.read_bytes()
+
+    with pytest.raises(type(erro)):
+        salvar_workbook_atomico(WorkbookQuebrado(erro), str(destino))
+    assert destino.read_bytes() == original
+    assert _temporarios(tmp_path) == []
+
+
+def test_falha_sem_arquivo_existente(tmp_path):
+    destino = tmp_path / "nova.xlsx"
+    with pytest.raises(OSError):
+        salvar_workbook_atomico(WorkbookQuebrado(OSError("disco cheio")), str(destino))
+    assert not destino.exists()
+    assert _temporarios(tmp_path) == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="permissões POSIX")
+def test_substitui_com_a_permissao_do_original(tmp_path):
+    destino = tmp_path / "planilha.xlsx"
+    _workbook("original").save(destino)
+    os.chmod(destino, 0o640)
+
+    assert salvar_workbook_atomico(_workbook("novo"), str(destino)) == str(destino)
+    assert load_workbook(destino).active["A1"].value == "novo"
+    assert stat.S_IMODE(os.stat(destino).st_mode) == 0o640
+    assert _temporarios(tmp_path) == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="permissões POSIX")
+def test_arquivo_novo_com_a_permissao_padrao(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        destino = tmp_path / "nova.xlsx"
+        salvar_workbook_atomico(_workbook("novo"), str(destino))
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(destino).st_mode) == 0o644
+
+
+def test_objeto_de_arquivo(tmp_path):
+    dados = BytesIO()
+    assert salvar_workbook_atomico(_workbook("novo"), dados) is dados
+    dados.seek(0)
+    assert load_workbook(dados).active["A1"].value == "novo"
+    assert _temporarios(tmp_path) == []
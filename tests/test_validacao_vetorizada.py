@@ -0,0 +1,67 @@
+"""
+Regras numéricas de PRODUTOS sobre vetores NumPy (validacao_vetorizada):
+as mensagens, as cores e os valores corrigidos têm que ser os mesmos da
+validação célula a célula, que também é o caminho sem NumPy.
+"""
+import pytest
+from openpyxl import load_workbook
+
+import validacao_vetorizada
+from planilha_validator import PlanilhaValidator
+
+
+def _celulas(saida):
+    """{aba: {coordenada: (valor, cor)}} de todas as células da saída."""
+    wb = load_workbook(saida)
+    return {
+        ws.title: {
+            cell.coordinate: (cell.value, cell.fill.fgColor.rgb if cell.fill.fill_type else None)
+            for row in ws.iter_rows() for cell in row
+        }
+        for ws in wb.worksheets
+    }
+
+
+@pytest.fixture
+def vetorizacoes(monkeypatch):
+    """Conta as abas em que a validação vetorizada foi de fato usada."""
+    contador = []
+    original = PlanilhaValidator._compilar_vetorizado
+
+    def compilar_vetorizado(self, regras, header, sheet, *args):
+        verificacoes = original(self, regras, header, sheet, *args)
+        contador.append(sheet.title)
+        return verificacoes
+
+    monkeypatch.setattr(PlanilhaValidator, "_compilar_vetorizado", compilar_vetorizado)
+    return contador
+
+
+@pytest.fixture
+def celula_a_celula(questionario, validar, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(validacao_vetorizada, "LINHAS_MINIMAS", float("inf"))
+        _, (saida, *_) = validar(questionario)
+    return _celulas(saida)
+
+
+@pytest.mark.parametrize("modo_leitura", ["completo", "streaming"])
+def test_vetorizado_igual_celula_a_celula(questionario, validar, monkeypatch, vetorizacoes,
+                                          celula_a_celula, modo_leitura):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(validacao_vetorizada, "LINHAS_MINIMAS", 1)
+    _, (saida, *_) = validar(questionario, modo_leitura=modo_leitura)
+    assert vetorizacoes == ["PRODUTOS"]
+    vetorizado = _celulas(saida)
+    assert sorted(vetorizado) == sorted(celula_a_celula)
+    for aba, celulas in celula_a_celula.items():
+        assert vetorizado[aba] == celulas, aba
+
+
+def test_sem_numpy_valida_celula_a_celula(questionario, validar, monkeypatch, vetorizacoes, celula_a_celula):
+    monkeypatch.setattr(validacao_vetorizada, "np", None)
+    monkeypatch.setattr(validacao_vetorizada, "LINHAS_MINIMAS", 1)
+    assert not validacao_vetorizada.disponivel(10 ** 6)
+    _, (saida, *_) = validar(questionario)
+    assert vetorizacoes == []
+    assert _celulas(saida) == celula_a_celula
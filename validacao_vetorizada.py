@@ -0,0 +1,251 @@
+# validacao_vetorizada.py
+"""
+Validação vetorizada (NumPy) das colunas numéricas de PRODUTOS.
+
+Célula a célula, cada regra numérica converte o valor com int()/float() e
+compara com os limites em cada linha. Aqui cada coluna é lida uma vez, cada
+valor distinto da coluna é avaliado uma vez só (pela mesma função da regra
+célula a célula, então as mensagens são as mesmas) e o resultado volta para
+as linhas como vetores tipados com máscaras de validade. As regras entre
+colunas (QtdeTabela1 < QtdeTabela2 < QtdeTabela3, PrecoTabela2 <
+PrecoTabela1...) viram comparações entre vetores. No fim, as mensagens e as
+células a regravar são espalhadas de volta por linha e aplicadas pelo laço
+normal da aba (PlanilhaValidator._validar_aba).
+
+NumPy é opcional: sem ele, ou com poucas linhas, as regras rodam célula a
+célula.
+"""
+from itertools import count
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+# Abaixo disso, montar os vetores custa mais do que validar célula a célula
+LINHAS_MINIMAS = 2000
+
+# Resultado de avaliação que não regrava a célula
+MANTER = object()
+
+_NUMERICOS = {bool, int, float}
+
+
+class NaoVetorizavel(Exception):
+    """Valor que não cabe num vetor tipado (ex.: inteiro maior que 64 bits); a aba volta ao modo célula a célula."""
+
+
+def disponivel(total_linhas):
+    return np is not None and total_linhas >= LINHAS_MINIMAS
+
+
+def _vetor_objetos(valores):
+    # np.array(lista de tuplas) criaria uma matriz; aqui cada item é um objeto
+    vetor = np.empty(len(valores), dtype=object)
+    vetor[:] = valores
+    return vetor
+
+
+class Avaliacao:
+    """
+    Resultado de uma função de avaliação aplicada a uma coluna, por linha:
+    mensagens (tuplas) e tem_mensagem, novos valores e escreve (só quando o
+    valor muda de fato), e `extras` (terceiro item, por valor distinto).
+    """
+
+    def __init__(self, coluna, resultados):
+        indices = coluna.indices
+        tem_mensagem = np.fromiter((bool(r[0]) for r in resultados), dtype=bool, count=len(resultados))
+        escreve = np.fromiter(
+            (
+                r[1] is not MANTER and not (r[1].__class__ is v.__class__ and r[1] == v)
+                for r, v in zip(resultados, coluna.distintos)
+            ),
+            dtype=bool, count=len(resultados),
+        )
+        self.coluna = coluna
+        self.tem_mensagem = tem_mensagem[indices]
+        self.mensagens = _vetor_objetos([r[0] for r in resultados])[indices]
+        self.escreve = escreve[indices]
+        self.novos = _vetor_objetos([r[1] for r in resultados])[indices]
+        self.extras = [r[2] for r in resultados]
+
+    def numeros(self, dtype):
+        """(lido, valores): extras numéricos por linha; None vira lido=False."""
+        lido = np.fromiter((e is not None for e in self.extras), dtype=bool, count=len(self.extras))
+        try:
+            valores = np.array([0 if e is None else e for e in self.extras], dtype=dtype)
+        except OverflowError:
+            raise NaoVetorizavel(self.coluna.idx)
+        return lido[self.coluna.indices], valores[self.coluna.indices]
+
+    def efeitos(self, mascara=None):
+        """Efeitos da avaliação; com `mascara`, só nas linhas marcadas."""
+        tem_mensagem, escreve = self.tem_mensagem, self.escreve
+        if mascara is not None:
+            tem_mensagem = tem_mensagem & mascara
+            escreve = escreve & mascara
+        efeitos = Efeitos()
+        efeitos.mensagem(tem_mensagem, self.mensagens)
+        efeitos.escrever(self.coluna.idx, escreve, self.novos)
+        return efeitos
+
+
+class Coluna:
+    """Uma coluna da aba: posição de cada linha na lista de valores distintos."""
+
+    def __init__(self, idx, valores):
+        self.idx = idx
+        if len(_NUMERICOS.intersection(map(type, valores))) > 1:
+            # True, 1 e 1.0 são a mesma chave para o dict, mas não para as regras
+            mapa = {}
+            indices = [mapa.setdefault((v.__class__, v), len(mapa)) for v in valores]
+            self.distintos = [chave[1] for chave in mapa]
+        else:
+            self.distintos = list(dict.fromkeys(valores))
+            posicao = {v: i for i, v in enumerate(self.distintos)}
+            indices = map(posicao.__getitem__, valores)
+        self.indices = np.fromiter(indices, dtype=np.intp, count=len(valores))
+
+    def avaliar(self, funcao):
+        """funcao(valor) -> (mensagens, novo valor ou MANTER, extra), uma vez por valor distinto."""
+        return Avaliacao(self, [funcao(v) for v in self.distintos])
+
+    def vetor(self, tipos, dtype):
+        """
+        (presente, valores) por valor distinto quando a coluna só tem valores
+        de `tipos` (a classe exata: bool não passa por int) e vazios (None);
+        senão None. Use `indices` para passar para as linhas.
+        """
+        if not set(map(type, self.distintos)) <= tipos | {type(None)}:
+            return None
+        try:
+            valores = np.array([0 if v is None else v for v in self.distintos], dtype=dtype)
+        except OverflowError:
+            return None
+        presente = np.fromiter((v is not None for v in self.distintos), dtype=bool, count=len(self.distintos))
+        return presente, valores
+
+    def preenchida(self):
+        tabela = np.fromiter((bool(v) for v in self.distintos), dtype=bool, count=len(self.distintos))
+        return tabela[self.indices]
+
+
+class Efeitos:
+    """Mensagens e células a regravar de uma regra, como máscaras sobre as linhas."""
+
+    def __init__(self):
+        self.mensagens = []  # (máscara, tupla fixa ou vetor de tuplas por linha)
+        self.escritas = []  # (idx, máscara, vetor de valores por linha)
+
+    def mensagem(self, mascara, textos):
+        self.mensagens.append((mascara, textos))
+
+    def escrever(self, idx, mascara, valores):
+        self.escritas.append((idx, mascara, valores))
+
+
+class ColunasVetorizadas:
+    """
+    Colunas de uma aba lidas de uma vez, para as regras com `vetorizar`.
+    numeros[campo] = (lido, valores) guarda o que uma regra leu para as
+    regras seguintes (o equivalente ao ctx da validação célula a célula).
+    """
+
+    def __init__(self, header, valores_por_coluna, total):
+        self.header = header
+        self.total = total
+        self.numeros = {}
+        self._valores = valores_por_coluna
+        self._colunas = {}
+
+    @classmethod
+    def ler(cls, sheet, header, campos, linha_vazia):
+        """
+        Uma passada em `sheet` (a partir da linha 2) guardando só as colunas de
+        `campos`; as linhas em que linha_vazia(valores) é verdadeiro são puladas,
+        como no laço da aba.
+        """
+        idxs = sorted({header[c] for c in campos if c in header})
+        linhas = []
+        if idxs:
+            pegar = itemgetter(*idxs)
+            if len(idxs) == 1:
+                pegar = lambda valores, i=idxs[0]: (valores[i],)
+            for valores in sheet.iter_rows(min_row=2, values_only=True):
+                if not linha_vazia(valores):
+                    linhas.append(pegar(valores))
+        else:
+            for valores in sheet.iter_rows(min_row=2, values_only=True):
+                if not linha_vazia(valores):
+                    linhas.append(())
+        colunas = list(zip(*linhas)) if linhas else [()] * len(idxs)
+        return cls(header, dict(zip(idxs, colunas)), len(linhas))
+
+    def coluna(self, campo):
+        """Coluna do campo, ou None se ele não estiver no cabeçalho."""
+        idx = self.header.get(campo)
+        if idx is None:
+            return None
+        coluna = self._colunas.get(idx)
+        if coluna is None:
+            coluna = self._colunas[idx] = Coluna(idx, self._valores[idx])
+        return coluna
+
+    def todas(self):
+        return np.ones(self.total, dtype=bool)
+
+    def nenhuma(self):
+        return np.zeros(self.total, dtype=bool)
+
+    def preenchida(self, campo):
+        coluna = self.coluna(campo)
+        return self.nenhuma() if coluna is None else coluna.preenchida()
+
+    def numero(self, campo):
+        """(lido, valores) guardado por uma regra anterior; sem ele, nada lido."""
+        if campo in self.numeros:
+            return self.numeros[campo]
+        return self.nenhuma(), np.zeros(self.total, dtype=np.int64)
+
+    def aplicar(self, efeitos):
+        """
+        Junta os efeitos (na ordem das regras) por linha e devolve a função
+        verificar(row, mensagens, ctx) que o laço da aba chama linha a linha.
+        """
+        # Tuplas de mensagens por linha, concatenadas na ordem das regras
+        acumulado = np.empty(self.total, dtype=object)
+        acumulado.fill(())
+        escritas = []
+        alguma_escrita = self.nenhuma()
+        for efeito in efeitos:
+            for mascara, textos in efeito.mensagens:
+                if not mascara.any():
+                    continue
+                if isinstance(textos, tuple):
+                    constante = np.empty((), dtype=object)
+                    constante[()] = textos
+                    textos = constante
+                else:
+                    textos = textos[mascara]
+                acumulado[mascara] = acumulado[mascara] + textos
+            for idx, mascara, valores in efeito.escritas:
+                if mascara.any():
+                    escritas.append((idx, mascara.tolist(), valores.tolist()))
+                    alguma_escrita |= mascara
+        mensagens_linha = acumulado.tolist()
+        alguma_escrita = alguma_escrita.tolist()
+        proxima_linha = count().__next__
+
+        def verificar(row, mensagens, ctx):
+            linha = proxima_linha()
+            if alguma_escrita[linha]:
+                for idx, escreve, valores in escritas:
+                    if escreve[linha]:
+                        row[idx].value = valores[linha]
+            erros = mensagens_linha[linha]
+            if erros:
+                mensagens.extend(erros)
+
+        return verificar
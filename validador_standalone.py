@@ -3,6 +3,7 @@ from tkinter import filedialog, messagebox, ttk
 import os
 import sys
 import threading
+import multiprocessing
 from datetime import datetime
 from pathlib import Path
 from io import BytesIO
@@ -19,6 +20,7 @@ VERSION_URL = "https://gist.githubusercontent.com/SINT-Developer/a38baad856a6149
 # Importar o validador
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from planilha_validator import PlanilhaValidator
+from cache_resultados import CacheResultados
 
 
 def comparar_versoes(v1, v2):
@@ -144,8 +146,10 @@ class ValidadorApp:
         self.root = root
         self.dev_mode = dev_mode
         self.root.title(f"Validador de Planilhas - SINT v{APP_VERSION}" + (" [DEV]" if dev_mode else ""))
-        self.root.geometry("600x420")
+        self.root.geometry("600x595")
         self.root.resizable(False, False)
+        # Resultados de planilhas já validadas (mesmo conteúdo, mesmas versões)
+        self.cache_resultados = CacheResultados(versao=APP_VERSION)
         self.setup_ui()
 
         # Verificar atualizacao em background apos iniciar
@@ -245,6 +249,65 @@ class ValidadorApp:
         )
         checkbox_novo_arquivo.pack(anchor=tk.W)
 
+        self.modo_streaming = tk.BooleanVar(value=False)
+        checkbox_streaming = ttk.Checkbutton(
+            options_frame,
+            text="Modo streaming (arquivos grandes, menor uso de memória)",
+            variable=self.modo_streaming
+        )
+        checkbox_streaming.pack(anchor=tk.W)
+
+        self.leitura_paralela = tk.BooleanVar(value=False)
+        checkbox_paralela = ttk.Checkbutton(
+            options_frame,
+            text="Leitura paralela das abas (streaming, usa todos os núcleos)",
+            variable=self.leitura_paralela
+        )
+        checkbox_paralela.pack(anchor=tk.W)
+
+        self.saida_condicional = tk.BooleanVar(value=False)
+        checkbox_condicional = ttk.Checkbutton(
+            options_frame,
+            text="Cores por formatação condicional (arquivo menor, gravação mais rápida)",
+            variable=self.saida_condicional
+        )
+        checkbox_condicional.pack(anchor=tk.W)
+
+        self.somente_erros = tk.BooleanVar(value=False)
+        checkbox_somente_erros = ttk.Checkbutton(
+            options_frame,
+            text="Salvar só as linhas com erro ou advertência (planilha completa sob demanda)",
+            variable=self.somente_erros
+        )
+        checkbox_somente_erros.pack(anchor=tk.W)
+
+        self.falha_rapida = tk.BooleanVar(value=False)
+        checkbox_falha_rapida = ttk.Checkbutton(
+            options_frame,
+            text="Interromper se a configuração da EMPRESA (C7 a C11) for inválida",
+            variable=self.falha_rapida
+        )
+        checkbox_falha_rapida.pack(anchor=tk.W)
+
+        self.usar_cache = tk.BooleanVar(value=True)
+        checkbox_cache = ttk.Checkbutton(
+            options_frame,
+            text="Reaproveitar o resultado de planilhas já validadas",
+            variable=self.usar_cache
+        )
+        checkbox_cache.pack(anchor=tk.W)
+
+        # Orçamento de erros: vazio = validar tudo
+        limite_frame = ttk.Frame(options_frame)
+        limite_frame.pack(anchor=tk.W, pady=(2, 0))
+        ttk.Label(limite_frame, text="Parar após linhas com erro - por aba:").pack(side=tk.LEFT)
+        self.limite_erros_aba = tk.StringVar(value="")
+        ttk.Entry(limite_frame, textvariable=self.limite_erros_aba, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(limite_frame, text="no total:").pack(side=tk.LEFT)
+        self.limite_erros_total = tk.StringVar(value="")
+        ttk.Entry(limite_frame, textvariable=self.limite_erros_total, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(limite_frame, text="(vazio = sem limite)").pack(side=tk.LEFT)
+
         # Frame para versão SRPPWIN
         versao_frame = ttk.Frame(main_frame)
         versao_frame.pack(fill=tk.X, pady=5)
@@ -295,7 +358,11 @@ class ValidadorApp:
         credits_label.pack(side=tk.BOTTOM, pady=10)
 
     def browse_file(self):
-        file_types = [("Arquivos Excel", "*.xlsx *.xls *.xlsm *.xlsb")]
+        file_types = [
+            ("Planilhas", "*.xlsx *.xls *.xlsm *.xlsb *.csv"),
+            ("Arquivos Excel", "*.xlsx *.xls *.xlsm *.xlsb"),
+            ("CSV", "*.csv"),
+        ]
         file_path = filedialog.askopenfilename(filetypes=file_types)
         if file_path:
             self.file_path.set(file_path)
@@ -332,6 +399,9 @@ class ValidadorApp:
         try:
             import time
 
+            limite_erros_aba = self._ler_limite_erros(self.limite_erros_aba, "por aba")
+            limite_erros_total = self._ler_limite_erros(self.limite_erros_total, "no total")
+
             # Atualizar progresso
             self.update_progress(2, "Carregando planilha...")
 
@@ -339,7 +409,17 @@ class ValidadorApp:
             t0 = time.perf_counter()
 
             # Instanciar o validador com callback de progresso
-            validator = PlanilhaValidator(file_path, progress_callback=self.update_progress, dev_mode=self.dev_mode)
+            modo_leitura = "streaming" if self.modo_streaming.get() else "completo"
+            validator = PlanilhaValidator(
+                file_path,
+                progress_callback=self.update_progress,
+                dev_mode=self.dev_mode,
+                modo_leitura=modo_leitura,
+                falha_rapida=self.falha_rapida.get(),
+                leitura_paralela=self.leitura_paralela.get(),
+                cache=self.cache_resultados if self.usar_cache.get() else None,
+                modo_saida="condicional" if self.saida_condicional.get() else "cores",
+            )
 
             tempo_load = time.perf_counter() - t0
 
@@ -352,42 +432,43 @@ class ValidadorApp:
             versao_srppwin = self.versao_srppwin.get()
             validator.versao_srppwin = versao_srppwin
 
-            # Processar a validação (progresso é reportado automaticamente pelo validador)
-            t0 = time.perf_counter()
-            excel_data, nome_arquivo, status, resultados = validator.processar(
-                "Validação Local"
-            )
-            tempo_total = time.perf_counter() - t0
-
-            # Verificar se deve gerar planilha de etiquetas
-            etiquetas_result = validator.gerar_planilha_etiquetas()
-
             # Determinar onde salvar com base na opção do usuário
             criar_novo = self.criar_novo_arquivo.get()
 
             # Sempre salvar na mesma pasta da planilha original
             pasta_planilha = os.path.dirname(file_path)
 
-            if criar_novo:
-                # Salvar novo arquivo na pasta da planilha original
-                output_path = os.path.join(pasta_planilha, nome_arquivo)
-            else:
-                # Sobrescrever o arquivo original
-                output_path = file_path
+            # Novo arquivo: o validador cria na pasta com o nome gerado.
+            # Sobrescrever: o original só é substituído quando a gravação
+            # termina (arquivo temporário + rename atômico).
+            destino = pasta_planilha if criar_novo else file_path
+
+            # A saída é sempre .xlsx: um .xls/.xlsb/.csv "sobrescrito" vira
+            # um .xlsx com o mesmo nome, sem apagar o original.
+            if not criar_novo and not file_path.lower().endswith((".xlsx", ".xlsm")):
+                destino = os.path.splitext(file_path)[0] + ".xlsx"
 
-            # Salvar o arquivo principal
-            with open(output_path, "wb") as f:
-                f.write(excel_data.getbuffer())
+            # A planilha só com as linhas com problema nunca substitui o
+            # original: vai sempre para um arquivo novo na pasta
+            somente_erros = self.somente_erros.get()
 
-            # Salvar o arquivo de etiquetas, se existir (sempre como novo arquivo)
+            # Processar a validação (progresso é reportado automaticamente pelo validador)
+            t0 = time.perf_counter()
+            output_path, nome_arquivo, status, resultados = validator.processar(
+                "Validação Local", destino=pasta_planilha if somente_erros else destino,
+                limite_erros_aba=limite_erros_aba, limite_erros_total=limite_erros_total,
+                somente_erros=somente_erros,
+            )
+            tempo_total = time.perf_counter() - t0
+
+            # Gerar planilha de etiquetas, se houver (sempre como novo arquivo,
+            # na mesma pasta do arquivo de saída)
             etiquetas_path = None
+            etiquetas_result = validator.gerar_planilha_etiquetas(
+                destino=os.path.dirname(output_path)
+            )
             if etiquetas_result:
-                etiquetas_data, etiquetas_nome = etiquetas_result
-                # Etiquetas sempre na mesma pasta do arquivo de saída
-                etiquetas_dir = os.path.dirname(output_path)
-                etiquetas_path = os.path.join(etiquetas_dir, etiquetas_nome)
-                with open(etiquetas_path, "wb") as f:
-                    f.write(etiquetas_data.getbuffer())
+                etiquetas_path, etiquetas_nome = etiquetas_result
 
             # Mostrar resultado
             status_text = {
@@ -397,14 +478,36 @@ class ValidadorApp:
             }.get(status, "Validação completa")
 
             message = f"Validação concluída com status: {status_text}\n\n"
-            if criar_novo:
+            if somente_erros:
+                message += f"Linhas com erro ou advertência salvas em:\n{output_path}"
+            elif criar_novo:
                 message += f"Novo arquivo salvo em:\n{output_path}"
+            elif output_path != file_path:
+                message += f"Arquivo salvo em:\n{output_path}"
             else:
                 message += f"Arquivo original atualizado:\n{output_path}"
 
             if etiquetas_path:
                 message += f"\n\nArquivo de etiquetas salvo em:\n{etiquetas_path}"
 
+            nao_avaliadas = {r["Planilha"]: r["nao_avaliadas"] for r in resultados if r.get("nao_avaliadas")}
+            if nao_avaliadas:
+                message += "\n\nLimite de erros atingido; linhas não avaliadas: " + ", ".join(
+                    f"{aba} ({qtd})" for aba, qtd in nao_avaliadas.items()
+                )
+
+            if somente_erros:
+                # A planilha completa (lenta de gravar e de abrir) só sob demanda
+                if messagebox.askyesno(
+                    "Validação Concluída",
+                    message + "\n\nSalvar também a planilha validada completa?",
+                ):
+                    self.status_var.set("Salvando planilha completa...")
+                    completa_path, _ = validator.salvar_saida_completa(destino=destino)
+                    message = f"Planilha completa salva em:\n{completa_path}"
+                else:
+                    message = None
+
             # Reabilitar interface usando a mesma abordagem recursiva
             def enable_widgets(parent):
                 for child in parent.winfo_children():
@@ -419,7 +522,8 @@ class ValidadorApp:
             enable_widgets(self.root)
 
             # Exibir mensagem
-            messagebox.showinfo("Validação Concluída", message)
+            if message:
+                messagebox.showinfo("Validação Concluída", message)
 
             # Atualizar status
             self.status_var.set(f"Validação concluída com status: {status_text}")
@@ -427,6 +531,7 @@ class ValidadorApp:
             # Gerar relatório de profiling se em modo dev
             if self.dev_mode:
                 self._gerar_relatorio_dev(validator, tempo_load, tempo_total, resultados, status)
+                self._gerar_comparativo_carregamento(file_path)
 
         except Exception as e:
             messagebox.showerror(
@@ -447,6 +552,18 @@ class ValidadorApp:
             # Habilitar os controles interativos
             enable_widgets(self.root)
 
+    @staticmethod
+    def _ler_limite_erros(variavel, descricao):
+        """Limite de linhas com erro digitado na tela (None se vazio)."""
+        texto = variavel.get().strip()
+        if not texto:
+            return None
+        if not texto.isdigit() or int(texto) == 0:
+            raise ValueError(
+                f"Limite de erros {descricao} inválido: '{texto}'. Use um número inteiro positivo ou deixe vazio."
+            )
+        return int(texto)
+
     def update_progress(self, value, message):
         # Atualizar a UI a partir de uma thread
         self.root.after(0, lambda: self.progress_var.set(value))
@@ -471,17 +588,96 @@ class ValidadorApp:
         print(f"{'TOTAL PROCESSAMENTO':<35} {tempo_total:>9.2f}s")
         print("=" * 60)
 
+        pool = getattr(validator, "pool_valores", None)
+        if pool is not None and pool.celulas:
+            print("\nPOOL DE VALORES (carga streaming):")
+            print("-" * 40)
+            print(f"  {'Células lidas':<24} {pool.celulas:>12,}")
+            print(f"  {'Valores distintos':<24} {pool.distintos:>12,}")
+            print(f"  {'Objetos reaproveitados':<24} {pool.reaproveitados:>12,}")
+            print(f"  {'Memória economizada':<24} {pool.bytes_economizados / 2**20:>10.1f} MB")
+
+        cache_precos = getattr(validator, "cache_precos", None)
+        if cache_precos is not None and cache_precos.consultas:
+            print("\nCACHE DE PREÇOS E DECIMAIS:")
+            print("-" * 40)
+            print(f"  {'Consultas':<24} {cache_precos.consultas:>12,}")
+            print(f"  {'Acertos':<24} {cache_precos.acertos:>12,}")
+            print(f"  {'Taxa de acerto':<24} {cache_precos.taxa_acerto():>12.1%}")
+            print(f"  {'Textos distintos':<24} {cache_precos.distintos():>12,}")
+
+        paleta = getattr(validator, "paleta", None)
+        if paleta is not None and paleta.operacoes:
+            print("\nESTILOS (PALETA):")
+            print("-" * 40)
+            print(f"  {'Operações de estilo':<24} {paleta.operacoes:>12,}")
+            print(f"  {'Na formatação final':<24} {paleta.operacoes_lote:>12,}")
+            print(f"  {'Tempo da formatação':<24} {paleta.segundos_lote:>11.3f}s")
+            print(f"  {'Operações por segundo':<24} {paleta.operacoes_por_segundo():>12,.0f}")
+
+        cache = getattr(validator, "cache", None)
+        if cache is not None:
+            print("\nCACHE DE RESULTADOS:")
+            print("-" * 40)
+            print(f"  {'Esta validação':<24} {'acerto' if validator.acerto_cache else 'falta':>12}")
+            print(f"  {'Acertos (sessão)':<24} {cache.acertos:>12,}")
+            print(f"  {'Faltas (sessão)':<24} {cache.faltas:>12,}")
+            print(f"  {'Pasta':<24} {cache.pasta}")
+
+        chaves = getattr(validator, "chaves", None)
+        relatorio_chaves = chaves.relatorio() if chaves is not None else []
+        if relatorio_chaves:
+            print("\nCHAVES ENTRE ABAS (códigos sem uso e inexistentes):")
+            print("-" * 40)
+            for linha in relatorio_chaves:
+                print(f"  {linha}")
+
+        tempos_carga = getattr(validator.wb, "tempos_carga", None)
+        if tempos_carga:
+            print("\nCARGA SOB DEMANDA POR ABA (ordem de acesso):")
+            print("-" * 40)
+            processos = getattr(validator.wb, "processos_leitura", 0)
+            if processos:
+                print(f"  Leitura paralela: {processos} processos (tempo = espera pela aba)")
+            for aba, tempo in tempos_carga.items():
+                print(f"  {aba:<24} {tempo:>10.3f}s")
+
         print("\nLINHAS POR ABA:")
         print("-" * 40)
         for r in resultados:
-            print(f"  {r['Planilha']:<20} {r.get('lidas', 0):>6} linhas")
+            nao_avaliadas = f" ({r['nao_avaliadas']} não avaliadas)" if r.get("nao_avaliadas") else ""
+            print(f"  {r['Planilha']:<20} {r.get('lidas', 0):>6} linhas{nao_avaliadas}")
 
         print("\n" + "=" * 60)
         print(f"Status final: {status.upper()}")
         print("=" * 60)
 
 
+    def _gerar_comparativo_carregamento(self, file_path):
+        """Compara tempo e pico de memória do carregamento nos modos completo e streaming."""
+        from planilha_validator import medir_carregamento
+
+        print("\nCARREGAMENTO: COMPLETO x STREAMING")
+        print("-" * 60)
+        medicoes = {}
+        for modo in ("completo", "streaming"):
+            tempo, pico = medir_carregamento(file_path, modo)
+            medicoes[modo] = (tempo, pico)
+            print(f"  {modo:<20} {tempo:>9.2f}s {pico / 2**20:>10.1f} MB")
+
+        tempo_c, pico_c = medicoes["completo"]
+        tempo_s, pico_s = medicoes["streaming"]
+        pct_tempo = (1 - tempo_s / tempo_c) * 100 if tempo_c > 0 else 0
+        pct_mem = (1 - pico_s / pico_c) * 100 if pico_c > 0 else 0
+        print("-" * 60)
+        print(f"  {'Economia streaming':<20} {tempo_c - tempo_s:>9.2f}s {(pico_c - pico_s) / 2**20:>10.1f} MB"
+              f"  ({pct_tempo:.1f}% tempo, {pct_mem:.1f}% memória)")
+        print("=" * 60)
+
+
 if __name__ == "__main__":
+    # Necessário para a leitura paralela (processos "spawn") no executável do PyInstaller
+    multiprocessing.freeze_support()
     dev_mode = "--dev" in sys.argv
     root = tk.Tk()
     app = ValidadorApp(root, dev_mode=dev_mode)